@@ -0,0 +1,76 @@
+"""
+Counts the runtime values allocated while running a loop-heavy script.
+
+    python -m benchmarks.bench_allocations [--calls N]
+
+Every NullVal, BooleanVal, NumberVal and StringVal constructor call is
+counted, so cached or shared values do not show up.
+"""
+import argparse
+import time
+from collections import Counter
+
+from src.environment import Environment
+from src.interpreter import evaluate
+from src.parser_ import Parser
+from src.resolver import Resolver
+from src.values import BooleanVal, NullVal, NumberVal, StringVal
+
+SCRIPT = """
+fn point(x, y) {
+    let label = "point";
+    let origin = null;
+    { label, x, y, origin, visible: true }
+}
+fn step(i) {
+    let scaled = i * 2 + 1;
+    let wrapped = scaled % 10;
+    point(wrapped, 0)
+}
+"""
+
+
+def make_script(calls: int) -> str:
+    return SCRIPT + "\n".join(f"step({i % 100})" for i in range(calls))
+
+
+def count_allocations(source: str) -> Counter:
+    counts: Counter = Counter()
+    originals = {}
+    for cls in (NullVal, BooleanVal, NumberVal, StringVal):
+        originals[cls] = init = cls.__init__
+
+        def counting_init(self, *args, __init=init, __name=cls.__name__):
+            counts[__name] += 1
+            __init(self, *args)
+
+        cls.__init__ = counting_init
+    try:
+        program = Resolver().resolve(Parser().produce_ast(source))
+        counts.clear()  # only count what running the program allocates
+        evaluate(program, Environment())
+    finally:
+        for cls, init in originals.items():
+            cls.__init__ = init
+    return counts
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--calls", type=int, default=20_000)
+    options = arg_parser.parse_args()
+
+    source = make_script(options.calls)
+    counts = count_allocations(source)
+    for name in ("NullVal", "BooleanVal", "NumberVal", "StringVal"):
+        print(f"{name:<11}{counts[name]:>10}")
+    print(f"{'total':<11}{sum(counts.values()):>10}")
+
+    program = Resolver().resolve(Parser().produce_ast(source))
+    start = time.perf_counter()
+    evaluate(program, Environment())
+    print(f"run time   {time.perf_counter() - start:9.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Arithmetic microbenchmark for eval_numeric_binary_expr.
+
+    python -m benchmarks.bench_arith [--ops N] [--repeat N]
+
+Compares the operator table against the eval() based implementation it
+replaced, first on the bare function and then end to end on a long
+generated arithmetic expression, best of --repeat runs each.
+"""
+import argparse
+import time
+
+from src.environment import Environment
+from src.interpreter import eval_numeric_binary_expr, evaluate
+from src.parser_ import Parser
+from src.values import NumberVal
+import src.interpreter as interpreter
+
+
+def legacy_eval_numeric_binary_expr(lhs: NumberVal, rhs: NumberVal, operator: str) -> NumberVal:
+    # The implementation before the operator table, kept for comparison.
+    return NumberVal(eval(f"{lhs.value}{operator}{rhs.value}"))
+
+
+def bench_function(func, ops: int, repeat: int) -> float:
+    pairs = [(NumberVal(i), NumberVal(i % 7 + 1), "+-*/%"[i % 5]) for i in range(ops)]
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for lhs, rhs, op in pairs:
+            func(lhs, rhs, op)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_program(ops: int, repeat: int) -> float:
+    # short statements keep the left-deep BinaryExpr trees clear of the
+    # recursion limit
+    statements = []
+    for i in range(0, ops, 50):
+        chain = "".join(f" {'+-*/%'[j % 5]} {j % 7 + 1}" for j in range(i, min(i + 50, ops)))
+        statements.append(f"let x{i} = 1{chain};")
+    program = Parser().produce_ast("\n".join(statements))
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        evaluate(program, Environment())
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--ops", type=int, default=100_000)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    options = arg_parser.parse_args()
+
+    table = bench_function(eval_numeric_binary_expr, options.ops, options.repeat)
+    legacy = bench_function(legacy_eval_numeric_binary_expr, options.ops, options.repeat)
+    print(f"eval_numeric_binary_expr x{options.ops}: table {table:.3f}s, "
+          f"eval() {legacy:.3f}s, speedup {legacy / table:.1f}x")
+
+    table = bench_program(options.ops, options.repeat)
+    interpreter.eval_numeric_binary_expr = legacy_eval_numeric_binary_expr
+    legacy = bench_program(options.ops, options.repeat)
+    print(f"evaluate() on ~{options.ops} ops: table {table:.3f}s, "
+          f"eval() {legacy:.3f}s, speedup {legacy / table:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Cold and warm start of main.py with the parsed-AST cache.
+
+    python -m benchmarks.bench_ast_cache [--functions N]
+
+The script declares many functions and calls one, so the run is
+dominated by reading the program rather than executing it.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_script(functions: int) -> str:
+    lines = [
+        f"fn f{i}(a, b) {{ let c = a * {i} + b; print(c, \"f{i}\") c % 7 }}"
+        for i in range(functions)
+    ]
+    lines.append("print(f0(1, 2))")
+    return "\n".join(lines)
+
+
+def run(script: str, *flags: str) -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, os.path.join(ROOT, "main.py"), *flags, script],
+        check=True, stdout=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--functions", type=int, default=20_000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    options = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        script = os.path.join(tmp, "generated.txt")
+        with open(script, "w") as f:
+            f.write(make_script(options.functions))
+        print(f"script: {os.path.getsize(script) / 1e6:.1f} MB")
+
+        no_cache = min(run(script, "--no-cache") for _ in range(options.repeat))
+        cold = min(run(script, "--clear-cache") for _ in range(options.repeat))
+        warm = min(run(script) for _ in range(options.repeat))
+
+    print(f"no cache   {no_cache:7.3f}s")
+    print(f"cold       {cold:7.3f}s")
+    print(f"warm       {warm:7.3f}s  ({no_cache / warm:.1f}x faster than no cache)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Many scripts waiting on async natives at once on one event loop.
+
+    python -m benchmarks.bench_async [--scripts N] [--slowest MS]
+
+Runs --scripts scripts concurrently on the async engine. Each reads a
+file, sleeps between 1 and --slowest milliseconds and computes a little.
+They all finish in about the time of the slowest one, where running them
+one after another takes the sum of their sleeps.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from src.async_engine import run_all
+from src.parser_ import Parser
+from src.resolver import Resolver
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def sleep_ms(i: int, slowest: int) -> int:
+    return i % slowest + 1
+
+
+def script(i: int, slowest: int) -> str:
+    ms = sleep_ms(i, slowest)
+    path = os.path.join(ROOT, "func.txt").replace("\\", "/")
+    return "\n".join([
+        f'let text = read_file("{path}");',
+        f"sleep({ms} / 1000)",
+        "fn f(a, b) { a * b + 1 }",
+        f"f({i}, {ms})",
+    ])
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--scripts", type=int, default=1000)
+    arg_parser.add_argument("--slowest", type=int, default=1000)
+    options = arg_parser.parse_args()
+
+    programs = [
+        Resolver().resolve(Parser().produce_ast(script(i, options.slowest)))
+        for i in range(options.scripts)]
+    start = time.perf_counter()
+    results = asyncio.run(run_all(programs))
+    elapsed = time.perf_counter() - start
+
+    failed = [result for result in results if isinstance(result, BaseException)]
+    assert not failed, failed[0]
+    sleeps = [sleep_ms(i, options.slowest) for i in range(options.scripts)]
+    slept = sum(sleeps) / 1000
+    print(f"{options.scripts} scripts, slowest sleeps {max(sleeps, default=0) / 1000:.3f}s: "
+          f"all done in {elapsed:.3f}s (sleeping one after another: {slept:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
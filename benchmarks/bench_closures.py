@@ -0,0 +1,75 @@
+"""
+Memory kept alive by closures and the cost of reading outer variables.
+
+    python -m benchmarks.bench_closures [--closures N] [--size N] [--reads N]
+
+Keeps --closures functions returned by calls whose frames also held a
+--size element list the functions never use, and reports the memory still
+allocated afterwards. Then times a function nested three deep reading
+variables of every enclosing function --reads times.
+"""
+import argparse
+import time
+import tracemalloc
+
+from src.environment import Environment
+from src.interpreter import evaluate
+from src.parser_ import Parser
+from src.resolver import Resolver
+
+
+def retained(closures: int, size: int) -> int:
+    lines = [
+        "fn make(i) {",
+        f"    let unused = range({size});",
+        "    fn get() { i }",
+        "    get",
+        "}",
+    ]
+    lines += [f"let g{i} = make({i});" for i in range(closures)]
+    program = Resolver().resolve(Parser().produce_ast("\n".join(lines)))
+    tracemalloc.start()
+    env = Environment()
+    evaluate(program, env)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current
+
+
+def nested_reads(reads: int) -> float:
+    body = "\n".join("            a + b + c" for _ in range(reads))
+    source = "\n".join([
+        "fn one(a) {",
+        "    fn two(b) {",
+        "        fn three(c) {",
+        body,
+        "        }",
+        "        three(3)",
+        "    }",
+        "    two(2)",
+        "}",
+        "one(1)",
+    ])
+    program = Resolver().resolve(Parser().produce_ast(source))
+    start = time.perf_counter()
+    evaluate(program, Environment())
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--closures", type=int, default=1000)
+    arg_parser.add_argument("--size", type=int, default=1000)
+    arg_parser.add_argument("--reads", type=int, default=100_000)
+    options = arg_parser.parse_args()
+
+    memory = retained(options.closures, options.size)
+    print(f"{options.closures} closures over frames with a {options.size} element list: "
+          f"{memory / 2**20:.1f} MiB retained")
+    seconds = nested_reads(options.reads)
+    print(f"{options.reads * 3} reads of outer variables from 3 deep: "
+          f"{seconds:.3f}s ({seconds / (options.reads * 3) * 1e9:.0f} ns/read)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Snippets per second through the embedding API.
+
+    python -m benchmarks.bench_embed [--snippets N] [--distinct N]
+
+Evaluates --snippets short snippets drawn from --distinct sources, each in
+its own environment: first the way embedders had to, parsing every
+snippet and building a new root Environment, then through Interpreter,
+which caches programs and copies its prebuilt builtins. Also times
+Interpreter.call on a declared function.
+"""
+import argparse
+import time
+
+from src.embed import Interpreter, to_python
+from src.environment import Environment
+from src.interpreter import evaluate
+from src.optimizer import Optimizer
+from src.parser_ import Parser
+from src.resolver import Resolver
+
+
+def snippets(count: int, distinct: int) -> list[str]:
+    return [f"let x = {i % distinct}; let y = x * 3 + 1; max(x, y) - {i % distinct}" for i in range(count)]
+
+
+def by_hand(sources: list[str]) -> float:
+    start = time.perf_counter()
+    for source in sources:
+        program = Resolver().resolve(Optimizer().optimize(Parser().produce_ast(source)))
+        to_python(evaluate(program, Environment()))
+    return time.perf_counter() - start
+
+
+def embedded(sources: list[str]) -> float:
+    interp = Interpreter()
+    start = time.perf_counter()
+    for source in sources:
+        interp.run(source, interp.environment())
+    return time.perf_counter() - start
+
+
+def calls(count: int) -> float:
+    interp = Interpreter()
+    interp.run("fn f(a, b) { a * b + 1 }")
+    start = time.perf_counter()
+    for i in range(count):
+        interp.call("f", i, 2)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--snippets", type=int, default=20_000)
+    arg_parser.add_argument("--distinct", type=int, default=100)
+    options = arg_parser.parse_args()
+
+    sources = snippets(options.snippets, options.distinct)
+    hand = by_hand(sources)
+    embed = embedded(sources)
+    print(f"{options.snippets} snippets, {options.distinct} distinct: "
+          f"by hand {options.snippets / hand:,.0f}/s, Interpreter.run {options.snippets / embed:,.0f}/s "
+          f"({hand / embed:.1f}x)")
+    seconds = calls(options.snippets)
+    print(f"Interpreter.call: {options.snippets / seconds:,.0f} calls/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Edit-to-AST latency of incremental reparsing on a large buffer.
+
+    python -m benchmarks.bench_incremental [--lines N] [--edits N]
+
+Builds a --lines line script and applies --edits random edits through
+Document.edit: changing a number, inserting a statement and deleting one.
+Each is checked against, and timed next to, parsing the whole new buffer.
+"""
+import argparse
+import random
+import time
+
+from src.incremental import Document
+from src.parser_ import Parser
+
+
+def make_source(lines: int) -> str:
+    out: list[str] = []
+    while len(out) < lines:
+        i = len(out)
+        out += [
+            f"fn f{i}(a, b) {{",
+            f"    let c = a * {i % 97} + b;",
+            "    c - a",
+            "}",
+            f"let v{i} = f{i}({i}, 2) + {i % 13};",
+            f"print(v{i}, {{ a: v{i}, b: [1, 2, ] }})",
+        ]
+    return "\n".join(out) + "\n"
+
+
+def random_edit(source: str, rng: random.Random) -> tuple[int, int, str]:
+    kind = rng.choice(("number", "insert", "delete"))
+    if kind == "number":
+        start = source.index("+ b;", rng.randrange(len(source) - 100)) + 2
+        return start, start + 1, str(rng.randrange(1000))
+    line = source.index("\nlet v", rng.randrange(len(source) - 200)) + 1
+    if kind == "insert":
+        return line, line, f"let extra{rng.randrange(10**6)} = 40 + 2;\n"
+    return line, source.index("\n", line) + 1, ""
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--lines", type=int, default=50_000)
+    arg_parser.add_argument("--edits", type=int, default=20)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    options = arg_parser.parse_args()
+
+    rng = random.Random(options.seed)
+    source = make_source(options.lines)
+    start = time.perf_counter()
+    doc = Document(source)
+    initial = time.perf_counter() - start
+    print(f"{source.count(chr(10))} lines, {len(source) / 1e6:.1f} MB, "
+          f"{len(doc.program.body)} statements, first parse {initial:.2f}s")
+
+    incremental = full = 0.0
+    for _ in range(options.edits):
+        edit = random_edit(doc.source, rng)
+        start = time.perf_counter()
+        program = doc.edit(*edit)
+        incremental += time.perf_counter() - start
+        start = time.perf_counter()
+        expected = Parser().produce_ast(doc.source)
+        full += time.perf_counter() - start
+        assert len(program.body) == len(expected.body)
+        assert repr(program.body[-1]) == repr(expected.body[-1])
+    print(f"  incremental: {incremental / options.edits * 1000:8.2f} ms/edit")
+    print(f"  full parse:  {full / options.edits * 1000:8.2f} ms/edit "
+          f"({full / incremental:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
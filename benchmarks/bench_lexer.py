@@ -0,0 +1,169 @@
+"""
+Tokenizer throughput: the cursor lexer against the old pop(0) loop.
+
+    python -m benchmarks.bench_lexer [--legacy-limit BYTES]
+
+The old loop is quadratic, so it is skipped for inputs larger than
+``--legacy-limit`` (1 MB by default).
+"""
+import argparse
+import time
+
+from src.lexer import KEYWORDS, TokenType, is_valid_ident_char, tokenize
+from src.exceptions import TokenizeError
+from src.colored_text import gr
+
+SNIPPET = """
+let foo = 30 / 2;
+const obj = { name: "Amy", y: 32, foo, complex: { is_human: true } };
+fn add(x, y) { let result = x + y * 4 - (x % 3); result }
+print(add(foo, 12), max(1, 0))
+"""
+
+SIZES = {"1KB": 1_000, "100KB": 100_000, "10MB": 10_000_000}
+
+
+class LegacyToken:
+    # the original Token, tokens owned their text
+    def __init__(self, value: str, type_: TokenType) -> None:
+        self.value = value
+        self.type = type_
+
+    def __repr__(self) -> str:
+        return f"<{self.type.name}>"
+
+    def __str__(self) -> str:
+        return f"<{self.type.name}: {self.value}>"
+
+    def __format__(self, spec: str = "short") -> str:
+        spec = "long" if not spec else spec
+        if spec == "long":
+            return f"<{self.type.name}: {self.value}>"
+        else:
+            return self.__repr__()
+
+
+def legacy_tokenize(source_code: str) -> list[LegacyToken]:
+    # The pre-cursor tokenize(), kept verbatim for comparison apart from
+    # the name of its token class.
+    tokens: list[LegacyToken] = []
+    src: list[str] = [i for i in source_code]
+
+    # Build each token until the end of file
+    while (len(src) > 0):
+        if src[0] == TokenType.OpenParen.value:
+            tokens.append(LegacyToken(src.pop(0), TokenType.OpenParen))
+
+        elif src[0] == TokenType.CloseParen.value:
+            tokens.append(LegacyToken(src.pop(0), TokenType.CloseParen))
+
+        elif src[0] == TokenType.OpenBrace.value:
+            tokens.append(LegacyToken(src.pop(0), TokenType.OpenBrace))
+
+        elif src[0] == TokenType.CloseBrace.value:
+            tokens.append(LegacyToken(src.pop(0), TokenType.CloseBrace))
+
+        elif src[0] == TokenType.OpenBracket.value:
+            tokens.append(LegacyToken(src.pop(0), TokenType.OpenBracket))
+
+        elif src[0] == TokenType.CloseBracket.value:
+            tokens.append(LegacyToken(src.pop(0), TokenType.CloseBracket))
+
+        elif src[0] == TokenType.Colon.value:
+            tokens.append(LegacyToken(src.pop(0), TokenType.Colon))
+
+        elif src[0] == TokenType.Comma.value:
+            tokens.append(LegacyToken(src.pop(0), TokenType.Comma))
+
+        elif src[0] == TokenType.Dot.value:
+            tokens.append(LegacyToken(src.pop(0), TokenType.Dot))
+
+        elif src[0] in TokenType.BinaryOperator.value:
+            tokens.append(LegacyToken(src.pop(0), TokenType.BinaryOperator))
+
+        elif src[0] == TokenType.Equals.value:
+            tokens.append(LegacyToken(src.pop(0), TokenType.Equals))
+
+        elif src[0] == TokenType.Semicolon.value:
+            tokens.append(LegacyToken(src.pop(0), TokenType.Semicolon))
+
+        else:
+            # Handle multicharacter tokens
+
+            # Build number token
+            if src[0].isdigit():
+                num = ""
+                while (len(src) > 0 and src[0].isdigit()):
+                    num += src.pop(0)
+
+                tokens.append(LegacyToken(num, TokenType.Number))
+
+            elif is_valid_ident_char(src[0], True):
+                identifier = ""
+                while (len(src) > 0 and is_valid_ident_char(src[0])):
+                    identifier += src.pop(0)
+
+                # check for reserved keywords
+                reserved = KEYWORDS.get(identifier)
+                if reserved:
+                    # print(reserved)
+                    tokens.append(LegacyToken(identifier, reserved))
+                else:
+                    tokens.append(LegacyToken(identifier, TokenType.Identifier))
+
+            elif src[0] == TokenType.Quotation.value:
+                text = ""
+                src.pop(0)
+                while (len(src) > 0 and src[0] != TokenType.Quotation.value):
+                    text += src.pop(0)
+                try:
+                    src.pop(0)
+                except:
+                    raise TokenizeError(
+                        f"Expected \"{gr(TokenType.Quotation.value)}\" on the both end of a string")
+                tokens.append(LegacyToken(text, TokenType.String))
+
+            elif src[0] in " \n\t\r":  # skippable
+                src.pop(0)
+
+            else:
+                raise TokenizeError(
+                    f"Unrecognized character found in source: \"{gr(src[0])}\""
+                )
+
+    tokens.append(LegacyToken(TokenType.EOF.value, TokenType.EOF))
+    return tokens
+
+
+def make_source(size: int) -> str:
+    return (SNIPPET * (size // len(SNIPPET) + 1))[:size].rsplit("\n", 1)[0]
+
+
+def measure(func, source: str) -> tuple[float, int]:
+    start = time.perf_counter()
+    count = len(func(source))
+    return time.perf_counter() - start, count
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--legacy-limit", type=int, default=1_000_000)
+    options = arg_parser.parse_args()
+
+    print(f"{'input':>6} {'tokens':>9} {'cursor MB/s':>12} {'legacy MB/s':>12} {'speedup':>8}")
+    for label, size in SIZES.items():
+        source = make_source(size)
+        mb = len(source) / 1e6
+        new_time, count = measure(tokenize, source)
+        if len(source) <= options.legacy_limit:
+            old_time, old_count = measure(legacy_tokenize, source)
+            assert old_count == count
+            old = f"{mb / old_time:12.2f}"
+            speedup = f"{old_time / new_time:7.1f}x"
+        else:
+            old, speedup = f"{'skipped':>12}", f"{'-':>8}"
+        print(f"{label:>6} {count:>9} {mb / new_time:12.2f} {old} {speedup}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Property reads through inline caches against plain dict lookups.
+
+    python -m benchmarks.bench_members [--reads N] [--objects N]
+
+Times about --reads property reads of an object built by a literal, made
+by a function called over and over, on the tree walker, the closure
+compiler and the VM: first with the inline cache of every read site, then
+with each read looking its key up in a dict, like objects did when they
+kept their properties in one.
+Then times the read on its own, a cache hit against indexing the dict of
+an object, and the memory of --objects three-key objects either way.
+"""
+from typing import Callable
+import argparse
+import time
+import timeit
+import tracemalloc
+
+from src import closure_engine, vm
+from src.ast_ import Program
+from src.compiler import compile_program
+from src.environment import Environment
+from src.interpreter import evaluate
+from src.parser_ import Parser
+from src.resolver import Resolver
+from src.values import ObjectVal, PropertyCache, RuntimeVal, make_number, read_property
+
+
+def compiled(program: Program, engine: str) -> Callable[[Environment], RuntimeVal]:
+    # compile ahead, so only running is timed
+    if engine == "closure":
+        return closure_engine.compile_node(program)
+    if engine == "vm":
+        code = compile_program(program)
+        return lambda env: vm.run(code, env)
+    return lambda env: evaluate(program, env)
+
+
+def hot_reads(reads: int, engine: str) -> float:
+    # a function reading 300 properties, called until --reads are done
+    body = "\n".join("    p.x + p.y * p.z" for _ in range(100))
+    calls = "\n".join("total(p)" for _ in range(max(reads // 300, 1)))
+    source = "\n".join([
+        "fn point(x, y, z) {",
+        "    { x, y, z }",
+        "}",
+        "fn total(p) {",
+        body,
+        "}",
+        "const p = point(1, 2, 3);",
+        calls,
+    ])
+    run = compiled(Resolver().resolve(Parser().produce_ast(source)), engine)
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        run(Environment())
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def uncached_read(cache: PropertyCache, obj):
+    return read_property(obj, cache.key)
+
+
+class DictObject:
+    __slots__ = ("properties",)
+
+    def __init__(self, properties: dict) -> None:
+        self.properties = properties
+
+
+def isolated_reads(reads: int) -> tuple[float, float]:
+    # the read alone: the cache hit the closure compiler and VM inline
+    # against indexing the dict of an object keeping one
+    obj = ObjectVal()
+    obj.properties = {"x": make_number(1), "y": make_number(2), "z": make_number(3)}
+    cache = PropertyCache("y")
+    cache.read(obj)
+    dict_obj = DictObject(obj.properties)
+    cached = min(timeit.repeat(
+        lambda: obj.values[cache.slot] if obj.__class__ is ObjectVal and obj.shape is cache.shape else None,
+        number=reads, repeat=5))
+    plain = min(timeit.repeat(lambda: dict_obj.properties["y"], number=reads, repeat=5))
+    return cached, plain
+
+
+def object_memory(objects: int, as_dict: bool) -> int:
+    program = Resolver().resolve(Parser().produce_ast("{ x: 1, y: 2, z: 3 }"))
+    tracemalloc.start()
+    kept = []
+    for _ in range(objects):
+        obj = evaluate(program, Environment())
+        kept.append(obj.properties if as_dict else obj)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--reads", type=int, default=300_000)
+    arg_parser.add_argument("--objects", type=int, default=100_000)
+    options = arg_parser.parse_args()
+
+    for engine in ("tree", "closure", "vm"):
+        cached = hot_reads(options.reads, engine)
+        read = PropertyCache.read
+        PropertyCache.read = uncached_read
+        try:
+            plain = hot_reads(options.reads, engine)
+        finally:
+            PropertyCache.read = read
+        print(f"{engine:<8} {options.reads} reads: inline cache {cached / options.reads * 1e9:.0f} ns/read, "
+              f"dict lookup {plain / options.reads * 1e9:.0f} ns/read ({plain / cached:.2f}x)")
+
+    cached, plain = isolated_reads(options.reads)
+    print(f"the read alone: cache hit {cached / options.reads * 1e9:.0f} ns/read, "
+          f"properties[key] {plain / options.reads * 1e9:.0f} ns/read")
+
+    shaped = object_memory(options.objects, as_dict=False)
+    dicts = object_memory(options.objects, as_dict=True)
+    print(f"{options.objects} objects of 3 keys: shape and values {shaped / options.objects:.0f} B/object, "
+          f"dict {dicts / options.objects:.0f} B/object")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Memoization of pure functions.
+
+    python -m benchmarks.bench_memo [--calls N] [--distinct N] [--capacity N]
+
+Runs a generated program calling a small pure function with --distinct
+different arguments, --calls times in total, with and without its results
+cached, then prints the cache statistics.
+"""
+import argparse
+import time
+
+from src import memo
+from src.environment import Environment
+from src.interpreter import evaluate
+from src.parser_ import Parser
+from src.resolver import Resolver
+
+HEADER = """
+fn poly(x) {
+    let a = x * x * x;
+    let b = a * 3 + x * x * 2;
+    b - x * 7 + 11
+}
+"""
+
+
+def make_source(calls: int, distinct: int) -> str:
+    lines = [HEADER]
+    for i in range(calls):
+        lines.append(f"let v{i} = poly({i % distinct}) + poly({(i + 1) % distinct});")
+    return "\n".join(lines)
+
+
+def run(source: str, capacity: int | None) -> float:
+    memo.auto_capacity = capacity
+    program = Resolver().resolve(Parser().produce_ast(source))
+    start = time.perf_counter()
+    evaluate(program, Environment())
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--calls", type=int, default=20_000)
+    arg_parser.add_argument("--distinct", type=int, default=100)
+    arg_parser.add_argument("--capacity", type=int, default=memo.DEFAULT_CAPACITY)
+    options = arg_parser.parse_args()
+
+    source = make_source(options.calls, options.distinct)
+    plain = run(source, None)
+    cached = run(source, options.capacity)
+    print(f"{options.calls * 2} calls, {options.distinct} distinct arguments: "
+          f"plain {plain:.3f}s, memoized {cached:.3f}s, speedup {plain / cached:.2f}x")
+    print(memo.report())
+
+
+if __name__ == "__main__":
+    main()
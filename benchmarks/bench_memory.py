@@ -0,0 +1,68 @@
+"""
+Memory used by runtime values and tokens.
+
+    python -m benchmarks.bench_memory [--count N]
+
+Reports the bytes per NumberVal, StringVal and Token, and per token of a
+TokenArray, measured with tracemalloc, and the peak RSS of main.py running a script that builds a
+list literal of --count elements.
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+from src.lexer import Token, TokenType, tokenize
+from src.values import NumberVal, StringVal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def bytes_per_instance(factory, count: int) -> float:
+    payloads = list(range(count))
+    instances = [None] * count
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in payloads:
+        instances[i] = factory(i)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / count
+
+
+def script_peak_rss(count: int) -> float:
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+        f.write("const items = [" + "".join(f"{i % 1000}, " for i in range(count)) + "];\n")
+        f.write("print(max(1, 2))\n")
+    try:
+        out = subprocess.run(
+            # without the AST cache, which would add its write to the peak
+            # and leave a cache directory behind
+            [sys.executable, os.path.join(ROOT, "main.py"), "--no-cache", f.name],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        assert "'value': 2" in out, out
+    finally:
+        os.unlink(f.name)
+    return resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--count", type=int, default=1_000_000)
+    options = arg_parser.parse_args()
+
+    sample = 100_000
+    print(f"NumberVal  {bytes_per_instance(NumberVal, sample):6.1f} bytes")
+    print(f"StringVal  {bytes_per_instance(lambda i: StringVal('s'), sample):6.1f} bytes")
+    source = "x " * sample
+    print(f"Token      {bytes_per_instance(lambda i: Token(TokenType.Identifier, 2 * i, 2 * i + 1, source), sample):6.1f} bytes")
+    print(f"TokenArray {bytes_per_instance(lambda i: tokenize(source) if i == 0 else None, sample):6.1f} bytes per token")
+    print(f"{options.count}-element list script: peak RSS {script_peak_rss(options.count):.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
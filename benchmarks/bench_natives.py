@@ -0,0 +1,104 @@
+"""
+Start-up cost of the standard library and speed of fast native calls.
+
+    python -m benchmarks.bench_natives [--calls N]
+
+Times creating a root Environment in a fresh process, with the standard
+library loaded on demand as it is, then with every module of it imported
+up front. Then times --calls calls of numeric natives (sqrt, hypot) and a
+boxed one (len) on the tree walker, the closure compiler and the VM,
+through the fast path and through the list-of-arguments call.
+"""
+from typing import Callable
+import argparse
+import subprocess
+import sys
+import time
+
+from src import closure_engine, stdlib, vm
+from src.ast_ import Program
+from src.compiler import compile_program
+from src.environment import Environment
+from src.interpreter import evaluate
+from src.parser_ import Parser
+from src.resolver import Resolver
+from src.values import RuntimeVal
+
+START = """
+import sys, time
+start = time.perf_counter()
+from src.environment import Environment
+from src import stdlib
+Environment()
+if {eager}:
+    for name in stdlib.PROVIDERS:
+        stdlib.load(name)
+print(time.perf_counter() - start, sum(name.startswith("src.stdlib.") for name in sys.modules))
+"""
+
+
+def startup(eager: bool) -> tuple[float, int]:
+    best = float("inf")
+    for _ in range(5):
+        out = subprocess.run(
+            [sys.executable, "-c", START.format(eager=eager)],
+            capture_output=True, text=True, check=True).stdout.split()
+        best = min(best, float(out[0]))
+    return best, int(out[1])
+
+
+def compiled(program: Program, engine: str) -> Callable[[Environment], RuntimeVal]:
+    # compile ahead, so only running is timed
+    if engine == "closure":
+        return closure_engine.compile_node(program)
+    if engine == "vm":
+        code = compile_program(program)
+        return lambda env: vm.run(code, env)
+    return lambda env: evaluate(program, env)
+
+
+def native_calls(calls: int, engine: str) -> float:
+    # a function making 300 calls, called until --calls are done
+    body = "\n".join("    sqrt(x) + hypot(x, y) + len(s)" for _ in range(100))
+    source = "\n".join([
+        "fn work(x, y, s) {",
+        body,
+        "}",
+        *("work(3, 4, \"text\")" for _ in range(max(calls // 300, 1))),
+    ])
+    run = compiled(Resolver().resolve(Parser().produce_ast(source)), engine)
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        run(Environment())
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--calls", type=int, default=300_000)
+    options = arg_parser.parse_args()
+
+    lazy, lazy_modules = startup(eager=False)
+    eager, eager_modules = startup(eager=True)
+    print(f"import and root Environment: {lazy * 1e3:.1f} ms loading natives on demand "
+          f"({lazy_modules} stdlib modules), {eager * 1e3:.1f} ms loading all ({eager_modules})")
+
+    natives = [stdlib.load(name) for name in ("sqrt", "hypot", "len")]
+    for engine in ("tree", "closure", "vm"):
+        fast = native_calls(options.calls, engine)
+        arities = [native.arity for native in natives]
+        for native in natives:
+            native.arity = None
+        try:
+            listed = native_calls(options.calls, engine)
+        finally:
+            for (native, arity) in zip(natives, arities):
+                native.arity = arity
+        print(f"{engine:<8} {options.calls} native calls: fast {fast / options.calls * 1e9:.0f} ns/call, "
+              f"argument list {listed / options.calls * 1e9:.0f} ns/call ({listed / fast:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
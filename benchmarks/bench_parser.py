@@ -0,0 +1,82 @@
+"""
+Parse time and peak RSS of Parser.produce_ast on large inputs.
+
+    python -m benchmarks.bench_parser [--legacy-limit BYTES]
+
+"stream" feeds the parser straight from iter_tokens(); "list" tokenizes
+the whole source first; "legacy" also tokenizes first and consumes the
+list with pop(0), like the parser used to. Each run happens in a fresh
+interpreter so that peak RSS is not shared between measurements.
+"""
+import argparse
+import resource
+import subprocess
+import sys
+import time
+
+from src.lexer import Token, TokenType, tokenize, iter_tokens
+from src.parser_ import Parser
+from src.ast_ import Program
+from benchmarks.bench_lexer import make_source
+
+SIZES = {"100KB": 100_000, "1MB": 1_000_000, "10MB": 10_000_000}
+MODES = ("stream", "list", "legacy")
+
+
+class LegacyParser(Parser):
+    def not_eof(self) -> bool:
+        return self.tokens[0].type != TokenType.EOF
+
+    def at(self) -> Token:
+        return self.tokens[0]
+
+    def eat(self) -> Token:
+        token = self.tokens.pop(0)
+        self.end = token.end
+        return token
+
+    def produce_ast(self, source_code):
+        # a list of Token objects, tokenize() now returns a TokenArray
+        self.tokens = list(tokenize(source_code))
+        program = Program()
+        while self.not_eof():
+            program.body.append(self.parse_top_level_stmt())
+        return program
+
+
+def child(mode: str, size: int) -> None:
+    source = make_source(size)
+    start = time.perf_counter()
+    if mode == "stream":
+        Parser().produce_ast(iter_tokens(source))
+    elif mode == "list":
+        Parser().produce_ast(tokenize(source))
+    else:
+        LegacyParser().produce_ast(source)
+    elapsed = time.perf_counter() - start
+    print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--legacy-limit", type=int, default=1_000_000)
+    arg_parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    options = arg_parser.parse_args()
+    if options.child:
+        return child(options.child[0], int(options.child[1]))
+
+    print(f"{'input':>6} {'mode':>7} {'parse s':>9} {'peak RSS MB':>12}")
+    for label, size in SIZES.items():
+        for mode in MODES:
+            if mode == "legacy" and size > options.legacy_limit:
+                print(f"{label:>6} {mode:>7} {'skipped':>9} {'-':>12}")
+                continue
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_parser", "--child", mode, str(size)],
+                capture_output=True, text=True, check=True,
+            ).stdout.split()
+            print(f"{label:>6} {mode:>7} {float(out[0]):9.2f} {int(out[1]) / 1024:12.1f}")
+
+
+if __name__ == "__main__":
+    main()
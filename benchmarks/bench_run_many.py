@@ -0,0 +1,67 @@
+"""
+Throughput of main.py run-many at 1, 2, 4 and one worker per core.
+
+    python -m benchmarks.bench_run_many [--scripts N] [--statements N]
+
+Writes --scripts generated scripts to a temporary directory and runs them
+all with each worker count, then times starting `python main.py` once per
+script on a sample of them for comparison.
+"""
+import argparse
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from src.batch import find_scripts, run_many
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def write_scripts(directory: str, scripts: int, statements: int) -> None:
+    for i in range(scripts):
+        lines = ["fn f(a, b) {", "    let c = a * b;", "    c - a + b % 7", "}"]
+        lines += [f"let v{j} = f({i + j}, {j % 11 + 1}) * 2 + {j};" for j in range(statements)]
+        lines.append(f"print(v{statements - 1})")
+        with open(os.path.join(directory, f"script{i:05}.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--scripts", type=int, default=400)
+    arg_parser.add_argument("--statements", type=int, default=200)
+    arg_parser.add_argument("--sample", type=int, default=20)
+    options = arg_parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as directory:
+        write_scripts(directory, options.scripts, options.statements)
+        paths = find_scripts(directory)
+        print(f"{len(paths)} scripts, {cores} cores")
+
+        base = None
+        for workers in sorted({1, 2, 4, cores}):
+            start = time.perf_counter()
+            counts = run_many(paths, io.StringIO(), workers, use_cache=False)
+            elapsed = time.perf_counter() - start
+            assert counts["ok"] == len(paths), counts
+            base = base or elapsed
+            print(f"  {workers:>3} workers: {elapsed:7.2f}s  {len(paths) / elapsed:8.1f} scripts/s  "
+                  f"{base / elapsed:5.2f}x")
+
+        sample = paths[:options.sample]
+        start = time.perf_counter()
+        for path in sample:
+            subprocess.run(
+                [sys.executable, os.path.join(ROOT, "main.py"), "--no-cache", path],
+                check=True, capture_output=True)
+        elapsed = time.perf_counter() - start
+        print(f"  one process per script: {len(sample) / elapsed:8.1f} scripts/s "
+              f"(sample of {len(sample)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Recursion depth and throughput of the stackless engine.
+
+    python -m benchmarks.bench_stackless [--depth N] [--statements N]
+
+Recurses to --depth both through a call in tail position, which runs in
+constant space, and through one that isn't, which keeps a step per level
+on the heap. The language has no conditionals, so a native tick() ends the
+recursion by raising once its argument reaches the depth. The recursive
+tree walker is run on the same program to show where it gives up. Then
+both engines run a generated call-heavy program to compare throughput.
+"""
+import argparse
+import resource
+import time
+
+from src.environment import Environment
+from src.interpreter import evaluate
+from src.optimizer import Optimizer
+from src.parser_ import Parser
+from src.resolver import Resolver
+from src.stackless import Machine
+from src.values import NULL, NativeFnValue
+
+TAIL = """
+fn loop(n) {
+    tick(n)
+    loop(n + 1)
+}
+loop(0)
+"""
+
+NON_TAIL = """
+fn down(n) {
+    tick(n) + down(n + 1)
+}
+down(0)
+"""
+
+WORKLOAD = """
+fn area(w, h) {
+    let a = w * h;
+    a + w - h
+}
+"""
+
+
+class Bottom(Exception):
+    pass
+
+
+def prepare(source: str):
+    return Resolver().resolve(Optimizer().optimize(Parser().produce_ast(source)))
+
+
+def recurse(source: str, depth: int, run, machine: Machine | None = None) -> tuple[int, int, float]:
+    # -> (deepest n reached, steps on the machine's stack there, seconds)
+    reached = [0, 0]
+
+    def tick(args, env):
+        n = args[0].value
+        reached[0] = n
+        if n >= depth:
+            reached[1] = machine.depth if machine else 0
+            raise Bottom()
+        return NULL
+
+    env = Environment()
+    env.declare_var("tick", NativeFnValue(tick), True)
+    program = prepare(source)
+    start = time.perf_counter()
+    try:
+        run(program, env)
+    except (Bottom, RecursionError):
+        pass
+    return reached[0], reached[1], time.perf_counter() - start
+
+
+def max_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def workload(statements: int) -> str:
+    lines = [WORKLOAD]
+    for i in range(statements):
+        lines.append(f"let v{i} = area({i % 17 + 1}, {i % 5 + 2}) * 2 + {i};")
+    return "\n".join(lines)
+
+
+def throughput(run, program) -> float:
+    start = time.perf_counter()
+    run(program, Environment())
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--depth", type=int, default=1_000_000)
+    arg_parser.add_argument("--statements", type=int, default=20_000)
+    options = arg_parser.parse_args()
+
+    for (name, source) in (("tail", TAIL), ("non-tail", NON_TAIL)):
+        machine = Machine()
+        reached, steps, seconds = recurse(source, options.depth, machine.run, machine)
+        print(f"stackless {name:8}: depth {reached}, {steps} steps on the stack, "
+              f"{seconds:.2f}s, max rss {max_rss_mb():.0f} MB")
+        reached, _, seconds = recurse(source, options.depth, evaluate)
+        print(f"tree      {name:8}: depth {reached} before RecursionError")
+
+    program = prepare(workload(options.statements))
+    tree = throughput(evaluate, program)
+    stackless = throughput(lambda program, env: Machine().run(program, env), program)
+    print(f"{options.statements} statements: tree {tree:.3f}s, stackless {stackless:.3f}s, "
+          f"stackless/tree {stackless / tree:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Start-up time of main.py, checked against a budget.
+
+    python -m benchmarks.bench_startup [--runs N] [--budget MS]
+
+Runs main.py on a one-line script under `python -X importtime` and
+reports the time spent importing modules beyond what a bare interpreter
+imports, with the slowest top-level imports. Then times whole runs of the
+script against `python -c pass`, best of --runs each. Exits with status
+1 when the import time is over --budget milliseconds.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(args: list[str]) -> dict[str, int]:
+    # top-level module -> cumulative import time in microseconds
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=ROOT, capture_output=True, text=True, check=True).stderr
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def wall_time(args: list[str], runs: int) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, check=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--runs", type=int, default=10)
+    arg_parser.add_argument("--budget", type=float, default=75.0)
+    options = arg_parser.parse_args()
+
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+        f.write("let x = 1;\n")
+    try:
+        script = ["main.py", "--no-cache", f.name]
+        # the best of a few runs, a cold disk cache would dominate otherwise
+        bare = min((import_times(["-c", "pass"]) for _ in range(3)), key=lambda t: sum(t.values()))
+        ours = min((import_times(script) for _ in range(3)), key=lambda t: sum(t.values()))
+        added = {name: us for (name, us) in ours.items() if name not in bare}
+        total = sum(added.values()) / 1000
+        print(f"imports: {total:.1f} ms (budget {options.budget:.0f} ms)")
+        for (name, us) in sorted(added.items(), key=lambda item: -item[1])[:5]:
+            print(f"  {name:<24} {us / 1000:6.1f} ms")
+
+        python = wall_time(["-c", "pass"], options.runs)
+        run = wall_time(script, options.runs)
+        print(f"python -c pass {python * 1e3:.1f} ms, main.py on a one-line script {run * 1e3:.1f} ms "
+              f"(+{(run - python) * 1e3:.1f} ms)")
+    finally:
+        os.unlink(f.name)
+
+    if total > options.budget:
+        print(f"over budget by {total - options.budget:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""
+Time to first output and peak RSS of main.py --stream on a large script.
+
+    python -m benchmarks.bench_stream [--statements N]
+
+Writes a script of --statements declarations with a print every 1000
+statements, then runs it with `python main.py --no-cache` and with
+`--stream`, timing the first line of output and the whole run and
+reading each run's peak RSS.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def write_script(path: str, statements: int) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("fn step(a, b) {\n    let c = a * b;\n    c % 1000 + a\n}\n")
+        for i in range(statements):
+            f.write(f"let v{i} = step({i}, {i % 7 + 1}) + {i % 100} * 3 - 2;\n")
+            if i % 1000 == 0:
+                f.write(f"print(v{i})\n")
+
+
+def measure(args: list[str]) -> tuple[float, float, int]:
+    # -> (seconds to the first line, seconds in all, peak RSS in KB)
+    env = {**os.environ, "PYTHONUNBUFFERED": "1"}
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "main.py"), *args],
+                            stdout=subprocess.PIPE, env=env)
+    assert proc.stdout is not None
+    proc.stdout.readline()
+    first = time.perf_counter() - start
+    proc.stdout.read()
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    assert proc.returncode == 0
+    return first, time.perf_counter() - start, usage.ru_maxrss
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--statements", type=int, default=100_000)
+    options = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "big.txt")
+        write_script(path, options.statements)
+        print(f"{options.statements} statements, {os.path.getsize(path) / 1e6:.1f} MB")
+        for (name, args) in (("whole file", ["--no-cache", path]), ("--stream", ["--stream", path])):
+            first, total, rss = measure(args)
+            print(f"  {name:<10} first output {first:7.3f}s  total {total:7.2f}s  "
+                  f"peak RSS {rss / 1024:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
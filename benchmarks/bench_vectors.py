@@ -0,0 +1,45 @@
+"""
+Element-wise arithmetic and reductions on numeric lists.
+
+    python -m benchmarks.bench_vectors [--size N]
+
+Computes x * 3 + 1 over --size numbers three ways: one statement per
+element, on a list literal (boxed, unboxed for each operation) and on a
+range() vector, then sums the result.
+"""
+import argparse
+import time
+
+from src.environment import Environment
+from src.interpreter import evaluate
+from src.parser_ import Parser
+from src.resolver import Resolver
+from src import vectors
+
+
+def run(source: str) -> float:
+    program = Resolver().resolve(Parser().produce_ast(source))
+    start = time.perf_counter()
+    evaluate(program, Environment())
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--size", type=int, default=100_000)
+    options = arg_parser.parse_args()
+    size = options.size
+
+    scalar = "\n".join(f"let x{i} = {i};\nlet y{i} = x{i} * 3 + 1;" for i in range(size))
+    literal = f"let x = [{', '.join(map(str, range(size)))}, ];\nlet y = x * 3 + 1;\nsum(y)"
+    vector = f"let x = range({size});\nlet y = x * 3 + 1;\nsum(y)"
+
+    backend = "numpy" if vectors.numpy is not None else "array"
+    timings = {"per element": run(scalar), "list literal": run(literal), "range vector": run(vector)}
+    print(f"x * 3 + 1 over {size} numbers ({backend} backend)")
+    for (name, seconds) in timings.items():
+        print(f"  {name:<13} {seconds:8.3f}s  {timings['per element'] / seconds:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
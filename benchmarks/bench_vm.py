@@ -0,0 +1,97 @@
+"""
+Run time of the VM against the tree walker and the closure compiler.
+
+    python -m benchmarks.bench_vm [--calls N] [--repeat N]
+
+Compiles each workload ahead for every engine, so only running it is
+timed, and prints the best of --repeat runs with the speedup over the
+tree walker. "locals" calls a function doing arithmetic on its
+parameters and locals --calls times, "calls" makes --calls calls of a
+small function from another one, "nested" is the deep_functions
+workload of the suite, which declares a function on every call.
+"""
+from typing import Callable
+import argparse
+import time
+
+from src import closure_engine, vm
+from src.compiler import compile_program
+from src.environment import Environment
+from src.interpreter import evaluate
+from src.optimizer import Optimizer
+from src.parser_ import Parser
+from src.resolver import Resolver
+from src.values import RuntimeVal
+from benchmarks.workloads import deep_functions
+
+ENGINES = ("tree", "closure", "vm")
+
+
+def locals_source(calls: int) -> str:
+    body = "\n".join([
+        "    let c = a * b + 3;",
+        "    let d = c - a;",
+        "    c = d * 2 + b % 7",
+        "    a + b + c + d - 1",
+    ])
+    return "\n".join([
+        "fn work(a, b) {", body, "}",
+        "fn run(n) {",
+        *("    work(n, 3)" for _ in range(100)),
+        "}",
+        *(f"run({i})" for i in range(max(calls // 100, 1))),
+    ])
+
+
+def calls_source(calls: int) -> str:
+    return "\n".join([
+        "fn inc(x) { x + 1 }",
+        "fn run(n) {",
+        *("    inc(n)" for _ in range(100)),
+        "}",
+        *(f"run({i})" for i in range(max(calls // 100, 1))),
+    ])
+
+
+def compiled(source: str, engine: str) -> Callable[[Environment], RuntimeVal]:
+    program = Resolver().resolve(Optimizer().optimize(Parser().produce_ast(source)))
+    if engine == "closure":
+        return closure_engine.compile_node(program)
+    if engine == "vm":
+        code = compile_program(program)
+        return lambda env: vm.run(code, env)
+    return lambda env: evaluate(program, env)
+
+
+def best_time(run: Callable[[Environment], RuntimeVal], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        env = Environment()
+        start = time.perf_counter()
+        run(env)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--calls", type=int, default=50_000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    options = arg_parser.parse_args()
+
+    workloads = {
+        "locals": locals_source(options.calls),
+        "calls": calls_source(options.calls),
+        "nested": deep_functions(5),
+    }
+    print(f"{'workload':<10}" + "".join(f"{engine:>16}" for engine in ENGINES))
+    for (name, source) in workloads.items():
+        times = {engine: best_time(compiled(source, engine), options.repeat) for engine in ENGINES}
+        row = f"{name:<10}"
+        for engine in ENGINES:
+            row += f"{times[engine]:8.3f}s {times['tree'] / times[engine]:5.2f}x"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
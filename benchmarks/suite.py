@@ -0,0 +1,131 @@
+"""
+Benchmark suite timing tokenize, parse, resolve and evaluate separately.
+
+    python -m benchmarks.suite [--scale F] [--repeat N] [--engine NAME]
+                               [--only NAME ...] [--json PATH]
+                               [--baseline PATH] [--threshold FRACTION]
+
+Runs every generated workload of benchmarks/workloads.py, keeping the best
+time of each phase over --repeat runs, then runs it once more under
+tracemalloc for the peak memory. --json writes the results; a file written
+that way can be given as --baseline later, any phase slower (or peak
+bigger) than the baseline by more than --threshold is reported and makes
+the exit status 1.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from src import __version__
+from src.engines import ENGINES
+from src.environment import Environment
+from src.lexer import tokenize
+from src.optimizer import Optimizer
+from src.parser_ import Parser
+from src.resolver import Resolver
+from benchmarks.workloads import WORKLOADS
+
+PHASES = ("tokenize", "parse", "resolve", "evaluate")
+# differences below this are noise, whatever the ratio
+MIN_SECONDS = 0.005
+
+
+def run_phases(source: str, engine: str) -> dict[str, float]:
+    times: dict[str, float] = {}
+    start = time.perf_counter()
+    tokens = tokenize(source)
+    times["tokenize"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    program = Parser().produce_ast(tokens)
+    times["parse"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    program = Resolver().resolve(Optimizer().optimize(program))
+    times["resolve"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ENGINES[engine](program, Environment())
+    times["evaluate"] = time.perf_counter() - start
+    return times
+
+
+def measure(source: str, engine: str, repeat: int) -> dict[str, float | int]:
+    best = dict.fromkeys(PHASES, float("inf"))
+    for _ in range(repeat):
+        for (phase, seconds) in run_phases(source, engine).items():
+            best[phase] = min(best[phase], seconds)
+
+    tracemalloc.start()
+    try:
+        run_phases(source, engine)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {**best, "peak_kb": peak // 1024, "source_kb": len(source) // 1024}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for (name, current) in results["workloads"].items():
+        previous = baseline.get("workloads", {}).get(name)
+        if previous is None:
+            continue
+        for metric in (*PHASES, "peak_kb"):
+            old, new = previous.get(metric), current[metric]
+            if not old:
+                continue
+            if metric in PHASES and new - old < MIN_SECONDS:
+                continue
+            if new > old * (1 + threshold):
+                regressions.append(f"{name}.{metric}: {old:.4g} -> {new:.4g} (+{new / old - 1:.0%})")
+    return regressions
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--scale", type=float, default=1.0)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--engine", choices=ENGINES, default="tree")
+    arg_parser.add_argument("--only", action="append", choices=WORKLOADS)
+    arg_parser.add_argument("--json", metavar="PATH", help="write the results as JSON")
+    arg_parser.add_argument("--baseline", metavar="PATH", help="JSON results to compare with")
+    arg_parser.add_argument("--threshold", type=float, default=0.10)
+    options = arg_parser.parse_args()
+
+    results: dict = {
+        "version": __version__,
+        "python": platform.python_version(),
+        "engine": options.engine,
+        "scale": options.scale,
+        "workloads": {},
+    }
+    print(f"{'workload':<20}{'KB':>7}" + "".join(f"{phase + ' s':>12}" for phase in PHASES)
+          + f"{'peak KB':>10}")
+    for name in options.only or WORKLOADS:
+        source = WORKLOADS[name](options.scale)
+        row = results["workloads"][name] = measure(source, options.engine, options.repeat)
+        print(f"{name:<20}{row['source_kb']:>7}" + "".join(f"{row[phase]:>12.4f}" for phase in PHASES)
+              + f"{row['peak_kb']:>10}")
+
+    if options.json:
+        with open(options.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if options.baseline:
+        with open(options.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, options.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"no regressions over {options.threshold:.0%} against {options.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""
+Generated programs for the benchmark suite.
+
+Every generator takes a scale factor, 1.0 giving inputs that run in about
+a second on the tree walker, and returns source code. Expressions are kept
+short enough for the recursive tree walker and parser.
+"""
+from typing import Callable
+
+
+def huge_literals(scale: float) -> str:
+    # long strings and many-digit numbers, mostly lexer work
+    lines = []
+    for i in range(int(200 * scale)):
+        lines.append(f'let s{i} = "{"lorem ipsum " * 400}";')
+        lines.append(f"let n{i} = {str(i % 10) * 300};")
+    return "\n".join(lines)
+
+
+def arithmetic_chains(scale: float) -> str:
+    # left-deep chains over a variable, so the optimizer can't fold them
+    lines = ["let x = 7;"]
+    for i in range(int(400 * scale)):
+        chain = "".join(f" {'+-*/'[j % 4]} {'x' if j % 2 else j % 9 + 1}" for j in range(i, i + 100))
+        lines.append(f"let a{i} = x{chain};")
+    return "\n".join(lines)
+
+
+def deep_functions(scale: float, depth: int = 40) -> str:
+    # fn f0 declares and calls f1, which declares and calls f2, ...
+    lines = []
+    for level in range(depth):
+        lines.append(f"{'    ' * level}fn f{level}(x) {{")
+    lines.append(f"{'    ' * depth}x + 1")
+    for level in reversed(range(depth)):
+        if level + 1 < depth:
+            lines.append(f"{'    ' * (level + 1)}f{level + 1}(x) + 1")
+        lines.append(f"{'    ' * level}}}")
+    for i in range(int(300 * scale)):
+        lines.append(f"let r{i} = f0({i});")
+    return "\n".join(lines)
+
+
+def many_declarations(scale: float) -> str:
+    lines = []
+    for i in range(int(10_000 * scale)):
+        lines.append(f"let v{i} = {i};")
+        lines.append(f"const c{i} = v{i} + {i % 13};")
+    return "\n".join(lines)
+
+
+def wide_objects(scale: float, width: int = 1000) -> str:
+    lines = ["let shared = 1;"]
+    for i in range(int(40 * scale)):
+        keys = ", ".join(f"k{j}: {j}" if j % 3 else f"k{j}: shared" for j in range(width))
+        lines.append(f"let o{i} = {{ {keys}, shared }};")
+    return "\n".join(lines)
+
+
+WORKLOADS: dict[str, Callable[[float], str]] = {
+    "huge_literals": huge_literals,
+    "arithmetic_chains": arithmetic_chains,
+    "deep_functions": deep_functions,
+    "many_declarations": many_declarations,
+    "wide_objects": wide_objects,
+}
@@ -0,0 +1,83 @@
+"""
+Runs every script of the conformance corpus on every engine and checks
+that all engines, running optimized programs, agree with the tree walker
+running the program as parsed.
+
+    python -m conformance [--engine NAME ...] [script ...]
+
+The corpus is every *.txt in this directory plus test.txt and func.txt.
+Without scripts, the REPL and embedding checks of sessions.py run too.
+"""
+import argparse
+import contextlib
+import glob
+import io
+import os
+import sys
+
+from src.environment import Environment
+from src.engines import ENGINES
+from src.exceptions import PyException
+from src.parser_ import Parser
+from src.resolver import Resolver
+from src.optimizer import Optimizer
+from conformance import sessions
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+
+def corpus() -> list[str]:
+    scripts = sorted(glob.glob(os.path.join(HERE, "*.txt")))
+    return [os.path.join(ROOT, "test.txt"), os.path.join(ROOT, "func.txt"), *scripts]
+
+
+def run_script(path: str, engine: str, optimize: bool = True) -> str:
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        try:
+            program = Parser().produce_ast(source)
+            if optimize:
+                program = Optimizer().optimize(program)
+            program = Resolver().resolve(program)
+            rst = ENGINES[engine](program, Environment())
+            print(f"=> {rst}")
+        except PyException as e:
+            print(f"!! {e.__class__.__name__}: {e.msg}")
+    return out.getvalue()
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--engine", action="append", choices=ENGINES)
+    arg_parser.add_argument("scripts", nargs="*")
+    options = arg_parser.parse_args()
+
+    engines = options.engine or list(ENGINES)
+    failures = 0
+    for path in options.scripts or corpus():
+        expected = run_script(path, "tree", optimize=False)
+        for engine in engines:
+            actual = run_script(path, engine)
+            if actual != expected:
+                failures += 1
+                print(f"FAIL {os.path.relpath(path, ROOT)} [{engine}]")
+                print(f"  tree:\n{expected}  {engine}:\n{actual}")
+            else:
+                print(f"ok   {os.path.relpath(path, ROOT)} [{engine}]")
+    if not options.scripts:
+        for (label, expected, actual) in sessions.results(engines):
+            if actual != expected:
+                failures += 1
+                print(f"FAIL {label}")
+                print(f"  expected:\n{expected}  actual:\n{actual}")
+            else:
+                print(f"ok   {label}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
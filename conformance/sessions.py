@@ -0,0 +1,92 @@
+"""
+REPL sessions and embedded runs, which resolve every line or source on
+its own, so their globals come from the environment instead of the
+program. Each check is compared against its expected output.
+"""
+import contextlib
+import io
+from typing import Callable
+
+from main import run_line
+from src.colored_text import strip_colors
+from src.embed import Interpreter
+from src.environment import Environment
+from src.engines import ENGINES
+from src.exceptions import PyException
+from src.parser_ import Parser
+
+# name -> (REPL lines, expected output)
+REPL_SESSIONS: dict[str, tuple[list[str], str]] = {
+    # a global of an earlier line shadows the native upper, calling it
+    # isn't pure anymore
+    "shadowed native": (
+        [
+            'fn upper(x) { print(x) x }',
+            "fn f(x) { upper(x) }",
+            "memo(f)",
+            "f(1)",
+            "f(1)",
+            "fn g(x) { abs(x) + 1 }",
+            "memo(g)",
+            "print(g(2) + g(2))",
+        ],
+        "!! InterpretError: Can't memoize f as it is not pure\n"
+        "[{'type': 'number', 'value': 1}]\n"
+        "[{'type': 'number', 'value': 1}]\n"
+        "[{'type': 'number', 'value': 6}]\n",
+    ),
+}
+
+
+def run_session(lines: list[str], engine: str) -> str:
+    out = io.StringIO()
+    parser = Parser()
+    env = Environment()
+    with contextlib.redirect_stdout(out):
+        for line in lines:
+            try:
+                run_line(line, parser, env, ENGINES[engine], True)
+            except PyException as e:
+                print(f"!! {e.__class__.__name__}: {e.msg}")
+    return strip_colors(out.getvalue())
+
+
+def embedded_shadowed_native() -> None:
+    # a host function named like the native log, compiled programs don't
+    # know the session's globals
+    interp = Interpreter()
+    interp.define("log", lambda x: print("LOG", x) or x)
+    for source in ("fn f(x) { log(x) }\nmemo(f)", "f(1)", "f(1)"):
+        try:
+            interp.run(source)
+        except PyException as e:
+            print(f"!! {e.__class__.__name__}: {e.msg}")
+
+
+# name -> (check printing its output, expected output), tree walker only
+EMBEDDED: dict[str, tuple[Callable[[], None], str]] = {
+    "shadowed native": (
+        embedded_shadowed_native,
+        "!! InterpretError: Can't memoize f as it is not pure\n"
+        "LOG 1\n"
+        "LOG 1\n",
+    ),
+}
+
+
+def run_embedded(check: Callable[[], None]) -> str:
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        check()
+    return strip_colors(out.getvalue())
+
+
+def results(engines: list[str]) -> list[tuple[str, str, str]]:
+    """(label, expected, actual) of every check."""
+    rows = []
+    for (name, (lines, expected)) in REPL_SESSIONS.items():
+        for engine in engines:
+            rows.append((f"repl {name} [{engine}]", expected, run_session(lines, engine)))
+    for (name, (check, expected)) in EMBEDDED.items():
+        rows.append((f"embed {name}", expected, run_embedded(check)))
+    return rows
@@ -1,21 +1,39 @@
 #!/home/loya/py-language/venv/bin/python
 from src.exceptions import *
 from src.parser_ import Parser
+from src.resolver import Resolver
+from src.optimizer import Optimizer
+from src.profiler import Profiler
+from src import __version__, ast_cache, memo, stream
 from src.interpreter import *
 from src.environment import Environment
-import readline
+from src.engines import ENGINES
+import argparse
 import sys
 import os
 
 
-def repl():
+def run_line(code: str, parser: Parser, env: Environment, run, optimize: bool) -> RuntimeVal:
+    program = parser.produce_ast(code)
+    if optimize:
+        program = Optimizer().optimize(program)
+    # each line is resolved on its own, globals of earlier lines can still
+    # shadow natives
+    program = Resolver(env.names()).resolve(program)
+    # program.print()
+    return run(program, env)
+
+
+def repl(env: Environment, run, optimize: bool) -> None:
+    # only the repl edits lines, scripts don't wait for readline to load
+    import readline
     if not os.path.exists(".input_history"):
         with open(".input_history", "w", encoding="utf-8") as f:
             ...
     readline.read_history_file(".input_history")
 
     parser = Parser()
-    print("\nRepl v0.1")
+    print(f"\nRepl v{__version__}")
     while True:
         try:
             code = input(">>>")
@@ -31,9 +49,7 @@ def repl():
             break
 
         try:
-            program = parser.produce_ast(code)
-            # program.print()
-            rst = evaluate(program, env)
+            rst = run_line(code, parser, env, run, optimize)
             if not isinstance(rst, NullVal):
                 print(rst)
         except PyException as e:
@@ -43,21 +59,94 @@ def repl():
 
 
 if __name__ == "__main__":
+    if sys.argv[1:2] == ["run-many"]:
+        # multiprocessing is only imported to run many scripts
+        from src import batch
+        sys.exit(batch.main(sys.argv[2:]))
+
+    arg_parser = argparse.ArgumentParser(epilog="python main.py run-many --help: run many scripts in parallel")
+    arg_parser.add_argument("script", nargs="?", help="script to run, starts a repl if omitted")
+    arg_parser.add_argument(
+        "--engine", choices=ENGINES, default="tree", help="execution engine (default: tree)")
+    arg_parser.add_argument(
+        "--dis", action="store_true", help="print the bytecode of the script instead of running it")
+    arg_parser.add_argument(
+        "--no-cache", action="store_true", help="don't read or write the parsed-AST cache")
+    arg_parser.add_argument(
+        "--clear-cache", action="store_true", help="delete the script's AST cache before running")
+    arg_parser.add_argument(
+        "--no-opt", action="store_true", help="run the program without optimizing it first")
+    arg_parser.add_argument(
+        "--opt-report", action="store_true", help="print how many nodes the optimizer removed")
+    arg_parser.add_argument(
+        "--memo", action="store_true", help="cache the results of every pure function")
+    arg_parser.add_argument(
+        "--memo-report", action="store_true", help="print hit/miss/eviction counts of memoized functions")
+    arg_parser.add_argument(
+        "--stream", action="store_true",
+        help="memory-map the script and run each top-level statement as soon as it is parsed")
+    arg_parser.add_argument(
+        "--profile", action="store_true", help="time functions and node kinds and print a report (tree engine)")
+    arg_parser.add_argument(
+        "--profile-stacks", default="profile.folded", metavar="PATH",
+        help="collapsed-stack file written by --profile (default: profile.folded)")
+    args = arg_parser.parse_args()
+
+    if args.profile and args.engine != "tree":
+        arg_parser.error("--profile only works with --engine=tree")
+    if args.stream and (args.dis or args.profile):
+        arg_parser.error("--stream can't be combined with --dis or --profile")
+    if args.memo:
+        memo.auto_capacity = memo.DEFAULT_CAPACITY
+    run = ENGINES[args.engine]
     env = Environment()
-    d = Environment(env)
-    if len(sys.argv) > 1:
-        f = open(sys.argv[1])
+    if args.script and args.stream:
+        try:
+            stream.run_file(args.script, env, run, not args.no_opt)
+        except PyException as e:
+            e.print()
+        if args.memo_report:
+            print(memo.report(), file=sys.stderr)
+    elif args.script:
+        f = open(args.script)
         codes = f.read()
         f.close()
 
         try:
             parser = Parser()
-            program = parser.produce_ast(codes)
+            if args.clear_cache:
+                ast_cache.clear(args.script)
+            if args.no_cache:
+                program = parser.produce_ast(codes)
+            else:
+                program = ast_cache.parse_cached(args.script, codes, parser)
+            if not args.no_opt:
+                optimizer = Optimizer()
+                program = optimizer.optimize(program)
+                if args.opt_report:
+                    print(f"optimizer: {optimizer.nodes_removed} nodes removed", file=sys.stderr)
+            program = Resolver().resolve(program)
             # program.print()
 
-            rst = evaluate(program, env)
+            if args.dis:
+                # the compiler is only imported to print bytecode
+                from src.compiler import compile_program, disassemble
+                print(disassemble(compile_program(program, args.script)))
+                sys.exit()
+
+            if args.profile:
+                profiler = Profiler()
+                try:
+                    rst = profiler.run(program, env)
+                finally:
+                    print(profiler.report(), file=sys.stderr)
+                    profiler.write_collapsed(args.profile_stacks)
+            else:
+                rst = run(program, env)
             # print(rst)
         except PyException as e:
             e.print()
+        if args.memo_report:
+            print(memo.report(), file=sys.stderr)
     else:
-        repl()
+        repl(env, run, not args.no_opt)
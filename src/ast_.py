@@ -1,6 +1,8 @@
 from enum import Enum
-import json
-from typing import Literal, TypedDict
+from typing import TYPE_CHECKING, Literal, TypedDict
+
+if TYPE_CHECKING:
+    from .values import PropertyCache, Shape
 
 
 NodeType = Literal[
@@ -23,12 +25,29 @@ NodeType = Literal[
 ]
 
 
+# the parser's source spans and the resolver's annotations, left out of the
+# repr of a node
+HIDDEN_FIELDS = frozenset({"start", "end", "slot", "cell", "layout", "pure"})
+
+
 class Stmt:
+    # Source span set by the parser, None for nodes it didn't make. A
+    # top-level statement's span holds offsets into the source; the spans of
+    # the nodes inside it are relative to the statement's start, so an edit
+    # before a statement only moves the statement itself.
+    start: int | None = None
+    end: int | None = None
+
     def __init__(self, kind: NodeType) -> None:
         self.kind: NodeType = kind
 
     def __repr__(self) -> str:
-        return str(self.__dict__)
+        # attributes starting with "_" are caches of the engines, and spans
+        # and resolver annotations aren't part of what the node says either
+        return str({
+            key: value for key, value in self.__dict__.items()
+            if key[0] != "_" and key not in HIDDEN_FIELDS
+        })
 
     def print(self) -> None:
         repr = self.__repr__()
@@ -42,6 +61,7 @@ class Stmt:
             repr = repr.replace(key, item)
 
         # print(repr)
+        import json
         print(json.dumps(json.loads(repr), indent=2))
         # print(self.__dict__)
 
@@ -57,6 +77,10 @@ class Program(Stmt):
 
 
 class VarDeclaration(Stmt):
+    # frame slot or cell, set by the resolver for declarations inside functions
+    slot: int | None = None
+    cell: int | None = None
+
     def __init__(
         self, is_const: bool, identifier: str, value: Expr | None = None
     ) -> None:
@@ -66,7 +90,36 @@ class VarDeclaration(Stmt):
         self.value = value
 
 
+class FrameLayout:
+    """
+    Where a resolved function keeps its variables, set by the resolver.
+
+    Locals go in a fixed list of slots, except the ones inner functions
+    capture: those live in cells, followed in the frame's cell list by the
+    cells the function itself captured when it was created.
+    """
+
+    def __init__(self) -> None:
+        self.slot_count = 0
+        # cells for the function's own captured locals
+        self.cell_count = 0
+        # (slot, cell) of each parameter, one of the two is None
+        self.parameters: list[tuple[int | None, int | None]] = []
+        # cells of the creating frame the function captures, in order
+        self.captures: list[int] = []
+
+    def __repr__(self) -> str:
+        return str(self.__dict__)
+
+
 class FunctionDeclaration(Stmt):
+    # set by the resolver: slot or cell of the name and the frame layout
+    slot: int | None = None
+    cell: int | None = None
+    layout: FrameLayout | None = None
+    # set by the resolver: calls with equal arguments give equal results
+    pure: bool = False
+
     def __init__(self, parameters: list[str], name: str, body: list[Stmt]) -> None:
         super().__init__("FunctionDeclaration")
         self.parameters = parameters
@@ -75,18 +128,26 @@ class FunctionDeclaration(Stmt):
 
 
 class Identifier(Expr):
+    # frame slot or cell set by the resolver, both None for globals
+    slot: int | None = None
+    cell: int | None = None
+
     def __init__(self, symbol: str) -> None:
         super().__init__(kind="Identifier")
         self.symbol = symbol
 
 
 class NumericLiteral(Expr):
+    _runtime_value = None
+
     def __init__(self, value: str) -> None:
         super().__init__("NumericLiteral")
-        self.value = float(value)
+        self.value: int | float = int(value)
 
 
 class StringLiteral(Expr):
+    _runtime_value = None
+
     def __init__(self, value: str) -> None:
         super().__init__("StringLiteral")
         self.value = value
@@ -121,6 +182,9 @@ class CallExpr(Expr):
 
 
 class MemberExpr(Expr):
+    # inline cache of the engines, for keys known before running
+    _cache: "PropertyCache | None" = None
+
     def __init__(self, obj: Expr, prop: Expr, computed: bool) -> None:
         super().__init__("MemberExpr")
         self.obj: Expr = obj
@@ -129,6 +193,10 @@ class MemberExpr(Expr):
 
 
 class Property(Expr):
+    # frame slot or cell of a shorthand property, set by the resolver
+    slot: int | None = None
+    cell: int | None = None
+
     def __init__(self, key: str, value: Expr | None = None) -> None:
         super().__init__("Property")
         self.key = key
@@ -136,6 +204,9 @@ class Property(Expr):
 
 
 class ObjectLiteral(Expr):
+    # shape of the objects built here, see interpreter.object_layout
+    _layout: "tuple[Shape, list[int] | None] | None" = None
+
     def __init__(self, properties: list[Property]) -> None:
         super().__init__("ObjectLiteral")
         self.properties = properties
@@ -0,0 +1,193 @@
+from typing import Any
+import gc
+import marshal
+import os
+
+from . import __version__
+from .ast_ import *
+from .parser_ import Parser
+
+# Parsed programs are cached next to the script, like __pycache__. Entries
+# are keyed by a hash of the source text and the interpreter version and
+# hold the tree encoded as nested tuples with marshal, each starting with
+# the node's tag and source span. Any problem reading or writing the cache
+# is ignored and the script is simply parsed again.
+CACHE_DIR = "__plcache__"
+# bump whenever the encoding below changes
+FORMAT_VERSION = 2
+
+# node kind <-> small int tag
+KINDS: list[str] = [
+    "Program", "VarDeclaration", "FunctionDeclaration", "Identifier",
+    "Property", "NumericLiteral", "StringLiteral", "AssignmentExpr",
+    "MemberExpr", "CallExpr", "BinaryExpr", "ObjectLiteral", "ListLiteral",
+]
+TAGS: dict[str, int] = {kind: tag for (tag, kind) in enumerate(KINDS)}
+
+
+def encode(node: Stmt | None) -> Any:
+    if node is None:
+        return None
+
+    tag = TAGS[node.kind]
+    match node.kind:
+        case "Program":
+            assert isinstance(node, Program)
+            return (tag, node.start, node.end, [encode(stmt) for stmt in node.body])
+        case "VarDeclaration":
+            assert isinstance(node, VarDeclaration)
+            return (tag, node.start, node.end, node.is_const, node.identifier, encode(node.value))
+        case "FunctionDeclaration":
+            assert isinstance(node, FunctionDeclaration)
+            return (
+                tag, node.start, node.end, node.parameters, node.name,
+                [encode(stmt) for stmt in node.body])
+        case "Identifier":
+            assert isinstance(node, Identifier)
+            return (tag, node.start, node.end, node.symbol)
+        case "Property":
+            assert isinstance(node, Property)
+            return (tag, node.start, node.end, node.key, encode(node.value))
+        case "NumericLiteral":
+            assert isinstance(node, NumericLiteral)
+            return (tag, node.start, node.end, node.value)
+        case "StringLiteral":
+            assert isinstance(node, StringLiteral)
+            return (tag, node.start, node.end, node.value)
+        case "AssignmentExpr":
+            assert isinstance(node, AssignmentExpr)
+            return (tag, node.start, node.end, encode(node.assign), encode(node.value))
+        case "MemberExpr":
+            assert isinstance(node, MemberExpr)
+            return (tag, node.start, node.end, encode(node.obj), encode(node.prop), node.computed)
+        case "CallExpr":
+            assert isinstance(node, CallExpr)
+            return (tag, node.start, node.end, [encode(arg) for arg in node.args], encode(node.caller))
+        case "BinaryExpr":
+            assert isinstance(node, BinaryExpr)
+            return (tag, node.start, node.end, encode(node.left), encode(node.right), node.operator)
+        case "ObjectLiteral":
+            assert isinstance(node, ObjectLiteral)
+            return (tag, node.start, node.end, [encode(item) for item in node.properties])
+        case "ListLiteral":
+            assert isinstance(node, ListLiteral)
+            return (tag, node.start, node.end, [encode(item) for item in node.body])
+    raise ValueError(f"Can't encode node {node.kind}")
+
+
+def decode(data: Any) -> Any:
+    if data is None:
+        return None
+
+    node = decode_node(KINDS[data[0]], data[3:])
+    if data[1] is not None:
+        node.start, node.end = data[1], data[2]
+    return node
+
+
+def decode_node(kind: str, fields: Any) -> Any:
+    match kind:
+        case "Program":
+            program = Program()
+            program.body = [decode(stmt) for stmt in fields[0]]
+            return program
+        case "VarDeclaration":
+            return VarDeclaration(fields[0], fields[1], decode(fields[2]))
+        case "FunctionDeclaration":
+            return FunctionDeclaration(fields[0], fields[1], [decode(stmt) for stmt in fields[2]])
+        case "Identifier":
+            return Identifier(fields[0])
+        case "Property":
+            return Property(fields[0], decode(fields[1]))
+        case "NumericLiteral":
+            literal = NumericLiteral("0")
+            literal.value = fields[0]
+            return literal
+        case "StringLiteral":
+            return StringLiteral(fields[0])
+        case "AssignmentExpr":
+            return AssignmentExpr(decode(fields[0]), decode(fields[1]))
+        case "MemberExpr":
+            return MemberExpr(decode(fields[0]), decode(fields[1]), fields[2])
+        case "CallExpr":
+            return CallExpr([decode(arg) for arg in fields[0]], decode(fields[1]))
+        case "BinaryExpr":
+            return BinaryExpr(decode(fields[0]), decode(fields[1]), fields[2])
+        case "ObjectLiteral":
+            return ObjectLiteral([decode(item) for item in fields[0]])
+        case "ListLiteral":
+            literal = ListLiteral()
+            literal.body = [decode(item) for item in fields[0]]
+            return literal
+
+
+def cache_dir(script_path: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(script_path)), CACHE_DIR)
+
+
+def cache_path(script_path: str, source_code: str) -> str:
+    import hashlib
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{__version__}:{FORMAT_VERSION}:".encode())
+    digest.update(source_code.encode("utf-8", "surrogatepass"))
+    name = os.path.basename(script_path)
+    return os.path.join(cache_dir(script_path), f"{name}.{digest.hexdigest()}.ast")
+
+
+def load(script_path: str, source_code: str) -> Program | None:
+    # the tree is acyclic, collecting while it is built only costs time
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with open(cache_path(script_path, source_code), "rb") as f:
+            program = decode(marshal.load(f))
+    except Exception:
+        return None
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return program if isinstance(program, Program) else None
+
+
+def entries(script_path: str) -> list[str]:
+    # the cached trees of every version of the script
+    import glob
+    pattern = f"{glob.escape(os.path.basename(script_path))}.{'?' * 32}.ast"
+    return glob.glob(os.path.join(glob.escape(cache_dir(script_path)), pattern))
+
+
+def store(script_path: str, source_code: str, program: Program) -> None:
+    path = cache_path(script_path, source_code)
+    try:
+        data = marshal.dumps(encode(program))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # drop entries for older versions of the same script
+        for stale in entries(script_path):
+            os.remove(stale)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except Exception:
+        pass
+
+
+def clear(script_path: str) -> None:
+    # only this script's entries, the directory is shared with its neighbours
+    for entry in entries(script_path):
+        try:
+            os.remove(entry)
+        except OSError:
+            pass
+    try:
+        os.rmdir(cache_dir(script_path))
+    except OSError:
+        pass
+
+
+def parse_cached(script_path: str, source_code: str, parser: Parser) -> Program:
+    program = load(script_path, source_code)
+    if program is None:
+        program = parser.produce_ast(source_code)
+        store(script_path, source_code, program)
+    return program
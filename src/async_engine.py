@@ -0,0 +1,41 @@
+from .environment import Environment
+from .stackless import Machine
+from .values import RuntimeVal
+from .ast_ import Stmt
+
+
+async def run(node: Stmt, env: Environment, max_depth: int | None = None) -> RuntimeVal:
+    """
+    Evaluates node on the stackless machine inside the running event loop.
+
+    Calls of natives wrapping coroutine functions suspend the script until
+    the coroutine is done, letting the loop run other scripts meanwhile.
+    """
+    driver = Machine(max_depth).drive(node, env)
+    value = None
+    try:
+        while True:
+            try:
+                request = driver.send(value)
+            except StopIteration as stop:
+                return stop.value
+            value = await request.fn.coroutine(request.args, request.env)
+    finally:
+        driver.close()
+
+
+async def run_all(
+    programs: list[Stmt], envs: list[Environment] | None = None
+) -> list[RuntimeVal | BaseException]:
+    """Runs programs concurrently, each in its own (or the given) environment,
+    and returns their results or the exceptions they raised, in order."""
+    import asyncio
+    envs = envs or [Environment() for _ in programs]
+    return await asyncio.gather(
+        *(run(program, env) for (program, env) in zip(programs, envs)), return_exceptions=True)
+
+
+def execute(astNode: Stmt, env: Environment) -> RuntimeVal:
+    # imported here, not with the module, so other engines don't pay for it
+    import asyncio
+    return asyncio.run(run(astNode, env))
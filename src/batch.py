@@ -0,0 +1,143 @@
+"""
+Runs many scripts over a pool of worker processes.
+
+    python main.py run-many <dir|glob> [--workers N] [--timeout SECONDS]
+                            [--engine NAME] [--no-opt] [--no-cache]
+                            [--output PATH]
+
+A directory means every *.txt below it. Each script runs in a fresh root
+Environment with its stdout captured, and one JSON line per script is
+written as results come in (to --output or stdout): the script path, its
+status ("ok", "error" or "timeout"), captured output, result or error,
+and the seconds it took. A summary goes to stderr.
+"""
+import argparse
+import contextlib
+import functools
+import glob
+import io
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+
+from .colored_text import strip_colors
+from .engines import ENGINES
+from .environment import Environment
+from .exceptions import PyException
+from .optimizer import Optimizer
+from .parser_ import Parser
+from .resolver import Resolver
+from . import ast_cache
+
+
+class ScriptTimeout(BaseException):
+    # not an Exception, so nothing on the way swallows it
+    pass
+
+
+def on_alarm(signum, frame) -> None:
+    raise ScriptTimeout()
+
+
+def find_scripts(target: str) -> list[str]:
+    if os.path.isdir(target):
+        return sorted(glob.glob(os.path.join(glob.escape(target), "**", "*.txt"), recursive=True))
+    return sorted(glob.glob(target, recursive=True))
+
+
+def run_script(path: str, engine: str, timeout: float | None, optimize: bool, use_cache: bool) -> dict:
+    record: dict = {"script": path, "status": "ok", "stdout": "", "result": None, "error": None}
+    out = io.StringIO()
+    start = time.perf_counter()
+    try:
+        # the timer is stopped before any handler below runs, so a timeout
+        # can't fire inside one of them and escape as a ScriptTimeout
+        try:
+            if timeout:
+                signal.signal(signal.SIGALRM, on_alarm)
+                signal.setitimer(signal.ITIMER_REAL, timeout)
+            with contextlib.redirect_stdout(out):
+                with open(path, encoding="utf-8") as f:
+                    source = f.read()
+                parser = Parser()
+                if use_cache:
+                    program = ast_cache.parse_cached(path, source, parser)
+                else:
+                    program = parser.produce_ast(source)
+                if optimize:
+                    program = Optimizer().optimize(program)
+                program = Resolver().resolve(program)
+                record["result"] = strip_colors(str(ENGINES[engine](program, Environment())))
+        finally:
+            if timeout:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+    except ScriptTimeout:
+        record["status"] = "timeout"
+        record["error"] = f"timed out after {timeout}s"
+    except PyException as e:
+        record["status"] = "error"
+        record["error"] = strip_colors(f"{e.__class__.__name__}: {e.msg}")
+    except Exception as e:
+        # RecursionError, OSError... the worker has to survive them
+        record["status"] = "error"
+        record["error"] = f"{e.__class__.__name__}: {e}"
+    record["stdout"] = strip_colors(out.getvalue())
+    record["seconds"] = round(time.perf_counter() - start, 6)
+    return record
+
+
+def run_many(
+    paths: list[str],
+    out: io.TextIOBase,
+    workers: int | None = None,
+    timeout: float | None = None,
+    engine: str = "tree",
+    optimize: bool = True,
+    use_cache: bool = True,
+) -> dict[str, int]:
+    # -> number of scripts per status
+    task = functools.partial(
+        run_script, engine=engine, timeout=timeout, optimize=optimize, use_cache=use_cache)
+    counts = {"ok": 0, "error": 0, "timeout": 0}
+    with multiprocessing.Pool(workers) as pool:
+        # small chunks keep workers busy without a round trip per script
+        chunksize = max(1, min(16, len(paths) // ((workers or os.cpu_count() or 1) * 8)))
+        for record in pool.imap_unordered(task, paths, chunksize):
+            counts[record["status"]] += 1
+            out.write(json.dumps(record) + "\n")
+    return counts
+
+
+def main(argv: list[str]) -> int:
+    arg_parser = argparse.ArgumentParser(
+        prog="main.py run-many", description=__doc__.splitlines()[1])
+    arg_parser.add_argument("target", help="directory of scripts or glob pattern")
+    arg_parser.add_argument(
+        "--workers", type=int, default=None, help="worker processes (default: one per core)")
+    arg_parser.add_argument(
+        "--timeout", type=float, default=None, help="seconds each script may run")
+    arg_parser.add_argument("--engine", choices=ENGINES, default="tree")
+    arg_parser.add_argument("--no-opt", action="store_true")
+    arg_parser.add_argument("--no-cache", action="store_true")
+    arg_parser.add_argument("--output", metavar="PATH", help="JSON lines file (default: stdout)")
+    options = arg_parser.parse_args(argv)
+
+    paths = find_scripts(options.target)
+    if not paths:
+        print(f"no scripts match {options.target}", file=sys.stderr)
+        return 1
+
+    start = time.perf_counter()
+    with open(options.output, "w", encoding="utf-8") if options.output else contextlib.nullcontext(sys.stdout) as out:
+        counts = run_many(
+            paths, out, options.workers, options.timeout, options.engine,
+            not options.no_opt, not options.no_cache)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{len(paths)} scripts in {elapsed:.2f}s ({len(paths) / elapsed:.1f}/s): "
+        + ", ".join(f"{count} {status}" for (status, count) in counts.items()),
+        file=sys.stderr)
+    return 0 if counts["ok"] == len(paths) else 1
@@ -0,0 +1,269 @@
+from typing import Callable
+
+from .environment import Environment
+from .interpreter import (
+    BINARY_OPERATORS, eval_list_binary_expr, member_cache, object_layout, read_item)
+from .memo import auto_memoize, call_memoized
+from .colored_text import gr
+from .values import *
+from .ast_ import *
+from .exceptions import *
+
+# A compiled node: runs the node against an environment and returns its value.
+Closure = Callable[[Environment], RuntimeVal]
+
+
+class CompiledFunctionValue(FunctionValue):
+    __slots__ = ("code",)
+    # print like the tree walker's FunctionValue
+    fields = FunctionValue.fields
+
+    def __init__(
+        self,
+        name: str,
+        parameters: list[str],
+        declarationEnv: Environment,
+        body: list[Stmt],
+        code: list[Closure],
+        pure: bool = False
+    ) -> None:
+        super().__init__(name, parameters, declarationEnv, body, pure=pure)
+        self.code = code
+
+
+def compile_program(prog: Program) -> Closure:
+    body = compile_body(prog.body)
+
+    def run_program(env: Environment) -> RuntimeVal:
+        lastEvaluated: RuntimeVal = NULL
+        for stmt in body:
+            lastEvaluated = stmt(env)
+        return lastEvaluated
+
+    return run_program
+
+
+def compile_body(body: list[Stmt]) -> list[Closure]:
+    return [compile_node(stmt) for stmt in body]
+
+
+def compile_numeric_literal(node: NumericLiteral) -> Closure:
+    value = make_number(node.value)
+    return lambda env: value
+
+
+def compile_string_literal(node: StringLiteral) -> Closure:
+    value = StringVal(node.value)
+    return lambda env: value
+
+
+def compile_identifier(node: Identifier) -> Closure:
+    symbol = node.symbol
+    return lambda env: env.lookup_var(symbol)
+
+
+def compile_binary_expr(node: BinaryExpr) -> Closure:
+    left = compile_node(node.left)
+    right = compile_node(node.right)
+    operator = node.operator
+    op = BINARY_OPERATORS.get(operator)
+
+    def binary_expr(env: Environment) -> RuntimeVal:
+        lhs = left(env)
+        rhs = right(env)
+        if lhs.type == "number" and rhs.type == "number":
+            if op is None:
+                raise InterpretError(f"Unrecognized operator \"{gr(operator)}\"")
+            return make_number(op(lhs.value, rhs.value))
+        if lhs.type == "list" or rhs.type == "list":
+            return eval_list_binary_expr(lhs, rhs, operator)
+        return NULL
+
+    return binary_expr
+
+
+def compile_var_declaration(node: VarDeclaration) -> Closure:
+    identifier = node.identifier
+    is_const = node.is_const
+    value = compile_node(node.value) if node.value else None
+
+    def var_declaration(env: Environment) -> RuntimeVal:
+        if env.has_var(identifier):
+            raise VarExistsError(
+                f"Can't declare variable {gr(identifier)}. As it is already defined.")
+        return env.declare_var(identifier, value(env) if value else NULL, is_const)
+
+    return var_declaration
+
+
+def compile_func_declaration(node: FunctionDeclaration) -> Closure:
+    name = node.name
+    parameters = node.parameters
+    body = node.body
+    pure = node.pure
+    code = compile_body(body)
+
+    def func_declaration(env: Environment) -> RuntimeVal:
+        fn = CompiledFunctionValue(name, parameters, env, body, code, pure)
+        auto_memoize(fn)
+        return env.declare_var(name, fn, True)
+
+    return func_declaration
+
+
+def compile_assignment(node: AssignmentExpr) -> Closure:
+    if node.assign.kind != "Identifier":
+        def invalid_assignment(env: Environment) -> RuntimeVal:
+            raise InterpretError(f"Invalid assigned object")
+        return invalid_assignment
+
+    assert isinstance(node.assign, Identifier)
+    symbol = node.assign.symbol
+    value = compile_node(node.value)
+    return lambda env: env.assign_var(symbol, value(env))
+
+
+def compile_object_expr(node: ObjectLiteral) -> Closure:
+    properties = [
+        (item.key, compile_node(item.value) if item.value else None)
+        for item in node.properties
+    ]
+
+    shape, slots = object_layout(node)
+
+    def object_expr(env: Environment) -> RuntimeVal:
+        values = [value(env) if value else env.lookup_var(key) for key, value in properties]
+        return build_object(shape, slots, values)
+
+    return object_expr
+
+
+def compile_member_expr(node: MemberExpr) -> Closure:
+    obj = compile_node(node.obj)
+    cache = member_cache(node)
+    if cache is not None:
+        read = cache.read
+
+        def cached_member_expr(env: Environment) -> RuntimeVal:
+            target = obj(env)
+            # the cache hit inlined, read handles the rest
+            if target.__class__ is ObjectVal and target.shape is cache.shape:
+                return target.values[cache.slot]
+            return read(target)
+
+        return cached_member_expr
+
+    prop = compile_node(node.prop)
+
+    def member_expr(env: Environment) -> RuntimeVal:
+        target = obj(env)
+        return read_item(target, prop(env))
+
+    return member_expr
+
+
+def compile_list_expr(node: ListLiteral) -> Closure:
+    items = compile_body(node.body)
+
+    def list_expr(env: Environment) -> RuntimeVal:
+        array = ListVal()
+        array.items = [item(env) for item in items]
+        return array
+
+    return list_expr
+
+
+def compile_call_expr(node: CallExpr) -> Closure:
+    caller = compile_node(node.caller)
+    arguments = compile_body(node.args)
+
+    # natives of a fixed arity take one or two arguments without a list,
+    # numeric ones unboxed, see NativeFnValue
+    if len(arguments) == 1:
+        (first,) = arguments
+
+        def unary_call_expr(env: Environment) -> RuntimeVal:
+            fn = caller(env)
+            x = first(env)
+            if fn.type == "native-fn" and fn.arity == 1:
+                if not fn.numeric:
+                    return fn.fast(x)
+                if x.type == "number":
+                    return make_number(fn.fast(x.value))
+            return call_value(fn, [x], env)
+
+        return unary_call_expr
+
+    if len(arguments) == 2:
+        (first, second) = arguments
+
+        def binary_call_expr(env: Environment) -> RuntimeVal:
+            fn = caller(env)
+            x = first(env)
+            y = second(env)
+            if fn.type == "native-fn" and fn.arity == 2:
+                if not fn.numeric:
+                    return fn.fast(x, y)
+                if x.type == "number" and y.type == "number":
+                    return make_number(fn.fast(x.value, y.value))
+            return call_value(fn, [x, y], env)
+
+        return binary_call_expr
+
+    return lambda env: call_value(caller(env), [arg(env) for arg in arguments], env)
+
+
+def call_value(fn: RuntimeVal, args: list[RuntimeVal], env: Environment) -> RuntimeVal:
+    if fn.type == "native-fn":
+        assert isinstance(fn, NativeFnValue)
+        return fn.call(args, env)
+    elif fn.type == "function":
+        assert isinstance(fn, FunctionValue)
+        if fn.memo is not None:
+            return call_memoized(fn, args, call_function)
+        return call_function(fn, args)
+    raise InterpretError(f"Function {fn} is not implemented")
+
+
+def call_function(fn: FunctionValue, args: list[RuntimeVal]) -> RuntimeVal:
+    code = fn.code if isinstance(fn, CompiledFunctionValue) else compile_body(fn.body)
+    scope = Environment(fn.declarationEnv)
+    for (i, param) in enumerate(fn.parameters):
+        scope.declare_var(param, args[i], False)
+
+    rst: RuntimeVal = NULL
+    for stmt in code:
+        rst = stmt(scope)
+    return rst
+
+
+def compile_unsupported(node: Stmt) -> Closure:
+    # fail when the node runs, not when it is compiled, like evaluate does
+    def unsupported(env: Environment) -> RuntimeVal:
+        raise InterpretError(
+            f"This AST Node has not yet been setup for interpretation: <{gr(node.kind)}>")
+    return unsupported
+
+
+COMPILERS: dict[str, Callable[..., Closure]] = {
+    "Program": compile_program,
+    "NumericLiteral": compile_numeric_literal,
+    "StringLiteral": compile_string_literal,
+    "Identifier": compile_identifier,
+    "ObjectLiteral": compile_object_expr,
+    "CallExpr": compile_call_expr,
+    "MemberExpr": compile_member_expr,
+    "ListLiteral": compile_list_expr,
+    "BinaryExpr": compile_binary_expr,
+    "VarDeclaration": compile_var_declaration,
+    "FunctionDeclaration": compile_func_declaration,
+    "AssignmentExpr": compile_assignment,
+}
+
+
+def compile_node(astNode: Stmt) -> Closure:
+    return COMPILERS.get(astNode.kind, compile_unsupported)(astNode)
+
+
+def execute(astNode: Stmt, env: Environment) -> RuntimeVal:
+    return compile_node(astNode)(env)
@@ -17,10 +17,16 @@ Cyan: \u001b[36m
 White: \u001b[37m
 Reset: \u001b[0m
 """
+import re
 
 def gr(ob: object) -> object:
     return f"\u001b[32m{ob}\u001b[0m"
 
+
+def strip_colors(text: str) -> str:
+    # drop the escape codes, for output that isn't read on a terminal
+    return re.sub("\u001b\\[[0-9;]*m", "", text)
+
 # make it brighter
 # add a ;1
 # e.g. \u001b[30;1m
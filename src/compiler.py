@@ -0,0 +1,317 @@
+from array import array
+from enum import IntEnum
+
+from .colored_text import gr
+from .interpreter import member_cache, object_layout
+from .values import *
+from .ast_ import *
+from .exceptions import *
+
+
+class Op(IntEnum):
+    LOAD_CONST = 0
+    LOAD_NULL = 1
+    LOAD_NAME = 2
+    STORE_NAME = 3
+    CHECK_UNDECLARED = 4
+    DECLARE_LET = 5
+    DECLARE_CONST = 6
+    BINARY_OP = 7
+    CALL = 8
+    MAKE_FUNCTION = 9
+    BUILD_LIST = 10
+    BUILD_OBJECT = 11
+    POP_TOP = 12
+    RETURN_VALUE = 13
+    FAIL = 14
+    LOAD_PROPERTY = 15
+    LOAD_ITEM = 16
+    LOAD_FAST = 17
+    STORE_FAST = 18
+    DECLARE_FAST = 19
+    LOAD_CELL = 20
+    STORE_CELL = 21
+    DECLARE_CELL = 22
+    BINARY_ADD = 23
+    BINARY_SUB = 24
+    BINARY_MUL = 25
+
+
+# BINARY_OP argument -> operator
+BINARY_OPS: list[str] = ["+", "-", "*", "/", "%"]
+# operators with an opcode of their own, they can't fail on two numbers
+SPECIALIZED_OPS: dict[str, Op] = {"+": Op.BINARY_ADD, "-": Op.BINARY_SUB, "*": Op.BINARY_MUL}
+
+
+class CodeObject:
+    """
+    Compiled form of a program or a function body.
+
+    `code` holds (opcode, argument) pairs back to back. Arguments index
+    into `consts` or `names`, address a frame slot or cell, or are counts,
+    depending on the opcode. Functions the resolver annotated keep their
+    locals in the slots and cells of `layout`, the rest of the names are
+    globals, looked up by name.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        parameters: list[str] | None = None,
+        pure: bool = False,
+        layout: FrameLayout | None = None,
+        body: list[Stmt] | None = None,
+    ) -> None:
+        self.name = name
+        self.parameters: list[str] = parameters or []
+        # set for functions the resolver found pure
+        self.pure = pure
+        self.layout = layout
+        # the declaration's body, for printing the function
+        self.body: list[Stmt] = body or []
+        # the parameters are the first slots, in order: a call makes the
+        # arguments the frame's slots, followed by the other locals unset
+        self.args_in_slots = layout is not None and layout.parameters == [
+            (i, None) for i in range(len(self.parameters))]
+        self.unset_locals: tuple[None, ...] = (
+            (None,) * (layout.slot_count - len(self.parameters)) if self.args_in_slots else ())
+        # slot or cell -> name, for errors and the disassembly
+        self.slot_names: dict[int, str] = {}
+        self.cell_names: dict[int, str] = {}
+        self.code = array("i")
+        self.consts: list[object] = []
+        self.names: list[str] = []
+        self.__const_index: dict[tuple, int] = {}
+        self.__name_index: dict[str, int] = {}
+
+    def __repr__(self) -> str:
+        return f"<code {self.name}>"
+
+    def emit(self, op: Op, arg: int = 0) -> None:
+        self.code.append(op)
+        self.code.append(arg)
+
+    def add_const(self, value: object) -> int:
+        # literals are deduplicated, code objects, layouts and caches are not
+        if isinstance(value, RuntimeVal):
+            key: tuple = (type(value), type(value.value), value.value)
+        else:
+            key = (type(value), id(value))
+        index = self.__const_index.get(key)
+        if index is None:
+            index = self.__const_index[key] = len(self.consts)
+            self.consts.append(value)
+        return index
+
+    def add_name(self, name: str) -> int:
+        index = self.__name_index.get(name)
+        if index is None:
+            index = self.__name_index[name] = len(self.names)
+            self.names.append(name)
+        return index
+
+
+class Compiler:
+    def __init__(self, code: CodeObject) -> None:
+        self.code = code
+
+    def compile_body(self, body: list[Stmt]) -> CodeObject:
+        # every statement leaves its value on the stack; only the last
+        # one is kept as the result
+        if not body:
+            self.code.emit(Op.LOAD_NULL)
+        for (i, stmt) in enumerate(body):
+            if i:
+                self.code.emit(Op.POP_TOP)
+            self.compile(stmt)
+        self.code.emit(Op.RETURN_VALUE)
+        return self.code
+
+    def compile(self, node: Stmt) -> None:
+        match node.kind:
+            case "NumericLiteral":
+                assert isinstance(node, NumericLiteral)
+                self.compile_numeric_literal(node)
+            case "StringLiteral":
+                assert isinstance(node, StringLiteral)
+                self.compile_string_literal(node)
+            case "Identifier":
+                assert isinstance(node, Identifier)
+                self.compile_identifier(node)
+            case "ObjectLiteral":
+                assert isinstance(node, ObjectLiteral)
+                self.compile_object_expr(node)
+            case "CallExpr":
+                assert isinstance(node, CallExpr)
+                self.compile_call_expr(node)
+            case "MemberExpr":
+                assert isinstance(node, MemberExpr)
+                self.compile_member_expr(node)
+            case "ListLiteral":
+                assert isinstance(node, ListLiteral)
+                self.compile_list_expr(node)
+            case "BinaryExpr":
+                assert isinstance(node, BinaryExpr)
+                self.compile_binary_expr(node)
+            case "VarDeclaration":
+                assert isinstance(node, VarDeclaration)
+                self.compile_var_declaration(node)
+            case "FunctionDeclaration":
+                assert isinstance(node, FunctionDeclaration)
+                self.compile_func_declaration(node)
+            case "AssignmentExpr":
+                assert isinstance(node, AssignmentExpr)
+                self.compile_assignment(node)
+            case _:
+                self.fail(
+                    f"This AST Node has not yet been setup for interpretation: <{gr(node.kind)}>")
+
+    def fail(self, msg: str) -> None:
+        # errors are raised when the instruction runs, like evaluate does
+        self.code.emit(Op.FAIL, self.code.add_const(msg))
+
+    def compile_numeric_literal(self, node: NumericLiteral) -> None:
+        self.code.emit(Op.LOAD_CONST, self.code.add_const(make_number(node.value)))
+
+    def compile_string_literal(self, node: StringLiteral) -> None:
+        self.code.emit(Op.LOAD_CONST, self.code.add_const(StringVal(node.value)))
+
+    def load(self, symbol: str, slot: int | None, cell: int | None) -> None:
+        # a local of the frame or a global
+        if slot is not None:
+            self.code.slot_names[slot] = symbol
+            self.code.emit(Op.LOAD_FAST, slot)
+        elif cell is not None:
+            self.code.cell_names[cell] = symbol
+            self.code.emit(Op.LOAD_CELL, cell)
+        else:
+            self.code.emit(Op.LOAD_NAME, self.code.add_name(symbol))
+
+    def declare_local(self, symbol: str, slot: int | None, cell: int | None) -> bool:
+        # declares the value on the stack in the frame, False for globals
+        if slot is not None:
+            self.code.slot_names[slot] = symbol
+            self.code.emit(Op.DECLARE_FAST, slot)
+        elif cell is not None:
+            self.code.cell_names[cell] = symbol
+            self.code.emit(Op.DECLARE_CELL, cell)
+        else:
+            return False
+        return True
+
+    def compile_identifier(self, node: Identifier) -> None:
+        self.load(node.symbol, node.slot, node.cell)
+
+    def compile_binary_expr(self, node: BinaryExpr) -> None:
+        self.compile(node.left)
+        self.compile(node.right)
+        if node.operator in SPECIALIZED_OPS:
+            self.code.emit(SPECIALIZED_OPS[node.operator])
+        elif node.operator in BINARY_OPS:
+            self.code.emit(Op.BINARY_OP, BINARY_OPS.index(node.operator))
+        else:
+            self.fail(f"Unrecognized operator \"{gr(node.operator)}\"")
+
+    def compile_var_declaration(self, node: VarDeclaration) -> None:
+        if node.slot is not None or node.cell is not None:
+            # the resolver already rejected a second declaration
+            if node.value:
+                self.compile(node.value)
+            else:
+                self.code.emit(Op.LOAD_NULL)
+            self.declare_local(node.identifier, node.slot, node.cell)
+            return
+
+        name = self.code.add_name(node.identifier)
+        self.code.emit(Op.CHECK_UNDECLARED, name)
+        if node.value:
+            self.compile(node.value)
+        else:
+            self.code.emit(Op.LOAD_NULL)
+        self.code.emit(Op.DECLARE_CONST if node.is_const else Op.DECLARE_LET, name)
+
+    def compile_func_declaration(self, node: FunctionDeclaration) -> None:
+        code = CodeObject(node.name, node.parameters, node.pure, node.layout, node.body)
+        self.code.emit(Op.MAKE_FUNCTION, self.code.add_const(Compiler(code).compile_body(node.body)))
+        if not self.declare_local(node.name, node.slot, node.cell):
+            self.code.emit(Op.DECLARE_CONST, self.code.add_name(node.name))
+
+    def compile_assignment(self, node: AssignmentExpr) -> None:
+        if node.assign.kind != "Identifier":
+            return self.fail(f"Invalid assigned object")
+        target = node.assign
+        assert isinstance(target, Identifier)
+        self.compile(node.value)
+        if target.slot is not None:
+            self.code.slot_names[target.slot] = target.symbol
+            self.code.emit(Op.STORE_FAST, target.slot)
+        elif target.cell is not None:
+            self.code.cell_names[target.cell] = target.symbol
+            self.code.emit(Op.STORE_CELL, target.cell)
+        else:
+            self.code.emit(Op.STORE_NAME, self.code.add_name(target.symbol))
+
+    def compile_object_expr(self, node: ObjectLiteral) -> None:
+        for item in node.properties:
+            if item.value:
+                self.compile(item.value)
+            else:
+                self.load(item.key, item.slot, item.cell)
+        self.code.emit(Op.BUILD_OBJECT, self.code.add_const(object_layout(node)))
+
+    def compile_list_expr(self, node: ListLiteral) -> None:
+        for item in node.body:
+            self.compile(item)
+        self.code.emit(Op.BUILD_LIST, len(node.body))
+
+    def compile_member_expr(self, node: MemberExpr) -> None:
+        self.compile(node.obj)
+        cache = member_cache(node)
+        if cache is not None:
+            self.code.emit(Op.LOAD_PROPERTY, self.code.add_const(cache))
+            return
+        self.compile(node.prop)
+        self.code.emit(Op.LOAD_ITEM)
+
+    def compile_call_expr(self, node: CallExpr) -> None:
+        self.compile(node.caller)
+        for arg in node.args:
+            self.compile(arg)
+        self.code.emit(Op.CALL, len(node.args))
+
+
+def compile_program(prog: Program, name: str = "<program>") -> CodeObject:
+    return Compiler(CodeObject(name)).compile_body(prog.body)
+
+
+def disassemble(code: CodeObject) -> str:
+    lines = [f"Disassembly of {code!r}:"]
+    nested: list[CodeObject] = []
+
+    for offset in range(0, len(code.code), 2):
+        op = Op(code.code[offset])
+        arg = code.code[offset + 1]
+        line = f"{offset:>6} {op.name:<18}"
+
+        if op in (Op.LOAD_CONST, Op.MAKE_FUNCTION, Op.BUILD_OBJECT, Op.FAIL, Op.LOAD_PROPERTY):
+            const = code.consts[arg]
+            line += f"{arg:>4} ({const!r})"
+            if isinstance(const, CodeObject):
+                nested.append(const)
+        elif op in (Op.LOAD_NAME, Op.STORE_NAME, Op.CHECK_UNDECLARED,
+                    Op.DECLARE_LET, Op.DECLARE_CONST):
+            line += f"{arg:>4} ({code.names[arg]})"
+        elif op in (Op.LOAD_FAST, Op.STORE_FAST, Op.DECLARE_FAST):
+            line += f"{arg:>4} ({code.slot_names[arg]})"
+        elif op in (Op.LOAD_CELL, Op.STORE_CELL, Op.DECLARE_CELL):
+            line += f"{arg:>4} ({code.cell_names[arg]})"
+        elif op == Op.BINARY_OP:
+            line += f"{arg:>4} ({BINARY_OPS[arg]})"
+        elif op in (Op.CALL, Op.BUILD_LIST):
+            line += f"{arg:>4}"
+        lines.append(line.rstrip())
+
+    for child in nested:
+        lines.append("")
+        lines.append(disassemble(child))
+    return "\n".join(lines)
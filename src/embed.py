@@ -0,0 +1,146 @@
+from collections import OrderedDict
+from typing import Any, Callable
+
+from .environment import Environment
+from .optimizer import Optimizer
+from .parser_ import Parser
+from .resolver import Resolver
+from .vectors import make_vector
+from .colored_text import gr
+from .values import *
+from .ast_ import *
+from .exceptions import *
+from . import interpreter
+
+
+def to_runtime(value: Any) -> RuntimeVal:
+    """Converts a python value to a RuntimeVal, RuntimeVals pass through."""
+    convert = TO_RUNTIME.get(type(value))
+    if convert is not None:
+        return convert(value)
+    if isinstance(value, RuntimeVal):
+        return value
+    if callable(value):
+        return native(value)
+    raise InterpretError(f"Can't convert {gr(type(value).__name__)} to a runtime value")
+
+
+def list_to_runtime(values: list | tuple) -> ListVal:
+    if all(type(value) is int or type(value) is float for value in values):
+        return make_vector(list(values), not all(type(value) is int for value in values))
+    array = ListVal()
+    array.items = [to_runtime(value) for value in values]
+    return array
+
+
+def dict_to_runtime(values: dict) -> ObjectVal:
+    object = ObjectVal()
+    object.properties = {str(key): to_runtime(value) for (key, value) in values.items()}
+    return object
+
+
+def native(func: Callable[..., Any]) -> NativeFnValue:
+    # a python function callable from scripts, arguments and result converted
+    def call(args: list[RuntimeVal], env: Environment) -> RuntimeVal:
+        return to_runtime(func(*[to_python(arg) for arg in args]))
+    call.__name__ = getattr(func, "__name__", "native")
+    return NativeFnValue(call)
+
+
+TO_RUNTIME: dict[type, Callable[[Any], RuntimeVal]] = {
+    type(None): lambda value: NULL,
+    bool: lambda value: TRUE if value else FALSE,
+    int: make_number,
+    float: make_number,
+    str: StringVal,
+    list: list_to_runtime,
+    tuple: list_to_runtime,
+    dict: dict_to_runtime,
+}
+
+
+def to_python(value: RuntimeVal) -> Any:
+    """Converts a RuntimeVal to python, functions are returned as they are."""
+    if isinstance(value, VectorVal):
+        return value.data.tolist()
+    convert = TO_PYTHON.get(value.type)
+    return convert(value) if convert else value
+
+
+TO_PYTHON: dict[str, Callable[[Any], Any]] = {
+    "null": lambda value: None,
+    "number": lambda value: value.value,
+    "string": lambda value: value.value,
+    "boolean": lambda value: value.value,
+    "list": lambda value: [to_python(item) for item in value.items],
+    "object": lambda value: {key: to_python(item) for (key, item) in value.properties.items()},
+}
+
+
+class Interpreter:
+    """
+    Runs source snippets for a host program on the tree walker.
+
+    The builtins are built once per Interpreter; every environment it hands
+    out starts from a copy of them. Parsed, optimized and resolved programs
+    are kept in a bounded cache keyed by their source. Without an explicit
+    environment, run and call share one session environment, so functions
+    declared by one run can be called later. As a cached program can run
+    in an environment where a global shadows a native, a function calling
+    a native of the standard library isn't pure here and can't be memoized.
+    """
+
+    def __init__(self, optimize: bool = True, cache_size: int = 1024) -> None:
+        self.optimize = optimize
+        self.cache_size = cache_size
+        self.programs: OrderedDict[str, Program] = OrderedDict()
+        self.builtins = Environment()
+        self.session = self.builtins.copy()
+
+    def environment(self) -> Environment:
+        """A fresh root environment holding only the builtins."""
+        return self.builtins.copy()
+
+    def define(self, name: str, value: Any) -> None:
+        """Adds a constant to the builtins of environments created from now on
+        and to the session."""
+        value = to_runtime(value)
+        self.builtins.declare_var(name, value, True)
+        self.session.declare_var(name, value, True)
+
+    def compile(self, source: str) -> Program:
+        program = self.programs.get(source)
+        if program is not None:
+            self.programs.move_to_end(source)
+            return program
+        program = Parser().produce_ast(source)
+        if self.optimize:
+            program = Optimizer().optimize(program)
+        # a compiled program may run in any environment, whose globals can
+        # shadow natives, so none is taken to be pure
+        program = Resolver(complete=False).resolve(program)
+        self.programs[source] = program
+        if len(self.programs) > self.cache_size:
+            self.programs.popitem(last=False)
+        return program
+
+    def run(self, source: str, env: Environment | None = None) -> Any:
+        program = self.compile(source)
+        return to_python(interpreter.evaluate(program, env or self.session))
+
+    def call(self, fn_name: str, *args: Any, env: Environment | None = None) -> Any:
+        env = env or self.session
+        fn = env.lookup_var(fn_name)
+        values = [to_runtime(arg) for arg in args]
+        if fn.type == "native-fn":
+            assert isinstance(fn, NativeFnValue)
+            return to_python(fn.call(values, env))
+        if fn.type != "function":
+            raise InterpretError(f"{gr(fn_name)} is not a function")
+        assert isinstance(fn, FunctionValue)
+        if len(values) != len(fn.parameters):
+            raise InterpretError(
+                f"{gr(fn_name)} takes {len(fn.parameters)} arguments, {len(values)} given")
+        if fn.memo is not None:
+            return to_python(interpreter.call_memoized(fn, values))
+        return to_python(interpreter.call_function(fn, values))
@@ -0,0 +1,27 @@
+from importlib import import_module
+from typing import Callable
+
+from .ast_ import Stmt
+from .environment import Environment
+from .values import RuntimeVal
+from . import interpreter
+
+Engine = Callable[[Stmt, Environment], RuntimeVal]
+
+
+def lazy(module: str) -> Engine:
+    # the other engines' modules, the VM's compiler among them, are only
+    # imported once a program runs on them
+    def execute(astNode: Stmt, env: Environment) -> RuntimeVal:
+        return import_module(f".{module}", __package__).execute(astNode, env)
+    return execute
+
+
+# name -> function running a parsed program against an environment
+ENGINES: dict[str, Engine] = {
+    "tree": interpreter.evaluate,
+    "closure": lazy("closure_engine"),
+    "vm": lazy("vm"),
+    "stackless": lazy("stackless"),
+    "async": lazy("async_engine"),
+}
@@ -1,5 +1,11 @@
-from .values import NullVal, NumberVal, RuntimeVal, BooleanVal, NativeFnValue, FunctionValue
-from typing import TypeVar
+from .ast_ import FrameLayout
+from .values import (
+    NULL, TRUE, FALSE, NullVal, NumberVal, RuntimeVal, NativeFnValue, FunctionValue, StringVal)
+from .memo import DEFAULT_CAPACITY, memoize
+from .vectors import make_range, reduce_extreme, reduce_mean, reduce_sum
+from . import stdlib
+from types import MappingProxyType
+from typing import Mapping, TypeVar
 from .exceptions import *
 from .colored_text import *
 
@@ -9,28 +15,104 @@ EnvironmentType = TypeVar('EnvironmentType', bound='Environment')
 class Funcs:
     def print(self, args, env: EnvironmentType) -> NullVal:
         print(args)
-        return NullVal()
+        return NULL
 
-    def max(self, args: list[NumberVal], env: EnvironmentType) -> NumberVal:
-        nums = [number.value for number in args]
-        return NumberVal(max(nums))
+    # the reductions take any mix of numbers and lists of numbers
+    def max(self, args: list[RuntimeVal], env: EnvironmentType) -> NumberVal:
+        return reduce_extreme(args, "max", max)
+
+    def min(self, args: list[RuntimeVal], env: EnvironmentType) -> NumberVal:
+        return reduce_extreme(args, "min", min)
+
+    def sum(self, args: list[RuntimeVal], env: EnvironmentType) -> NumberVal:
+        return reduce_sum(args)
+
+    def mean(self, args: list[RuntimeVal], env: EnvironmentType) -> NumberVal:
+        return reduce_mean(args)
+
+    def range(self, args: list[RuntimeVal], env: EnvironmentType) -> RuntimeVal:
+        return make_range(args)
+
+    def memo(self, args: list[RuntimeVal], env: EnvironmentType) -> RuntimeVal:
+        # memo(fn) or memo(fn, capacity), caches the results of a pure fn
+        if not args or args[0].type != "function":
+            raise InterpretError(f"{gr('memo')} expects a function")
+        fn = args[0]
+        assert isinstance(fn, FunctionValue)
+        capacity = DEFAULT_CAPACITY
+        if len(args) > 1:
+            if args[1].type != "number" or args[1].value < 1:
+                raise InterpretError(f"{gr('memo')} capacity must be a positive number")
+            capacity = int(args[1].value)
+        memoize(fn, capacity)
+        return fn
+
+
+    # awaited by the async engine, see NativeFnValue
+    # asyncio is imported by the natives, it is slow to import and only
+    # the async engine calls them
+    async def sleep(self, args: list[RuntimeVal], env: EnvironmentType) -> NullVal:
+        import asyncio
+        if len(args) != 1 or args[0].type != "number" or args[0].value < 0:
+            raise InterpretError(f"{gr('sleep')} expects a number of seconds")
+        await asyncio.sleep(args[0].value)
+        return NULL
+
+    async def read_file(self, args: list[RuntimeVal], env: EnvironmentType) -> StringVal:
+        if len(args) != 1 or args[0].type != "string":
+            raise InterpretError(f"{gr('read_file')} expects a path")
+        import asyncio
+        path = args[0].value
+        try:
+            with open(path, encoding="utf-8") as f:
+                text = await asyncio.to_thread(f.read)
+        except OSError as e:
+            raise InterpretError(f"Can't read {gr(path)}: {e.strerror}")
+        return StringVal(text)
+
+
+def make_builtins() -> MappingProxyType:
+    f = Funcs()
+    return MappingProxyType({
+        "true": TRUE,
+        "false": FALSE,
+        "null": NULL,
+        "print": NativeFnValue(f.print),
+        "max": NativeFnValue(f.max),
+        "min": NativeFnValue(f.min),
+        "sum": NativeFnValue(f.sum),
+        "mean": NativeFnValue(f.mean),
+        "range": NativeFnValue(f.range),
+        "memo": NativeFnValue(f.memo),
+        "sleep": NativeFnValue(f.sleep),
+        "read_file": NativeFnValue(f.read_file),
+    })
+
+
+# the constants every root environment starts with, built once per process
+# and read-only; values are never mutated in place, so roots share them
+BUILTINS: Mapping[str, RuntimeVal] = make_builtins()
+BUILTIN_NAMES: frozenset[str] = frozenset(BUILTINS)
 
 
 class Environment:
     def __init__(self, parent: EnvironmentType | None = None) -> None:
         self.parent = parent
-        self.__variables: dict[str, RuntimeVal] = {}
-        self.__constants: set[str] = set()
-        self.set_globals_if_needed()
-
-    def set_globals_if_needed(self) -> None:
-        if not self.parent:
-            f = Funcs()
-            self.declare_var("true", BooleanVal(), True)
-            self.declare_var("false", BooleanVal(False), True)
-            self.declare_var("null", NullVal(), True)
-            self.declare_var("print", NativeFnValue(f.print), True)
-            self.declare_var("max", NativeFnValue(f.max), True)
+        if parent is None:
+            self.__variables: dict[str, RuntimeVal] = dict(BUILTINS)
+            self.__constants: set[str] = set(BUILTIN_NAMES)
+        else:
+            self.__variables = {}
+            self.__constants = set()
+
+    def copy(self: EnvironmentType) -> EnvironmentType:
+        # a new root with this root's bindings, builtins included; values
+        # are never mutated in place, so sharing them is safe
+        env = Environment.__new__(Environment)
+        env.parent = None
+        env.__variables = self.__variables.copy()
+        env.__constants = self.__constants.copy()
+        return env
 
     def declare_var(
         self, var_name: str, value: RuntimeVal, is_const: bool = False
@@ -48,6 +130,12 @@ class Environment:
 
     def assign_var(self, var_name: str, value: RuntimeVal) -> RuntimeVal:
         env = self.resolve(var_name)
+        if env is None:
+            if stdlib.provides(var_name):
+                raise VarExistsError(
+                    f"Can't reassign constant variable {gr(var_name)}")
+            raise RuntimeError(
+                f"Can't resolve {gr(var_name)} as it is undefined.")
 
         if var_name in env.__constants:
             raise VarExistsError(
@@ -58,7 +146,15 @@ class Environment:
 
     def lookup_var(self, var_name: str) -> RuntimeVal:
         env = self.resolve(var_name)
-        return env.__variables.get(var_name, NullVal())
+        if env is None:
+            # natives of the standard library are loaded on first use, any
+            # global of the same name shadows them
+            native = stdlib.load(var_name)
+            if native is None:
+                raise RuntimeError(
+                    f"Can't resolve {gr(var_name)} as it is undefined.")
+            return native
+        return env.__variables.get(var_name, NULL)
 
     def has_var(self, var_name: str) -> bool:
         if self.__variables.get(var_name):
@@ -66,12 +162,98 @@ class Environment:
         else:
             return False
 
-    def resolve(self: EnvironmentType, var_name: str) -> EnvironmentType:
-        if self.__variables.get(var_name):
-            return self
+    def names(self) -> set[str]:
+        # every name declared here or in an enclosing environment
+        names: set[str] = set()
+        env = self
+        while env is not None:
+            names.update(env.__variables)
+            env = env.parent
+        return names
+
+    def resolve(self: EnvironmentType, var_name: str) -> EnvironmentType | None:
+        # the innermost environment declaring var_name, None if none does
+        env = self
+        while env is not None:
+            if env.__variables.get(var_name):
+                return env
+            env = env.parent
+        return None
+
+
+class Cell:
+    """A local captured by an inner function, shared by its frame and the closures."""
+    __slots__ = ("value",)
+
+    def __init__(self, value: RuntimeVal | None = None) -> None:
+        self.value = value
+
+
+class SlotEnvironment:
+    """
+    Frame of a resolved function call.
+
+    Locals live in a fixed list of slots, locals captured by inner
+    functions and the variables the function captured itself in a list of
+    cells, both addressed by the resolver. There is no parent chain:
+    anything looked up by name goes to the global environment.
+    """
+    __slots__ = ("globals", "slots", "cells")
+
+    def __init__(self, globals: Environment, layout: FrameLayout, captured: list[Cell]) -> None:
+        self.globals = globals
+        self.slots: list[RuntimeVal | None] = [None] * layout.slot_count
+        # the captured cells are shared with the function value, neither
+        # list is changed afterwards
+        self.cells: list[Cell] = [
+            Cell() for _ in range(layout.cell_count)] + captured if layout.cell_count else captured
 
-        if not self.parent:
+    def lookup_slot(self, slot: int, var_name: str) -> RuntimeVal:
+        value = self.slots[slot]
+        if value is None:
             raise RuntimeError(
                 f"Can't resolve {gr(var_name)} as it is undefined.")
+        return value
+
+    def lookup_cell(self, cell: int, var_name: str) -> RuntimeVal:
+        value = self.cells[cell].value
+        if value is None:
+            raise RuntimeError(
+                f"Can't resolve {gr(var_name)} as it is undefined.")
+        return value
+
+    def assign_slot(self, slot: int, var_name: str, value: RuntimeVal) -> RuntimeVal:
+        if self.slots[slot] is None:
+            raise RuntimeError(
+                f"Can't resolve {gr(var_name)} as it is undefined.")
+        self.slots[slot] = value
+        return value
+
+    def assign_cell(self, cell: int, var_name: str, value: RuntimeVal) -> RuntimeVal:
+        target = self.cells[cell]
+        if target.value is None:
+            raise RuntimeError(
+                f"Can't resolve {gr(var_name)} as it is undefined.")
+        target.value = value
+        return value
 
-        return self.parent.resolve(var_name)
+    def declare_at(self, slot: int | None, cell: int | None, value: RuntimeVal) -> RuntimeVal:
+        if slot is not None:
+            self.slots[slot] = value
+        else:
+            self.cells[cell].value = value
+        return value
+
+    def declare_var(
+        self, var_name: str, value: RuntimeVal, is_const: bool = False
+    ) -> RuntimeVal:
+        return self.globals.declare_var(var_name, value, is_const)
+
+    def assign_var(self, var_name: str, value: RuntimeVal) -> RuntimeVal:
+        return self.globals.assign_var(var_name, value)
+
+    def lookup_var(self, var_name: str) -> RuntimeVal:
+        return self.globals.lookup_var(var_name)
+
+    def has_var(self, var_name: str) -> bool:
+        return self.globals.has_var(var_name)
@@ -1,5 +1,4 @@
 import sys
-import traceback
 
 from .colored_text import gr
 
@@ -9,6 +8,7 @@ class PyException(Exception):
         self.msg = msg
 
     def print(self) -> None:
+        import traceback
         _, _, exc_traceback = sys.exc_info()  # exc_type, exc_value, exc_traceback
         tb = traceback.extract_tb(exc_traceback)[-1]  # Get the last traceback item
         f_name, lino, func_name, _ = tb
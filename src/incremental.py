@@ -0,0 +1,80 @@
+from bisect import bisect_left
+from collections import deque
+
+from .lexer import iter_tokens
+from .parser_ import Parser
+from .ast_ import *
+
+
+class Document:
+    """
+    A source buffer and its parsed Program, kept up to date edit by edit.
+
+    An edit re-lexes and reparses from the top-level statement before the
+    first one it touches, as that statement's end depends on the token
+    after it, and stops as soon as the parser is at the start of an old
+    statement past the edit: the text from there on is unchanged, so those
+    statements are reused with only their spans moved. Statements are
+    shared between versions of the program, and the optimizer rewrites
+    trees in place, so don't optimize a program that will still be edited.
+
+    When an edit leaves the source unparsable the error is raised,
+    program is None and the next edit parses the whole source again.
+    """
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self.parser = Parser()
+        self.program: Program | None = None
+        # statements parsed by the last edit
+        self.reparsed = 0
+        self.parse()
+
+    def parse(self) -> Program:
+        self.program = None
+        self.program = self.parser.produce_ast(self.source)
+        self.reparsed = len(self.program.body)
+        return self.program
+
+    def edit(self, start: int, end: int, text: str) -> Program:
+        """Replaces source[start:end] with text and returns the new Program."""
+        if not 0 <= start <= end <= len(self.source):
+            raise ValueError(f"edit {start}:{end} is outside of the source")
+        source = self.source[:start] + text + self.source[end:]
+        self.source = source
+        if self.program is None:
+            return self.parse()
+        body = self.program.body
+        self.program = None
+        delta = len(text) - (end - start)
+
+        # the statement before the first one ending at or after the edit
+        first = max(bisect_left(body, start, key=lambda stmt: stmt.end) - 1, 0)
+        pos = min(body[first].start, start) if body else 0
+        # the first old statement entirely after the edit
+        later = bisect_left(body, end, key=lambda stmt: stmt.start)
+
+        parser = self.parser
+        parser.tokens = iter_tokens(source, pos)
+        parser.lookahead = deque()
+        parser.end = pos
+        parsed: list[Stmt] = []
+        while parser.not_eof():
+            at = parser.at().start
+            while later < len(body) and body[later].start + delta < at:
+                later += 1
+            if later < len(body) and body[later].start + delta == at:
+                break
+            parsed.append(parser.parse_top_level_stmt())
+        else:
+            later = len(body)
+
+        reused = body[later:]
+        for stmt in reused:
+            stmt.start += delta
+            stmt.end += delta
+        program = Program()
+        program.body = body[:first] + parsed + reused
+        self.program = program
+        self.reparsed = len(parsed)
+        return program
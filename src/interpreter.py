@@ -1,5 +1,9 @@
-from .environment import Environment
-from .lexer import TokenType
+from typing import Callable
+import operator
+
+from .environment import Environment, SlotEnvironment
+from .memo import auto_memoize, memo_key
+from .vectors import elementwise
 from .colored_text import gr
 from .values import *
 from .ast_ import *
@@ -7,7 +11,7 @@ from .exceptions import *
 
 
 def eval_program(prog: Program, env: Environment) -> RuntimeVal:
-    lastEvaluated: RuntimeVal = NullVal()
+    lastEvaluated: RuntimeVal = NULL
 
     for stmt in prog.body:
         lastEvaluated = evaluate(stmt, env)
@@ -15,42 +19,133 @@ def eval_program(prog: Program, env: Environment) -> RuntimeVal:
     return lastEvaluated
 
 
+def eval_numeric_literal(literal: NumericLiteral) -> NumberVal:
+    # built once per literal node and shared by every evaluation
+    value = literal._runtime_value
+    if value is None:
+        value = literal._runtime_value = make_number(literal.value)
+    return value
+
+
+def eval_string_literal(literal: StringLiteral) -> StringVal:
+    value = literal._runtime_value
+    if value is None:
+        value = literal._runtime_value = StringVal(literal.value)
+    return value
+
+
+def divide(lhs: int | float, rhs: int | float) -> float:
+    if not rhs:
+        raise InterpretError("Division by zero")
+    return lhs / rhs
+
+
+def modulo(lhs: int | float, rhs: int | float) -> int | float:
+    # result takes the sign of the right hand side, like python
+    if not rhs:
+        raise InterpretError("Modulo by zero")
+    return lhs % rhs
+
+
+# int op int stays an int for + - * and %, "/" always gives a float
+BINARY_OPERATORS: dict[str, Callable[[int | float, int | float], int | float]] = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": divide,
+    "%": modulo,
+}
+
+
 def eval_numeric_binary_expr(lhs: NumberVal, rhs: NumberVal, operator: str) -> NumberVal:
-    if operator in TokenType.BinaryOperator.value:
-        rst = eval(f"{lhs.value}{operator}{rhs.value}")
-        return NumberVal(rst)
-    raise InterpretError(f"Unrecognized operator \"{gr(operator)}\"")
+    op = BINARY_OPERATORS.get(operator)
+    if op is None:
+        raise InterpretError(f"Unrecognized operator \"{gr(operator)}\"")
+    # make_number inlined, this runs for every operation
+    value = op(lhs.value, rhs.value)
+    if value.__class__ is int and SMALL_INT_MIN <= value <= SMALL_INT_MAX:
+        return SMALL_INTS[value - SMALL_INT_MIN]
+    return NumberVal(value)
+
+
+def eval_list_binary_expr(lhs: RuntimeVal, rhs: RuntimeVal, operator: str) -> RuntimeVal:
+    # element-wise over numeric lists, the other side may be a number
+    op = BINARY_OPERATORS.get(operator)
+    if op is None:
+        raise InterpretError(f"Unrecognized operator \"{gr(operator)}\"")
+    return elementwise(lhs, rhs, operator, op)
 
 
 def eval_binary_expr(binop: BinaryExpr, env: Environment) -> RuntimeVal:
-    lhs = evaluate(binop.left, env)
-    rhs = evaluate(binop.right, env)
-    if lhs.type == "number" and rhs.type == "number":
-        assert isinstance(lhs, NumberVal)
-        assert isinstance(rhs, NumberVal)
+    # numeric literal operands skip the dispatch of evaluate, like the
+    # identifiers of eval_list_expr
+    left = binop.left
+    right = binop.right
+    if left.kind == "NumericLiteral":
+        assert isinstance(left, NumericLiteral)
+        lhs: RuntimeVal = eval_numeric_literal(left)
+    else:
+        lhs = evaluate(left, env)
+    if right.kind == "NumericLiteral":
+        assert isinstance(right, NumericLiteral)
+        rhs: RuntimeVal = eval_numeric_literal(right)
+    else:
+        rhs = evaluate(right, env)
+    # class checks instead of the type tags, NumberVal has no subclasses
+    if lhs.__class__ is NumberVal and rhs.__class__ is NumberVal:
         return eval_numeric_binary_expr(lhs, rhs, binop.operator)
-    return NullVal()
+    if lhs.type == "list" or rhs.type == "list":
+        return eval_list_binary_expr(lhs, rhs, binop.operator)
+    return NULL
 
 
 def eval_identifier(ident: Identifier, env: Environment) -> RuntimeVal:
+    if ident.slot is not None:
+        assert isinstance(env, SlotEnvironment)
+        return env.lookup_slot(ident.slot, ident.symbol)
+    if ident.cell is not None:
+        assert isinstance(env, SlotEnvironment)
+        return env.lookup_cell(ident.cell, ident.symbol)
     return env.lookup_var(ident.symbol)
 
 
 def eval_var_declaration(declaration: VarDeclaration, env: Environment) -> RuntimeVal:
+    if declaration.slot is not None or declaration.cell is not None:
+        assert isinstance(env, SlotEnvironment)
+        value = evaluate(
+            declaration.value, env
+        ) if declaration.value else NULL
+        return env.declare_at(declaration.slot, declaration.cell, value)
+
     if env.has_var(declaration.identifier):
         raise VarExistsError(
             f"Can't declare variable {gr(declaration.identifier)}. As it is already defined.")
 
     value = evaluate(
         declaration.value, env
-    ) if declaration.value else NullVal()
+    ) if declaration.value else NULL
     return env.declare_var(declaration.identifier, value, declaration.is_const)
 
 
 def eval_func_declaration(declaration: FunctionDeclaration, env: Environment) -> RuntimeVal:
-    fn = FunctionValue(
-        declaration.name, declaration.parameters, env, declaration.body)
-
+    layout = declaration.layout
+    if layout is None:
+        fn = FunctionValue(
+            declaration.name, declaration.parameters, env, declaration.body)
+    elif isinstance(env, SlotEnvironment):
+        # a closure keeps only the cells of its free variables
+        fn = FunctionValue(
+            declaration.name, declaration.parameters, env.globals, declaration.body,
+            layout, declaration.pure, [env.cells[i] for i in layout.captures])
+    else:
+        fn = FunctionValue(
+            declaration.name, declaration.parameters, env, declaration.body,
+            layout, declaration.pure, [])
+    auto_memoize(fn)
+
+    if declaration.slot is not None or declaration.cell is not None:
+        assert isinstance(env, SlotEnvironment)
+        return env.declare_at(declaration.slot, declaration.cell, fn)
     return env.declare_var(declaration.name, fn, True)
 
 
@@ -58,19 +153,86 @@ def eval_assignment(assignment: AssignmentExpr, env: Environment) -> RuntimeVal:
     if assignment.assign.kind != "Identifier":
         raise InterpretError(f"Invalid assigned object")
 
-    assert isinstance(assignment.assign, Identifier)
-    return env.assign_var(assignment.assign.symbol, evaluate(assignment.value, env))
+    target = assignment.assign
+    assert isinstance(target, Identifier)
+    if target.slot is not None:
+        assert isinstance(env, SlotEnvironment)
+        return env.assign_slot(target.slot, target.symbol, evaluate(assignment.value, env))
+    if target.cell is not None:
+        assert isinstance(env, SlotEnvironment)
+        return env.assign_cell(target.cell, target.symbol, evaluate(assignment.value, env))
+    return env.assign_var(target.symbol, evaluate(assignment.value, env))
+
+
+def object_layout(obj: ObjectLiteral) -> tuple[Shape, list[int] | None]:
+    # worked out once per literal node, its objects all share the shape
+    layout = obj._layout
+    if layout is None:
+        layout = obj._layout = literal_layout(item.key for item in obj.properties)
+    return layout
 
 
 def eval_object_expr(obj: ObjectLiteral, env: Environment) -> RuntimeVal:
-    object = ObjectVal()
+    shape, slots = object_layout(obj)
+    values: list[RuntimeVal] = []
 
     for item in obj.properties:
-        value = env.lookup_var(
-            item.key) if not item.value else evaluate(item.value, env)
-        object.properties.update({item.key: value})
-
-    return object
+        if item.value:
+            value = evaluate(item.value, env)
+        elif item.slot is not None:
+            assert isinstance(env, SlotEnvironment)
+            value = env.lookup_slot(item.slot, item.key)
+        elif item.cell is not None:
+            assert isinstance(env, SlotEnvironment)
+            value = env.lookup_cell(item.cell, item.key)
+        else:
+            value = env.lookup_var(item.key)
+        values.append(value)
+
+    return build_object(shape, slots, values)
+
+
+def member_cache(member: MemberExpr) -> PropertyCache | None:
+    # the inline cache of a member read with a constant key: obj.key or obj["key"]
+    cache = member._cache
+    if cache is None:
+        prop = member.prop
+        if not member.computed:
+            assert isinstance(prop, Identifier)
+            cache = member._cache = PropertyCache(prop.symbol)
+        elif prop.kind == "StringLiteral":
+            assert isinstance(prop, StringLiteral)
+            cache = member._cache = PropertyCache(prop.value)
+    return cache
+
+
+def read_item(obj: RuntimeVal, key: RuntimeVal) -> RuntimeVal:
+    # obj[key] with a key only known at run time
+    if obj.type == "object" and key.type == "string":
+        assert isinstance(key, StringVal)
+        return read_property(obj, key.value)
+    if obj.type == "list" and key.type == "number":
+        assert isinstance(obj, ListVal) and isinstance(key, NumberVal)
+        items = obj.data if isinstance(obj, VectorVal) else obj.items
+        index = key.value
+        if index != int(index) or not 0 <= index < len(items):
+            raise InterpretError(f"List index {gr(index)} is out of range")
+        item = items[int(index)]
+        return make_number(item) if isinstance(obj, VectorVal) else item
+    raise InterpretError(f"Can't index a {gr(obj.type)} with a {gr(key.type)}")
+
+
+def eval_member_expr(member: MemberExpr, env: Environment) -> RuntimeVal:
+    obj = evaluate(member.obj, env)
+    cache = member._cache
+    if cache is None:
+        cache = member_cache(member)
+    if cache is not None:
+        # the cache hit inlined, like the closure compiler and the VM do
+        if obj.__class__ is ObjectVal and obj.shape is cache.shape:
+            return obj.values[cache.slot]
+        return cache.read(obj)
+    return read_item(obj, evaluate(member.prop, env))
 
 
 def eval_list_expr(arr: ListLiteral, env: Environment) -> RuntimeVal:
@@ -79,7 +241,7 @@ def eval_list_expr(arr: ListLiteral, env: Environment) -> RuntimeVal:
     for item in arr.body:
         if item.kind == "Identifier":
             assert isinstance(item, Identifier)
-            value = env.lookup_var(item.symbol)
+            value = eval_identifier(item, env)
         else:
             value = evaluate(item, env)
 
@@ -88,65 +250,124 @@ def eval_list_expr(arr: ListLiteral, env: Environment) -> RuntimeVal:
     return array
 
 
+def new_call_scope(fn: FunctionValue, args: list[RuntimeVal]) -> Environment:
+    # the scope a call of fn runs in, with the parameters bound to args
+    if fn.layout is not None:
+        scope = SlotEnvironment(fn.declarationEnv, fn.layout, fn.cells)
+        for (i, (slot, cell)) in enumerate(fn.layout.parameters):
+            scope.declare_at(slot, cell, args[i])
+        return scope
+
+    scope = Environment(fn.declarationEnv)
+    for (i, param) in enumerate(fn.parameters):
+        scope.declare_var(param, args[i], False)
+    return scope
+
+
 def eval_call_expr(expr: CallExpr, env: Environment) -> RuntimeVal:
     fn = evaluate(expr.caller, env)
+    if fn.type == "native-fn" and fn.arity == len(expr.args):
+        assert isinstance(fn, NativeFnValue)
+        return call_fast(fn, expr.args, env)
     args: list[RuntimeVal] = []
     for arg in expr.args:
         args.append(evaluate(arg, env))
 
     if fn.type == "native-fn":
         assert isinstance(fn, NativeFnValue)
-        rst_ = fn.call(args, env)
-        return rst_
+        return fn.call(args, env)
     elif fn.type == "function":
         assert isinstance(fn, FunctionValue)
-        scope = Environment(env.parent)
-        for (i, param) in enumerate(fn.parameters):
-            scope.declare_var(param, args[i], False)
+        if fn.memo is not None:
+            return call_memoized(fn, args)
+        return call_function(fn, args)
+    raise InterpretError(f"Function {fn} is not implemented")
 
-        rst: RuntimeVal = NullVal()
 
-        for stmt in fn.body:
-            rst = evaluate(stmt, scope)
-        return rst
-    raise InterpretError(f"Function {fn} is not implemented")
+# eval_call_expr, call_function and evaluate are looked up as module globals
+# on every use, so the profiler can swap in timed versions while it runs
+def call_fast(fn: NativeFnValue, args: list[Expr], env: Environment) -> RuntimeVal:
+    # natives of a fixed arity take their arguments one by one, numeric
+    # ones unboxed, no list is built for one or two arguments
+    fast = fn.fast
+    if fn.arity == 1:
+        x = evaluate(args[0], env)
+        if not fn.numeric:
+            return fast(x)
+        if x.type == "number":
+            return make_number(fast(x.value))
+        return fn.call([x], env)
+    if fn.arity == 2:
+        x = evaluate(args[0], env)
+        y = evaluate(args[1], env)
+        if not fn.numeric:
+            return fast(x, y)
+        if x.type == "number" and y.type == "number":
+            return make_number(fast(x.value, y.value))
+        return fn.call([x, y], env)
+    return fn.call([evaluate(arg, env) for arg in args], env)
+
+
+def call_function(fn: FunctionValue, args: list[RuntimeVal]) -> RuntimeVal:
+    scope = new_call_scope(fn, args)
+    rst: RuntimeVal = NULL
+
+    for stmt in fn.body:
+        rst = evaluate(stmt, scope)
+    return rst
+
+
+def call_memoized(fn: FunctionValue, args: list[RuntimeVal]) -> RuntimeVal:
+    assert fn.memo is not None
+    key = memo_key(args)
+    if key is None:
+        return call_function(fn, args)
+    rst = fn.memo.get(key)
+    if rst is None:
+        rst = call_function(fn, args)
+        fn.memo.put(key, rst)
+    return rst
 
 
 def evaluate(astNode: Stmt, env: Environment) -> RuntimeVal:
+    # cases are tried in order, the most frequent kinds come first
     match astNode.kind:
         case "NumericLiteral":
             assert isinstance(astNode, NumericLiteral)
-            return NumberVal(astNode.value)
-        case "StringLiteral":
-            assert isinstance(astNode, StringLiteral)
-            return StringVal(astNode.value)
+            return eval_numeric_literal(astNode)
+        case "BinaryExpr":
+            assert isinstance(astNode, BinaryExpr)
+            return eval_binary_expr(astNode, env)
         case "Identifier":
             assert isinstance(astNode, Identifier)
             return eval_identifier(astNode, env)
-        case "ObjectLiteral":
-            assert isinstance(astNode, ObjectLiteral)
-            return eval_object_expr(astNode, env)
         case "CallExpr":
             assert isinstance(astNode, CallExpr)
             return eval_call_expr(astNode, env)
+        case "StringLiteral":
+            assert isinstance(astNode, StringLiteral)
+            return eval_string_literal(astNode)
+        case "MemberExpr":
+            assert isinstance(astNode, MemberExpr)
+            return eval_member_expr(astNode, env)
+        case "ObjectLiteral":
+            assert isinstance(astNode, ObjectLiteral)
+            return eval_object_expr(astNode, env)
         case "ListLiteral":
             assert isinstance(astNode, ListLiteral)
             return eval_list_expr(astNode, env)
-        case "BinaryExpr":
-            assert isinstance(astNode, BinaryExpr)
-            return eval_binary_expr(astNode, env)
-        case "Program":
-            assert isinstance(astNode, Program)
-            return eval_program(astNode, env)
         case "VarDeclaration":
             assert isinstance(astNode, VarDeclaration)
             return eval_var_declaration(astNode, env)
-        case "FunctionDeclaration":
-            assert isinstance(astNode, FunctionDeclaration)
-            return eval_func_declaration(astNode, env)
         case "AssignmentExpr":
             assert isinstance(astNode, AssignmentExpr)
             return eval_assignment(astNode, env)
+        case "FunctionDeclaration":
+            assert isinstance(astNode, FunctionDeclaration)
+            return eval_func_declaration(astNode, env)
+        case "Program":
+            assert isinstance(astNode, Program)
+            return eval_program(astNode, env)
         case _:
             raise InterpretError(
                 f"This AST Node has not yet been setup for interpretation: <{gr(astNode.kind)}>")
@@ -1,5 +1,11 @@
+from array import array
+from bisect import bisect_right
 from enum import Enum
+from typing import Iterator, Union
+import mmap
+import re
 import string
+import sys
 
 from .exceptions import TokenizeError
 from .colored_text import gr
@@ -34,11 +40,40 @@ KEYWORDS: dict[str, TokenType] = {
     "fn": TokenType.Fn
 }
 
+# what can be tokenized: text, or UTF-8 bytes such as a memory-mapped file
+Source = Union[str, bytes, bytearray, mmap.mmap]
+
 
 class Token:
-    def __init__(self, value: str, type_: TokenType) -> None:
-        self.value = value
+    """
+    A span of the source: the token's type and its start and end offsets,
+    in bytes for bytes sources. The text is only sliced out when value is
+    read, so punctuation and keywords never build a string.
+    """
+    __slots__ = ("type", "start", "end", "source")
+
+    def __init__(self, type_: TokenType, start: int, end: int, source: Source) -> None:
         self.type = type_
+        self.start = start
+        self.end = end
+        self.source = source
+
+    @property
+    def value(self) -> str:
+        type_ = self.type
+        if type_ is TokenType.EOF:
+            return TokenType.EOF.value
+        text = self.source[self.start:self.end]
+        if type(text) is not str:
+            text = text.decode()
+        if type_ is TokenType.String:
+            return sys.intern(text[1:-1])
+        if type_ is TokenType.Identifier:
+            return sys.intern(text)
+        return text
+
+    def line_col(self) -> tuple[int, int]:
+        return line_col(self.source, self.start)
 
     def __repr__(self) -> str:
         return f"<{self.type.name}>"
@@ -54,99 +89,175 @@ class Token:
             return self.__repr__()
 
 
+def line_col(source: Source, offset: int) -> tuple[int, int]:
+    # 1-based line and column of an offset, columns count bytes in bytes
+    newline = "\n" if isinstance(source, str) else b"\n"
+    line_start = source.rfind(newline, 0, offset) + 1
+    return source[:line_start].count(newline) + 1, offset - line_start + 1
+
+
 def is_valid_ident_char(char: str, is_first_ident_char=False) -> bool:
     if is_first_ident_char:
         return char in TokenType.Identifier.value
     return char in TokenType.Identifier.value + string.digits
 
 
-def tokenize(source_code: str) -> list[Token]:
-    tokens: list[Token] = []
-    src: list[str] = [i for i in source_code]
-
-    # Build each token until the end of file
-    while (len(src) > 0):
-        if src[0] == TokenType.OpenParen.value:
-            tokens.append(Token(src.pop(0), TokenType.OpenParen))
-
-        elif src[0] == TokenType.CloseParen.value:
-            tokens.append(Token(src.pop(0), TokenType.CloseParen))
-
-        elif src[0] == TokenType.OpenBrace.value:
-            tokens.append(Token(src.pop(0), TokenType.OpenBrace))
-
-        elif src[0] == TokenType.CloseBrace.value:
-            tokens.append(Token(src.pop(0), TokenType.CloseBrace))
+# Character classes used to pick a scanning rule from the first character
+# of a token.
+_SKIP, _DIGIT, _IDENT, _QUOTE, _SINGLE = range(5)
+
+# character -> token type for the single-character tokens
+_SINGLE_CHAR_TOKENS: dict[str, TokenType] = {
+    TokenType.OpenParen.value: TokenType.OpenParen,
+    TokenType.CloseParen.value: TokenType.CloseParen,
+    TokenType.OpenBrace.value: TokenType.OpenBrace,
+    TokenType.CloseBrace.value: TokenType.CloseBrace,
+    TokenType.OpenBracket.value: TokenType.OpenBracket,
+    TokenType.CloseBracket.value: TokenType.CloseBracket,
+    TokenType.Colon.value: TokenType.Colon,
+    TokenType.Comma.value: TokenType.Comma,
+    TokenType.Dot.value: TokenType.Dot,
+    TokenType.Equals.value: TokenType.Equals,
+    TokenType.Semicolon.value: TokenType.Semicolon,
+    **{op: TokenType.BinaryOperator for op in TokenType.BinaryOperator.value},
+}
 
-        elif src[0] == TokenType.OpenBracket.value:
-            tokens.append(Token(src.pop(0), TokenType.OpenBracket))
+_CHAR_CLASSES: dict[str, int] = {
+    **{char: _SKIP for char in " \n\t\r"},
+    **{char: _DIGIT for char in TokenType.Number.value},
+    **{char: _IDENT for char in TokenType.Identifier.value},
+    TokenType.Quotation.value: _QUOTE,
+    **{char: _SINGLE for char in _SINGLE_CHAR_TOKENS},
+}
 
-        elif src[0] == TokenType.CloseBracket.value:
-            tokens.append(Token(src.pop(0), TokenType.CloseBracket))
 
-        elif src[0] == TokenType.Colon.value:
-            tokens.append(Token(src.pop(0), TokenType.Colon))
+class _Rules:
+    """The scanning tables for one kind of source."""
 
-        elif src[0] == TokenType.Comma.value:
-            tokens.append(Token(src.pop(0), TokenType.Comma))
+    def __init__(self, key, pattern) -> None:
+        # key turns a character of the tables into one of the source,
+        # indexing bytes gives ints
+        self.char_classes = {key(char): kind for (char, kind) in _CHAR_CLASSES.items()}
+        self.single = {key(char): type_ for (char, type_) in _SINGLE_CHAR_TOKENS.items()}
+        self.keywords = {pattern(word): type_ for (word, type_) in KEYWORDS.items()}
+        self.quote = pattern(TokenType.Quotation.value)
+        self.skip_run = re.compile(pattern(r"[ \n\t\r]+")).match
+        self.digit_run = re.compile(pattern(r"[0-9]+")).match
+        self.ident_run = re.compile(pattern(r"[A-Za-z0-9_]+")).match
 
-        elif src[0] == TokenType.Dot.value:
-            tokens.append(Token(src.pop(0), TokenType.Dot))
 
-        elif src[0] in TokenType.BinaryOperator.value:
-            tokens.append(Token(src.pop(0), TokenType.BinaryOperator))
+_STR_RULES = _Rules(str, str)
+_BYTE_RULES = _Rules(ord, str.encode)
 
-        elif src[0] == TokenType.Equals.value:
-            tokens.append(Token(src.pop(0), TokenType.Equals))
 
-        elif src[0] == TokenType.Semicolon.value:
-            tokens.append(Token(src.pop(0), TokenType.Semicolon))
+def iter_tokens(source_code: Source, pos: int = 0) -> Iterator[Token]:
+    # pos must be outside of any token, e.g. where a statement starts
+    rules = _STR_RULES if isinstance(source_code, str) else _BYTE_RULES
+    char_class = rules.char_classes.get
+    single = rules.single
+    keywords = rules.keywords.get
+    skip_run = rules.skip_run
+    digit_run = rules.digit_run
+    ident_run = rules.ident_run
+    quote = rules.quote
+    identifier_type = TokenType.Identifier
+    length = len(source_code)
 
-        else:
-            # Handle multicharacter tokens
-
-            # Build number token
-            if src[0].isdigit():
-                num = ""
-                while (len(src) > 0 and src[0].isdigit()):
-                    num += src.pop(0)
-
-                tokens.append(Token(num, TokenType.Number))
-
-            elif is_valid_ident_char(src[0], True):
-                identifier = ""
-                while (len(src) > 0 and is_valid_ident_char(src[0])):
-                    identifier += src.pop(0)
-
-                # check for reserved keywords
-                reserved = KEYWORDS.get(identifier)
-                if reserved:
-                    # print(reserved)
-                    tokens.append(Token(identifier, reserved))
-                else:
-                    tokens.append(Token(identifier, TokenType.Identifier))
-
-            elif src[0] == TokenType.Quotation.value:
-                text = ""
-                src.pop(0)
-                while (len(src) > 0 and src[0] != TokenType.Quotation.value):
-                    text += src.pop(0)
-                try:
-                    src.pop(0)
-                except:
-                    raise TokenizeError(
-                        f"Expected \"{gr(TokenType.Quotation.value)}\" on the both end of a string")
-                tokens.append(Token(text, TokenType.String))
-
-            elif src[0] in " \n\t\r":  # skippable
-                src.pop(0)
-
-            else:
+    # Build each token until the end of file
+    while pos < length:
+        char = source_code[pos]
+        kind = char_class(char)
+
+        if kind == _SINGLE:
+            pos += 1
+            yield Token(single[char], pos - 1, pos, source_code)
+
+        elif kind == _SKIP:
+            pos = skip_run(source_code, pos).end()
+
+        elif kind == _IDENT:
+            end = ident_run(source_code, pos).end()
+            # check for reserved keywords, the rest is sliced when needed
+            type_ = keywords(source_code[pos:end]) if end - pos <= 5 else None
+            yield Token(type_ or identifier_type, pos, end, source_code)
+            pos = end
+
+        elif kind == _DIGIT:
+            end = digit_run(source_code, pos).end()
+            yield Token(TokenType.Number, pos, end, source_code)
+            pos = end
+
+        elif kind == _QUOTE:
+            end = source_code.find(quote, pos + 1)
+            if end == -1:
                 raise TokenizeError(
-                    f"Unrecognized character found in source: \"{gr(src[0])}\""
-                )
+                    f"Expected \"{gr(TokenType.Quotation.value)}\" on the both end of a string")
+            yield Token(TokenType.String, pos, end + 1, source_code)
+            pos = end + 1
 
-    tokens.append(Token(TokenType.EOF.value, TokenType.EOF))
+        else:
+            if not isinstance(char, str):
+                char = source_code[pos:pos + 4].decode(errors="replace")[0]
+            raise TokenizeError(
+                f"Unrecognized character found in source: \"{gr(char)}\""
+            )
+
+    yield Token(TokenType.EOF, length, length, source_code)
+
+
+TOKEN_TYPES: list[TokenType] = list(TokenType)
+_TYPE_CODES: dict[TokenType, int] = {type_: code for (code, type_) in enumerate(TOKEN_TYPES)}
+
+
+class TokenArray:
+    """
+    Tokens of a source kept as parallel arrays of type codes, starts and
+    ends, a few bytes per token instead of an object each. Indexing or
+    iterating gives Token views.
+    """
+
+    def __init__(self, source: Source) -> None:
+        self.source = source
+        self.types = array("B")
+        self.starts = array("q")
+        self.ends = array("q")
+        # offsets of the line starts, built on the first line_col
+        self.lines: array | None = None
+
+    def append(self, token: Token) -> None:
+        self.types.append(_TYPE_CODES[token.type])
+        self.starts.append(token.start)
+        self.ends.append(token.end)
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __getitem__(self, i: int) -> Token:
+        return Token(TOKEN_TYPES[self.types[i]], self.starts[i], self.ends[i], self.source)
+
+    def __iter__(self) -> Iterator[Token]:
+        types = TOKEN_TYPES
+        source = self.source
+        for (code, start, end) in zip(self.types, self.starts, self.ends):
+            yield Token(types[code], start, end, source)
+
+    def line_col(self, i: int) -> tuple[int, int]:
+        # like Token.line_col, without scanning the source for every token
+        if self.lines is None:
+            newline = "\n" if isinstance(self.source, str) else b"\n"
+            self.lines = array("q", [0])
+            self.lines.extend(
+                match.end() for match in re.finditer(re.escape(newline), self.source))
+        offset = self.starts[i]
+        line = bisect_right(self.lines, offset)
+        return line, offset - self.lines[line - 1] + 1
+
+
+def tokenize(source_code: Source) -> TokenArray:
+    tokens = TokenArray(source_code)
+    append = tokens.append
+    for token in iter_tokens(source_code):
+        append(token)
     return tokens
 
 
@@ -0,0 +1,96 @@
+from collections import OrderedDict
+from typing import Callable
+import weakref
+
+from .colored_text import gr
+from .values import *
+from .exceptions import *
+
+# Results of pure functions (see Resolver) can be cached on their argument
+# values. A function is memoized by the memo() builtin, or every pure
+# function is when auto_capacity is set (main.py --memo). Every engine
+# consults the caches.
+DEFAULT_CAPACITY = 256
+# capacity given to every pure function as it is declared, None when off
+auto_capacity: int | None = None
+# every cache created so far, for reports
+caches: "weakref.WeakSet[MemoCache]" = weakref.WeakSet()
+
+# values whose identity doesn't matter, only those can make up a key
+KEY_TYPES = ("number", "string", "boolean", "null")
+
+
+class MemoCache:
+    """Bounded LRU of one function's results keyed on its arguments."""
+
+    def __init__(self, name: str, capacity: int = DEFAULT_CAPACITY) -> None:
+        self.name = name
+        self.capacity = capacity
+        self.entries: OrderedDict[tuple, RuntimeVal] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        caches.add(self)
+
+    def get(self, key: tuple) -> RuntimeVal | None:
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return value
+
+    def put(self, key: tuple, value: RuntimeVal) -> None:
+        self.entries[key] = value
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+
+def memo_key(args: list[RuntimeVal]) -> tuple | None:
+    # the python type keeps 1, 1.0 and true apart; None when an argument
+    # can't be part of a key
+    key = []
+    for arg in args:
+        if arg.type not in KEY_TYPES:
+            return None
+        key.append((type(arg.value), arg.value))
+    return tuple(key)
+
+
+def call_memoized(
+    fn: FunctionValue, args: list[RuntimeVal],
+    call: Callable[[FunctionValue, list[RuntimeVal]], RuntimeVal],
+) -> RuntimeVal:
+    # call(fn, args) runs the function, only on a miss
+    assert fn.memo is not None
+    key = memo_key(args)
+    if key is None:
+        return call(fn, args)
+    rst = fn.memo.get(key)
+    if rst is None:
+        rst = call(fn, args)
+        fn.memo.put(key, rst)
+    return rst
+
+
+def memoize(fn: FunctionValue, capacity: int = DEFAULT_CAPACITY) -> None:
+    if not fn.pure:
+        raise InterpretError(f"Can't memoize {gr(fn.name)} as it is not pure")
+    if fn.memo is None:
+        fn.memo = MemoCache(fn.name, capacity)
+
+
+def auto_memoize(fn: FunctionValue) -> None:
+    if auto_capacity is not None and fn.pure:
+        fn.memo = MemoCache(fn.name, auto_capacity)
+
+
+def report() -> str:
+    lines = []
+    for cache in sorted(caches, key=lambda cache: -(cache.hits + cache.misses)):
+        lines.append(
+            f"memo {cache.name}: {cache.hits} hits, {cache.misses} misses, "
+            f"{cache.evictions} evictions, {len(cache.entries)}/{cache.capacity} entries")
+    return "\n".join(lines) if lines else "memo: no memoized functions"
@@ -0,0 +1,214 @@
+from .interpreter import BINARY_OPERATORS
+from .ast_ import *
+from .exceptions import *
+
+
+class Bindings:
+    """What the optimizer knows about names at one point of a body."""
+
+    def __init__(self, constants: dict[str, Expr], declared: set[str]) -> None:
+        # const names bound to a literal that can be inlined
+        self.constants = constants
+        # names certainly declared by now, reading them can't fail
+        self.declared = declared
+
+    def enter_function(self, declaration: FunctionDeclaration) -> "Bindings":
+        # anything the body declares shadows the outer binding, even for
+        # reads that come before the declaration
+        local = set(declaration.parameters)
+        for stmt in declaration.body:
+            if isinstance(stmt, VarDeclaration):
+                local.add(stmt.identifier)
+            elif isinstance(stmt, FunctionDeclaration):
+                local.add(stmt.name)
+        constants = {name: value for (name, value) in self.constants.items() if name not in local}
+        return Bindings(constants, (self.declared - local) | set(declaration.parameters))
+
+
+class Optimizer:
+    """
+    Simplifies a Program before it runs.
+
+    - folds BinaryExprs whose operands are numeric literals
+    - inlines const bindings of numeric and string literals
+    - drops expression statements that have no effect and whose value is
+      unused, i.e. that are not the last statement of their body
+    """
+
+    def __init__(self) -> None:
+        self.nodes_removed = 0
+
+    def optimize(self, program: Program) -> Program:
+        program.body = self.optimize_body(program.body, Bindings({}, set()))
+        return program
+
+    def optimize_body(self, body: list[Stmt], bindings: Bindings) -> list[Stmt]:
+        optimized: list[Stmt] = []
+        for (i, stmt) in enumerate(body):
+            stmt = self.optimize_stmt(stmt, bindings)
+            if i < len(body) - 1 and self.is_pure(stmt, bindings):
+                self.nodes_removed += count_nodes(stmt)
+                continue
+            optimized.append(stmt)
+        return optimized
+
+    def optimize_stmt(self, stmt: Stmt, bindings: Bindings) -> Stmt:
+        match stmt.kind:
+            case "VarDeclaration":
+                assert isinstance(stmt, VarDeclaration)
+                if stmt.value:
+                    stmt.value = self.optimize_expr(stmt.value, bindings)
+                name = stmt.identifier
+                if stmt.is_const and stmt.value and stmt.value.kind in ("NumericLiteral", "StringLiteral"):
+                    bindings.constants[name] = stmt.value
+                else:
+                    bindings.constants.pop(name, None)
+                bindings.declared.add(name)
+                return stmt
+            case "FunctionDeclaration":
+                assert isinstance(stmt, FunctionDeclaration)
+                bindings.constants.pop(stmt.name, None)
+                bindings.declared.add(stmt.name)
+                stmt.body = self.optimize_body(stmt.body, bindings.enter_function(stmt))
+                return stmt
+            case _:
+                assert isinstance(stmt, Expr)
+                return self.optimize_expr(stmt, bindings)
+
+    def optimize_expr(self, expr: Expr, bindings: Bindings) -> Expr:
+        match expr.kind:
+            case "Identifier":
+                assert isinstance(expr, Identifier)
+                constant = bindings.constants.get(expr.symbol)
+                return copy_literal(constant) if constant else expr
+            case "BinaryExpr":
+                assert isinstance(expr, BinaryExpr)
+                # walk the left spine of a + b + c + ... in a loop, long
+                # chains would exhaust the Python stack otherwise
+                spine: list[BinaryExpr] = []
+                node: Expr = expr
+                while isinstance(node, BinaryExpr):
+                    spine.append(node)
+                    node = node.left
+                node = self.optimize_expr(node, bindings)
+                for binop in reversed(spine):
+                    binop.left = node
+                    binop.right = self.optimize_expr(binop.right, bindings)
+                    node = self.fold(binop)
+                return node
+            case "AssignmentExpr":
+                assert isinstance(expr, AssignmentExpr)
+                # the target stays a name, so assigning a const still fails
+                if expr.assign.kind != "Identifier":
+                    expr.assign = self.optimize_expr(expr.assign, bindings)
+                expr.value = self.optimize_expr(expr.value, bindings)
+                return expr
+            case "CallExpr":
+                assert isinstance(expr, CallExpr)
+                expr.caller = self.optimize_expr(expr.caller, bindings)
+                expr.args = [self.optimize_expr(arg, bindings) for arg in expr.args]
+                return expr
+            case "MemberExpr":
+                assert isinstance(expr, MemberExpr)
+                expr.obj = self.optimize_expr(expr.obj, bindings)
+                if expr.computed:
+                    expr.prop = self.optimize_expr(expr.prop, bindings)
+                return expr
+            case "ObjectLiteral":
+                assert isinstance(expr, ObjectLiteral)
+                for item in expr.properties:
+                    if item.value:
+                        item.value = self.optimize_expr(item.value, bindings)
+                    elif item.key in bindings.constants:
+                        item.value = copy_literal(bindings.constants[item.key])
+                return expr
+            case "ListLiteral":
+                assert isinstance(expr, ListLiteral)
+                expr.body = [self.optimize_expr(item, bindings) for item in expr.body]
+                return expr
+        return expr
+
+    def fold(self, binop: BinaryExpr) -> Expr:
+        left, right = binop.left, binop.right
+        if not (isinstance(left, NumericLiteral) and isinstance(right, NumericLiteral)):
+            return binop
+        op = BINARY_OPERATORS.get(binop.operator)
+        if op is None:
+            return binop
+        try:
+            value = op(left.value, right.value)
+        except InterpretError:
+            # e.g. division by zero, leave it to fail at run time
+            return binop
+        self.nodes_removed += 2
+        return make_numeric_literal(value)
+
+    def is_pure(self, node: Stmt, bindings: Bindings) -> bool:
+        # evaluating the node can't fail and has no effect
+        match node.kind:
+            case "NumericLiteral" | "StringLiteral":
+                return True
+            case "Identifier":
+                assert isinstance(node, Identifier)
+                return node.symbol in bindings.declared
+            case "BinaryExpr":
+                assert isinstance(node, BinaryExpr)
+                while isinstance(node, BinaryExpr):
+                    if node.operator in "/%" and not (
+                        isinstance(node.right, NumericLiteral) and node.right.value
+                    ):
+                        return False
+                    # two lists of different lengths can't be combined
+                    if not (is_scalar_literal(node.left) or is_scalar_literal(node.right)):
+                        return False
+                    if not self.is_pure(node.right, bindings):
+                        return False
+                    node = node.left
+                return self.is_pure(node, bindings)
+            case "ListLiteral":
+                assert isinstance(node, ListLiteral)
+                return all(self.is_pure(item, bindings) for item in node.body)
+            case "ObjectLiteral":
+                assert isinstance(node, ObjectLiteral)
+                return all(
+                    self.is_pure(item.value, bindings) if item.value else item.key in bindings.declared
+                    for item in node.properties
+                )
+        return False
+
+
+def is_scalar_literal(node: Stmt) -> bool:
+    return node.kind in ("NumericLiteral", "StringLiteral")
+
+
+def make_numeric_literal(value: int | float) -> NumericLiteral:
+    literal = NumericLiteral("0")
+    literal.value = value
+    return literal
+
+
+def copy_literal(literal: Expr) -> Expr:
+    if isinstance(literal, NumericLiteral):
+        return make_numeric_literal(literal.value)
+    assert isinstance(literal, StringLiteral)
+    return StringLiteral(literal.value)
+
+
+def count_nodes(node: Stmt | None) -> int:
+    if node is None:
+        return 0
+    match node.kind:
+        case "BinaryExpr":
+            assert isinstance(node, BinaryExpr)
+            count = 0
+            while isinstance(node, BinaryExpr):
+                count += 1 + count_nodes(node.right)
+                node = node.left
+            return count + count_nodes(node)
+        case "ListLiteral":
+            assert isinstance(node, ListLiteral)
+            return 1 + sum(count_nodes(item) for item in node.body)
+        case "ObjectLiteral":
+            assert isinstance(node, ObjectLiteral)
+            return 1 + sum(1 + count_nodes(item.value) for item in node.properties)
+    return 1
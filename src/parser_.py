@@ -1,21 +1,65 @@
 from .ast_ import *
-from .lexer import tokenize, Token, TokenType
+from collections import deque
+from typing import Iterable, Iterator, TypeVar
+import mmap
+
+from .lexer import iter_tokens, Source, Token, TokenType
 from .exceptions import ParseError
 from .colored_text import *
 
 
+NodeT = TypeVar("NodeT", bound=Stmt)
+
+
 class Parser:
     def __init__(self) -> None:
-        self.tokens: list[Token] = []
+        self.tokens: Iterator[Token] = iter(())
+        # tokens pulled from the stream but not consumed yet
+        self.lookahead: deque[Token] = deque()
+        # number of tokens consumed so far
+        self.pos = 0
+        # end of the last consumed token and start of the current top-level
+        # statement, spans inside it are relative to that (see Stmt)
+        self.end = 0
+        self.base = 0
 
     def not_eof(self) -> bool:
-        return self.tokens[0].type != TokenType.EOF
+        return self.at().type != TokenType.EOF
+
+    def peek(self, k: int = 0) -> Token:
+        lookahead = self.lookahead
+        while len(lookahead) <= k:
+            token = next(self.tokens, None)
+            if token is None:
+                # once the stream is exhausted keep answering with EOF
+                if lookahead and lookahead[-1].type == TokenType.EOF:
+                    return lookahead[-1]
+                token = Token(TokenType.EOF, self.end, self.end, "")
+            lookahead.append(token)
+        return lookahead[k]
 
     def at(self) -> Token:
-        return self.tokens[0]
+        return self.lookahead[0] if self.lookahead else self.peek()
 
     def eat(self) -> Token:
-        return self.tokens.pop(0)
+        token = self.at()
+        if token.type != TokenType.EOF:
+            self.lookahead.popleft()
+            self.pos += 1
+            self.end = token.end
+        return token
+
+    def spanned(self, node: NodeT, start: int) -> NodeT:
+        # node covers the source from start to the last consumed token
+        node.start = start - self.base
+        node.end = self.end - self.base
+        return node
+
+    def newline_before(self, token: Token) -> bool:
+        # statements aren't terminated, so a "[" starting a line starts a
+        # list, not an index into the line above
+        newline = "\n" if isinstance(token.source, str) else b"\n"
+        return token.source.find(newline, self.end, token.start) != -1
 
     def expect(self, type_: TokenType, expect: str | None = None) -> Token:
         prev = self.eat()
@@ -26,14 +70,30 @@ class Parser:
             )
         return prev
 
-    def produce_ast(self, source_code: str) -> Program:
-        self.tokens = tokenize(source_code)
+    def produce_ast(self, source_code: Source | Iterable[Token]) -> Program:
         program = Program()
+        program.body = list(self.iter_stmts(source_code))
+        return program
+
+    def iter_stmts(self, source_code: Source | Iterable[Token]) -> Iterator[Stmt]:
+        # top-level statements, each parsed when it is asked for
+        if isinstance(source_code, (str, bytes, bytearray, mmap.mmap)):
+            source_code = iter_tokens(source_code)
+        self.tokens = iter(source_code)
+        self.lookahead = deque()
+        self.pos = 0
+        self.end = 0
 
         # Parse until the end of the file
         while self.not_eof():
-            program.body.append(self.parse_stmt())
-        return program
+            yield self.parse_top_level_stmt()
+
+    def parse_top_level_stmt(self) -> Stmt:
+        self.base = self.at().start
+        stmt = self.parse_stmt()
+        stmt.start = self.base
+        stmt.end = self.end
+        return stmt
 
     def parse_stmt(self) -> Stmt:
         # skip to parse expression
@@ -48,6 +108,7 @@ class Parser:
     def parse_var_declaration(self) -> Stmt:
         # let ident;
         # (let | const) ident = expr;
+        start = self.at().start
         is_const = self.eat().type == TokenType.Const
         identifier = self.expect(TokenType.Identifier, "an identifier").value
 
@@ -56,16 +117,16 @@ class Parser:
             if is_const:
                 raise ParseError(
                     f"Constant variables must have an initialized value")
-            return VarDeclaration(is_const, identifier)
+            return self.spanned(VarDeclaration(is_const, identifier), start)
 
         self.expect(TokenType.Equals)
         decalaration = VarDeclaration(is_const, identifier, self.parse_expr())
         self.expect(TokenType.Semicolon)
 
-        return decalaration
+        return self.spanned(decalaration, start)
 
     def parse_fn_declaration(self) -> Stmt:
-        self.eat()
+        start = self.eat().start
         name = self.expect(TokenType.Identifier, "function name after fn keyword").value
         args = self.parse_args()
         params: list[str] = []
@@ -85,18 +146,19 @@ class Parser:
         self.expect(TokenType.CloseBrace)
 
         fn = FunctionDeclaration(params, name, body)
-        return fn
+        return self.spanned(fn, start)
 
     def parse_expr(self) -> Expr:
         return self.parse_assignment_expr()
 
     def parse_assignment_expr(self) -> Expr:
+        start = self.at().start
         left = self.parse_obj_expr()
 
         if self.at().type == TokenType.Equals:
             self.eat()
             value = self.parse_assignment_expr()
-            return AssignmentExpr(left, value)
+            return self.spanned(AssignmentExpr(left, value), start)
 
         return left
 
@@ -104,29 +166,31 @@ class Parser:
         if self.at().type not in [TokenType.OpenBrace, TokenType.OpenBracket]:
             return self.parse_additive_expr()
 
+        start = self.at().start
         if self.eat().type == TokenType.OpenBrace:
             properties: list[Property] = []
 
             # parse each key-value pairs
             while self.not_eof() and self.at().type != TokenType.CloseBrace:
-                key = self.expect(TokenType.Identifier,
-                                  "an identifier as key of an object").value
+                key_token = self.expect(TokenType.Identifier,
+                                        "an identifier as key of an object")
+                key = key_token.value
                 if self.at().type == TokenType.Comma:
+                    properties.append(self.spanned(Property(key), key_token.start))
                     self.eat()
-                    properties.append(Property(key))
                     continue
                 elif self.at().type == TokenType.CloseBrace:
-                    properties.append(Property(key))
+                    properties.append(self.spanned(Property(key), key_token.start))
                     continue
 
                 self.expect(TokenType.Colon)
                 value = self.parse_expr()
-                properties.append(Property(key, value))
+                properties.append(self.spanned(Property(key, value), key_token.start))
 
                 if self.at().type != TokenType.CloseBrace:
                     self.expect(TokenType.Comma)
             self.expect(TokenType.CloseBrace)
-            return ObjectLiteral(properties)
+            return self.spanned(ObjectLiteral(properties), start)
 
         # must be self.eat().type == TokenType.OpenBracket
         else:
@@ -140,42 +204,47 @@ class Parser:
                     self.expect(TokenType.Comma)
 
             self.expect(TokenType.CloseBracket)
-            return listLiteral
+            return self.spanned(listLiteral, start)
 
     def parse_additive_expr(self) -> Expr:
+        start = self.at().start
         left = self.parse_multiplicative_expr()
 
-        while self.at().value in "+-":
+        while self.at().type == TokenType.BinaryOperator and self.at().value in "+-":
             operator = self.eat().value
             right = self.parse_multiplicative_expr()
-            left = BinaryExpr(left, right, operator)
+            left = self.spanned(BinaryExpr(left, right, operator), start)
 
         return left
 
     def parse_multiplicative_expr(self) -> Expr:
+        start = self.at().start
         left = self.parse_call_member_expr()
 
-        while self.at().value in "*/%":
+        while self.at().type == TokenType.BinaryOperator and self.at().value in "*/%":
             operator = self.eat().value
             right = self.parse_call_member_expr()
-            left = BinaryExpr(left, right, operator)
+            left = self.spanned(BinaryExpr(left, right, operator), start)
 
         return left
 
     def parse_call_member_expr(self) -> Expr:
+        start = self.at().start
         member = self.parse_member_expr()
 
         if self.at().type == TokenType.OpenParen:
-            return self.parse_call_expr(member)
+            return self.parse_call_expr(member, start)
 
         return member
 
-    def parse_call_expr(self, caller: Expr) -> Expr:
+    def parse_call_expr(self, caller: Expr, start: int) -> Expr:
         args = self.parse_args()
-        call_expr: Expr = CallExpr(args, caller)
+        call_expr: Expr = self.spanned(CallExpr(args, caller), start)
+        # p(3).x, p(3)[1] and p(3).f(4): members and calls follow a call
+        call_expr = self.parse_members(call_expr, start)
 
         if self.at().type == TokenType.OpenParen:
-            call_expr = self.parse_call_expr(call_expr)
+            call_expr = self.parse_call_expr(call_expr, start)
 
         return call_expr
 
@@ -200,9 +269,14 @@ class Parser:
         return args
 
     def parse_member_expr(self) -> Expr:
-        obj = self.parse_primary_expr()
-
-        while self.at().type in [TokenType.Dot, TokenType.CloseBracket]:
+        start = self.at().start
+        return self.parse_members(self.parse_primary_expr(), start)
+
+    def parse_members(self, obj: Expr, start: int) -> Expr:
+        # the .key and [key] reads following obj
+        while self.at().type is TokenType.Dot or (
+            self.at().type is TokenType.OpenBracket and not self.newline_before(self.at())
+        ):
             operator = self.eat()
 
             if operator.type == TokenType.Dot:
@@ -218,23 +292,24 @@ class Parser:
                 prop = self.parse_expr()
                 self.expect(TokenType.CloseBracket)
 
-            obj = MemberExpr(obj, prop, computed)
+            obj = self.spanned(MemberExpr(obj, prop, computed), start)
 
         return obj
 
     def parse_primary_expr(self) -> Expr:
-        match self.at().type:
+        token = self.at()
+        match token.type:
             case TokenType.Identifier:
-                return Identifier(self.eat().value)
+                return self.spanned(Identifier(self.eat().value), token.start)
             case TokenType.Number:
-                return NumericLiteral(self.eat().value)
+                return self.spanned(NumericLiteral(self.eat().value), token.start)
             case TokenType.OpenParen:
                 self.eat()
                 value = self.parse_expr()
                 self.expect(TokenType.CloseParen)
                 return value
             case TokenType.String:
-                return StringLiteral(self.eat().value)
+                return self.spanned(StringLiteral(self.eat().value), token.start)
             case _:
                 raise ParseError(
                     f"Unexpected token found during parsing expr! -> {gr(self.at().value)}"
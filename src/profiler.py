@@ -0,0 +1,159 @@
+from collections import defaultdict
+from time import perf_counter
+
+from .environment import Environment
+from .values import *
+from .ast_ import *
+from .exceptions import *
+from . import interpreter
+
+PROGRAM = "<program>"
+
+
+class Stats:
+    __slots__ = ("calls", "total", "self")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        # seconds including and excluding what was timed inside
+        self.total = 0.0
+        self.self = 0.0
+
+
+class Profiler:
+    """
+    Times a program run by the tree walker.
+
+    While `run` executes, interpreter.evaluate and call_function are
+    replaced by timed wrappers, and eval_call_expr by a version timing
+    the natives it calls, the interpreter itself has no profiling code. Time
+    is attributed to node kinds, to user functions by declaration name
+    and to natives, each with the time of what ran inside subtracted as
+    self time. Self time of every stack of function names is also kept
+    for a collapsed-stack (flamegraph) file. Nodes the interpreter reads
+    without evaluate, numeric literal operands and identifiers in list
+    literals, aren't counted.
+    """
+
+    def __init__(self) -> None:
+        self.kinds: defaultdict[str, Stats] = defaultdict(Stats)
+        self.functions: defaultdict[str, Stats] = defaultdict(Stats)
+        self.stacks: defaultdict[tuple[str, ...], float] = defaultdict(float)
+        # time spent in evaluations nested in the current one
+        self.node_children: list[float] = [0.0]
+        # names of the functions being called, with their nested time
+        self.call_stack: list[str] = [PROGRAM]
+        self.call_children: list[float] = [0.0]
+
+    def run(self, program: Stmt, env: Environment) -> RuntimeVal:
+        originals = (interpreter.evaluate, interpreter.call_function, interpreter.eval_call_expr)
+        evaluate, call_function, _ = originals
+        interpreter.evaluate = self.timed_evaluate(evaluate)
+        interpreter.call_function = self.timed_call(
+            call_function, lambda fn, *_: fn.name)
+        interpreter.eval_call_expr = self.timed_call_expr()
+        start = perf_counter()
+        try:
+            return interpreter.evaluate(program, env)
+        finally:
+            elapsed = perf_counter() - start
+            (interpreter.evaluate, interpreter.call_function,
+             interpreter.eval_call_expr) = originals
+            program_stats = self.functions[PROGRAM]
+            program_stats.calls += 1
+            program_stats.total += elapsed
+            program_stats.self += elapsed - self.call_children[0]
+            self.stacks[(PROGRAM,)] += elapsed - self.call_children[0]
+
+    def timed_evaluate(self, evaluate):
+        kinds = self.kinds
+        children = self.node_children
+        # evaluations of each kind in progress
+        active: defaultdict[str, int] = defaultdict(int)
+
+        def timed(node: Stmt, env: Environment) -> RuntimeVal:
+            kind = node.kind
+            active[kind] += 1
+            children.append(0.0)
+            start = perf_counter()
+            try:
+                return evaluate(node, env)
+            finally:
+                elapsed = perf_counter() - start
+                active[kind] -= 1
+                stats = kinds[kind]
+                stats.calls += 1
+                # nested nodes of the same kind are already in the outer total
+                if not active[kind]:
+                    stats.total += elapsed
+                stats.self += elapsed - children.pop()
+                children[-1] += elapsed
+
+        return timed
+
+    def timed_call_expr(self):
+        # the interpreter calls natives directly, so while profiling call
+        # expressions are evaluated here, with the natives timed
+        call_native = self.timed_call(
+            lambda fn, args, env: fn.call(args, env),
+            lambda fn, *_: f"{getattr(fn.call, '__name__', '?')} [native]")
+
+        def eval_call_expr(expr: CallExpr, env: Environment) -> RuntimeVal:
+            fn = interpreter.evaluate(expr.caller, env)
+            args = [interpreter.evaluate(arg, env) for arg in expr.args]
+            if fn.type == "native-fn":
+                return call_native(fn, args, env)
+            elif fn.type == "function":
+                if fn.memo is not None:
+                    return interpreter.call_memoized(fn, args)
+                return interpreter.call_function(fn, args)
+            raise InterpretError(f"Function {fn} is not implemented")
+
+        return eval_call_expr
+
+    def timed_call(self, call, name_of):
+        functions = self.functions
+        stacks = self.stacks
+        call_stack = self.call_stack
+        children = self.call_children
+
+        def timed(fn, *args):
+            name = name_of(fn)
+            # recursive calls are already in the outer call's total
+            outermost = name not in call_stack
+            call_stack.append(name)
+            children.append(0.0)
+            start = perf_counter()
+            try:
+                return call(fn, *args)
+            finally:
+                elapsed = perf_counter() - start
+                own = elapsed - children.pop()
+                stats = functions[name]
+                stats.calls += 1
+                stats.self += own
+                if outermost:
+                    stats.total += elapsed
+                stacks[tuple(call_stack)] += own
+                call_stack.pop()
+                children[-1] += elapsed
+
+        return timed
+
+    def report(self) -> str:
+        lines = []
+        for (title, table) in (("function", self.functions), ("node kind", self.kinds)):
+            lines.append(f"{title:<28}{'calls':>10}{'total ms':>12}{'self ms':>12}")
+            for (name, stats) in sorted(table.items(), key=lambda item: -item[1].self):
+                lines.append(
+                    f"{name:<28}{stats.calls:>10}{stats.total * 1000:>12.2f}{stats.self * 1000:>12.2f}")
+            lines.append("")
+        return "\n".join(lines)
+
+    def write_collapsed(self, path: str) -> None:
+        # "frame;frame;frame count" lines, counts in microseconds
+        with open(path, "w", encoding="utf-8") as f:
+            for (stack, seconds) in sorted(self.stacks.items()):
+                micros = round(seconds * 1_000_000)
+                if micros > 0:
+                    f.write(f"{';'.join(stack)} {micros}\n")
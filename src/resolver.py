@@ -0,0 +1,291 @@
+from typing import Iterable
+from .colored_text import gr
+from . import stdlib
+from .ast_ import *
+from .exceptions import *
+
+# builtins that never change and whose calls have no effect
+PURE_BUILTINS = {"true", "false", "null", "max", "min", "sum", "mean", "range"}
+
+
+class Binding:
+    """A name declared in a function body and the nodes addressing it."""
+
+    def __init__(self, name: str, is_const: bool) -> None:
+        self.name = name
+        self.is_const = is_const
+        # set once an inner function uses the name, it then lives in a cell
+        self.captured = False
+
+
+class Scope:
+    """Names declared directly in one function body and the outer names it captures."""
+
+    def __init__(self, declaration: FunctionDeclaration) -> None:
+        self.declaration = declaration
+        self.bindings: dict[str, Binding] = {}
+        # outer bindings used here or by inner functions, in capture order
+        self.free: dict[Binding, int] = {}
+        # nodes to address once the layout is known
+        self.uses: list[tuple[Identifier | Property | VarDeclaration | FunctionDeclaration, Binding]] = []
+        # functions declared directly in this body
+        self.children: list[Scope] = []
+
+    def layout(self) -> FrameLayout:
+        # plain locals get slots, captured ones cells, followed by the
+        # cells this function captures itself
+        layout = FrameLayout()
+        address: dict[Binding, tuple[int | None, int | None]] = {}
+        for binding in self.bindings.values():
+            if binding.captured:
+                address[binding] = (None, layout.cell_count)
+                layout.cell_count += 1
+            else:
+                address[binding] = (layout.slot_count, None)
+                layout.slot_count += 1
+        for (binding, index) in self.free.items():
+            address[binding] = (None, layout.cell_count + index)
+        for (node, binding) in self.uses:
+            node.slot, node.cell = address[binding]
+        layout.parameters = [
+            address[self.bindings[param]] for param in self.declaration.parameters]
+        for child in self.children:
+            child.declaration.layout.captures = [address[binding][1] for binding in child.free]
+        return layout
+
+
+class Resolver:
+    """
+    Annotates a Program with frame addresses and converts closures.
+
+    Names declared inside a function get a slot in that function's frame.
+    A function captures only its free variables: the outer locals it or
+    its inner functions use. Those outer locals live in cells, and the
+    function value holds just those cells instead of the whole enclosing
+    scope chain, so every name is either a slot, a cell or a global.
+    Top-level names stay global and are looked up by name, so REPL lines
+    can share them.
+
+    Functions are also marked pure when a call can't have an effect and
+    its result only depends on the arguments: the body only reads its own
+    locals and constants, assigns only its own locals, declares no
+    functions and only calls pure builtins and pure top-level functions.
+
+    A native of the standard library counts as a pure builtin unless a
+    global of the same name shadows it. Programs resolved on their own,
+    like REPL lines, pass the names their environment already declares as
+    defined; with complete=False, when those aren't known, no native of
+    the standard library is pure.
+    """
+
+    def __init__(self, defined: Iterable[str] = (), complete: bool = True) -> None:
+        # enclosing function scopes, innermost last
+        self.scopes: list[Scope] = []
+        # top-level names declared by the program -> is const
+        self.globals: dict[str, bool] = {}
+        # function bodies of the current scope, resolved once the scope is
+        # complete so they can see names declared after them
+        self.pending: list[FunctionDeclaration] = []
+        # enclosing function declarations with the global names they call
+        self.functions: list[tuple[FunctionDeclaration, set[str]]] = []
+        # every function resolved so far, same shape as above
+        self.calls: list[tuple[FunctionDeclaration, set[str]]] = []
+        self.global_functions: dict[str, FunctionDeclaration] = {}
+        # globals declared before the program, by earlier REPL lines
+        self.defined = frozenset(defined)
+        # False once statements are resolved one at a time, a global
+        # declared further down may then still shadow a native, or when
+        # the globals declared before aren't known
+        self.complete = complete
+
+    def resolve(self, program: Program) -> Program:
+        self.resolve_body(program.body)
+        self.propagate_purity()
+        return program
+
+    def resolve_stmt(self, stmt: Stmt) -> Stmt:
+        # resolves a program one top-level statement at a time, calling a
+        # function that isn't declared yet then counts as impure, and so
+        # does calling a native
+        self.complete = False
+        resolved = len(self.calls)
+        self.resolve_body([stmt])
+        self.propagate_purity(self.calls[resolved:])
+        # the purity of earlier functions can't change anymore
+        del self.calls[resolved:]
+        return stmt
+
+    def resolve_body(self, body: list[Stmt]) -> None:
+        outer_pending = self.pending
+        self.pending = []
+        for stmt in body:
+            self.resolve_node(stmt)
+        for declaration in self.pending:
+            self.resolve_function(declaration)
+        self.pending = outer_pending
+
+    def resolve_function(self, declaration: FunctionDeclaration) -> None:
+        scope = Scope(declaration)
+        if self.scopes:
+            self.scopes[-1].children.append(scope)
+        self.scopes.append(scope)
+        declaration.pure = True
+        self.functions.append((declaration, set()))
+        self.calls.append(self.functions[-1])
+        for param in declaration.parameters:
+            self.declare(param, False)
+        self.resolve_body(declaration.body)
+        self.scopes.pop()
+        # inner functions are done, so it's known which locals they capture;
+        # the captures of this one are filled in by the enclosing layout
+        declaration.layout = scope.layout()
+        self.functions.pop()
+
+    def impure(self) -> None:
+        if self.functions:
+            self.functions[-1][0].pure = False
+
+    def check_read(self, name: str, depth: int | None, is_const: bool) -> None:
+        # reading anything but a local or a constant makes the result
+        # depend on more than the arguments
+        if depth == 0:
+            return
+        if depth is None:
+            is_const = (is_const and name in self.globals) or self.is_pure_builtin(name)
+        if not is_const:
+            self.impure()
+
+    def is_pure_builtin(self, name: str) -> bool:
+        # natives are pure until a global of the same name shadows them,
+        # which is only known once the whole program was seen
+        return name in PURE_BUILTINS or (
+            self.complete and stdlib.provides(name)
+            and name not in self.globals and name not in self.defined)
+
+    def propagate_purity(self, calls: list[tuple[FunctionDeclaration, set[str]]] | None = None) -> None:
+        # calling an impure function is impure, repeat until nothing changes
+        changed = True
+        while changed:
+            changed = False
+            for (declaration, callees) in self.calls if calls is None else calls:
+                if declaration.pure and not all(
+                    self.is_pure_builtin(name) or (
+                        name in self.global_functions and self.global_functions[name].pure)
+                    for name in callees
+                ):
+                    declaration.pure = False
+                    changed = True
+
+    def declare(
+        self, name: str, is_const: bool,
+        node: VarDeclaration | FunctionDeclaration | None = None,
+    ) -> None:
+        if not self.scopes:
+            if name in self.globals:
+                raise VarExistsError(
+                    f"Can't declare variable {gr(name)}. As it is already defined.")
+            self.globals[name] = is_const
+            return
+
+        scope = self.scopes[-1]
+        if name in scope.bindings:
+            raise VarExistsError(
+                f"Can't declare variable {gr(name)}. As it is already defined.")
+        binding = scope.bindings[name] = Binding(name, is_const)
+        if node is not None:
+            scope.uses.append((node, binding))
+
+    def lookup(self, name: str, node: Identifier | Property) -> tuple[int | None, bool]:
+        # -> (depth, is_const), depth is None for globals; node is addressed
+        # once the layout of the current function is known
+        for depth in range(len(self.scopes)):
+            binding = self.scopes[-1 - depth].bindings.get(name)
+            if binding is None:
+                continue
+            if depth:
+                # free here: every function between the owner and here
+                # captures it to pass it along
+                binding.captured = True
+                for scope in self.scopes[len(self.scopes) - depth:]:
+                    scope.free.setdefault(binding, len(scope.free))
+            self.scopes[-1].uses.append((node, binding))
+            return depth, binding.is_const
+        return None, self.globals.get(name, False)
+
+    def resolve_node(self, node: Stmt) -> None:
+        match node.kind:
+            case "Identifier":
+                assert isinstance(node, Identifier)
+                depth, is_const = self.lookup(node.symbol, node)
+                self.check_read(node.symbol, depth, is_const)
+            case "VarDeclaration":
+                assert isinstance(node, VarDeclaration)
+                if node.value:
+                    self.resolve_node(node.value)
+                self.declare(node.identifier, node.is_const, node)
+            case "FunctionDeclaration":
+                assert isinstance(node, FunctionDeclaration)
+                self.declare(node.name, True, node)
+                if self.scopes:
+                    self.impure()
+                else:
+                    self.global_functions[node.name] = node
+                self.pending.append(node)
+            case "AssignmentExpr":
+                assert isinstance(node, AssignmentExpr)
+                self.resolve_node(node.value)
+                if node.assign.kind == "Identifier":
+                    assert isinstance(node.assign, Identifier)
+                    depth, is_const = self.lookup(node.assign.symbol, node.assign)
+                    if is_const:
+                        raise VarExistsError(
+                            f"Can't reassign constant variable {gr(node.assign.symbol)}")
+                    if depth != 0:
+                        self.impure()
+                else:
+                    self.resolve_node(node.assign)
+            case "BinaryExpr":
+                assert isinstance(node, BinaryExpr)
+                # a + b + c + ... nests to the left, walk that spine in a
+                # loop so long chains don't exhaust the Python stack
+                rights: list[Expr] = []
+                while isinstance(node, BinaryExpr):
+                    rights.append(node.right)
+                    node = node.left
+                self.resolve_node(node)
+                for right in reversed(rights):
+                    self.resolve_node(right)
+            case "CallExpr":
+                assert isinstance(node, CallExpr)
+                if isinstance(node.caller, Identifier):
+                    depth, is_const = self.lookup(node.caller.symbol, node.caller)
+                    self.check_read(node.caller.symbol, depth, is_const)
+                    if depth is not None:
+                        self.impure()
+                    elif self.functions:
+                        self.functions[-1][1].add(node.caller.symbol)
+                else:
+                    self.resolve_node(node.caller)
+                    self.impure()
+                for arg in node.args:
+                    self.resolve_node(arg)
+            case "MemberExpr":
+                assert isinstance(node, MemberExpr)
+                self.resolve_node(node.obj)
+                if node.computed:
+                    self.resolve_node(node.prop)
+            case "ObjectLiteral":
+                assert isinstance(node, ObjectLiteral)
+                for item in node.properties:
+                    if item.value:
+                        self.resolve_node(item.value)
+                    else:
+                        depth, is_const = self.lookup(item.key, item)
+                        self.check_read(item.key, depth, is_const)
+            case "ListLiteral":
+                assert isinstance(node, ListLiteral)
+                for item in node.body:
+                    self.resolve_node(item)
+            case "Program":
+                assert isinstance(node, Program)
+                self.resolve_body(node.body)
@@ -0,0 +1,257 @@
+from typing import Any, Callable, Generator
+import sys
+
+from .environment import Environment, SlotEnvironment
+from .interpreter import (
+    eval_func_declaration, eval_identifier, eval_list_binary_expr, eval_numeric_binary_expr,
+    eval_numeric_literal, eval_string_literal, member_cache, new_call_scope, object_layout,
+    read_item)
+from .memo import memo_key
+from .colored_text import gr
+from .values import *
+from .ast_ import *
+from .exceptions import *
+
+
+class Await:
+    """Yielded by a step calling a native coroutine function, see async_engine."""
+    __slots__ = ("fn", "args", "env")
+
+    def __init__(self, fn: NativeFnValue, args: list[RuntimeVal], env: Environment) -> None:
+        self.fn = fn
+        self.args = args
+        self.env = env
+
+
+class Tail:
+    """Yielded by a step to be replaced by the evaluation of node."""
+    __slots__ = ("node", "env")
+
+    def __init__(self, node: Stmt, env: Environment) -> None:
+        self.node = node
+        self.env = env
+
+
+# A step evaluates one node: it yields (child, env) pairs, is sent back the
+# value of each child and returns the value of the node. It may instead
+# yield a Tail as its last action, the value of the tail node then becomes
+# its own. Yielding an Await suspends the whole machine until the native
+# call it holds is done, its result is then sent back.
+Step = Generator["tuple[Stmt, Environment] | Tail | Await", RuntimeVal, RuntimeVal]
+
+
+class Machine:
+    """
+    Evaluates a tree without recursing on the Python stack.
+
+    Pending steps are kept on a list, so nesting and recursion depth are
+    only limited by memory, or by max_depth when given. The last statement
+    of a function body replaces the call's step on the stack, so calls in
+    tail position run in constant space.
+    """
+
+    def __init__(self, max_depth: int | None = None) -> None:
+        self.max_depth = max_depth
+        self.stack: list[Step] = []
+
+    @property
+    def depth(self) -> int:
+        return len(self.stack)
+
+    def run(self, node: Stmt, env: Environment) -> RuntimeVal:
+        driver = self.drive(node, env)
+        try:
+            request = next(driver)
+        except StopIteration as stop:
+            return stop.value
+        driver.close()
+        # raises, nothing can await a native here
+        return request.fn.call(request.args, request.env)
+
+    def drive(self, node: Stmt, env: Environment) -> Generator[Await, RuntimeVal, RuntimeVal]:
+        # runs node, passing the Awaits of the steps up to the caller
+        limit = self.max_depth or sys.maxsize
+        stack = self.stack = []
+        value = None
+        try:
+            while True:
+                leaf = LEAVES.get(node.kind)
+                if leaf is not None:
+                    value = leaf(node, env)
+                else:
+                    if len(stack) >= limit:
+                        raise InterpretError(
+                            f"Maximum recursion depth of {gr(limit)} exceeded")
+                    step = STEPS.get(node.kind)
+                    if step is None:
+                        raise InterpretError(
+                            f"This AST Node has not yet been setup for interpretation: <{gr(node.kind)}>")
+                    stack.append(step(node, env))
+                    value = None
+
+                # resume steps until one asks for a node to be evaluated
+                while stack:
+                    try:
+                        request = stack[-1].send(value)
+                    except StopIteration as stop:
+                        stack.pop()
+                        value = stop.value
+                        continue
+                    if type(request) is tuple:
+                        node, env = request
+                    elif type(request) is Tail:
+                        stack.pop()
+                        node, env = request.node, request.env
+                    else:
+                        value = yield request
+                        continue
+                    break
+                else:
+                    return value
+        finally:
+            self.stack = []
+
+
+def step_program(prog: Program, env: Environment) -> Step:
+    lastEvaluated: RuntimeVal = NULL
+    for stmt in prog.body:
+        lastEvaluated = yield stmt, env
+    return lastEvaluated
+
+
+def step_binary_expr(binop: BinaryExpr, env: Environment) -> Step:
+    lhs = yield binop.left, env
+    rhs = yield binop.right, env
+    if lhs.type == "number" and rhs.type == "number":
+        assert isinstance(lhs, NumberVal)
+        assert isinstance(rhs, NumberVal)
+        return eval_numeric_binary_expr(lhs, rhs, binop.operator)
+    if lhs.type == "list" or rhs.type == "list":
+        return eval_list_binary_expr(lhs, rhs, binop.operator)
+    return NULL
+
+
+def step_var_declaration(declaration: VarDeclaration, env: Environment) -> Step:
+    if declaration.slot is not None or declaration.cell is not None:
+        assert isinstance(env, SlotEnvironment)
+        value = (yield declaration.value, env) if declaration.value else NULL
+        return env.declare_at(declaration.slot, declaration.cell, value)
+
+    if env.has_var(declaration.identifier):
+        raise VarExistsError(
+            f"Can't declare variable {gr(declaration.identifier)}. As it is already defined.")
+
+    value = (yield declaration.value, env) if declaration.value else NULL
+    return env.declare_var(declaration.identifier, value, declaration.is_const)
+
+
+def step_assignment(assignment: AssignmentExpr, env: Environment) -> Step:
+    if assignment.assign.kind != "Identifier":
+        raise InterpretError(f"Invalid assigned object")
+
+    target = assignment.assign
+    assert isinstance(target, Identifier)
+    value = yield assignment.value, env
+    if target.slot is not None:
+        assert isinstance(env, SlotEnvironment)
+        return env.assign_slot(target.slot, target.symbol, value)
+    if target.cell is not None:
+        assert isinstance(env, SlotEnvironment)
+        return env.assign_cell(target.cell, target.symbol, value)
+    return env.assign_var(target.symbol, value)
+
+
+def step_object_expr(obj: ObjectLiteral, env: Environment) -> Step:
+    shape, slots = object_layout(obj)
+    values: list[RuntimeVal] = []
+
+    for item in obj.properties:
+        if item.value:
+            value = yield item.value, env
+        elif item.slot is not None:
+            assert isinstance(env, SlotEnvironment)
+            value = env.lookup_slot(item.slot, item.key)
+        elif item.cell is not None:
+            assert isinstance(env, SlotEnvironment)
+            value = env.lookup_cell(item.cell, item.key)
+        else:
+            value = env.lookup_var(item.key)
+        values.append(value)
+
+    return build_object(shape, slots, values)
+
+
+def step_member_expr(member: MemberExpr, env: Environment) -> Step:
+    obj = yield member.obj, env
+    cache = member_cache(member)
+    if cache is not None:
+        return cache.read(obj)
+    return read_item(obj, (yield member.prop, env))
+
+
+def step_list_expr(arr: ListLiteral, env: Environment) -> Step:
+    array = ListVal()
+    for item in arr.body:
+        array.items.append((yield item, env))
+    return array
+
+
+def step_call_expr(expr: CallExpr, env: Environment) -> Step:
+    fn = yield expr.caller, env
+    args: list[RuntimeVal] = []
+    for arg in expr.args:
+        args.append((yield arg, env))
+
+    if fn.type == "native-fn":
+        assert isinstance(fn, NativeFnValue)
+        if fn.coroutine is not None:
+            return (yield Await(fn, args, env))
+        return fn.call(args, env)
+    elif fn.type != "function":
+        raise InterpretError(f"Function {fn} is not implemented")
+
+    assert isinstance(fn, FunctionValue)
+    body = fn.body
+    if not body:
+        return NULL
+    key = memo_key(args) if fn.memo is not None else None
+    if key is not None:
+        # the result is needed to fill the cache, no tail call here
+        rst = fn.memo.get(key)
+        if rst is None:
+            scope = new_call_scope(fn, args)
+            for stmt in body:
+                rst = yield stmt, scope
+            fn.memo.put(key, rst)
+        return rst
+
+    scope = new_call_scope(fn, args)
+    for i in range(len(body) - 1):
+        yield body[i], scope
+    # the call is done once its last statement is, let that take our place
+    yield Tail(body[-1], scope)
+    raise AssertionError("a step is not resumed after a tail")
+
+
+# nodes evaluated without children, no step is pushed for them
+LEAVES: dict[str, Callable[[Any, Environment], RuntimeVal]] = {
+    "NumericLiteral": lambda node, env: eval_numeric_literal(node),
+    "StringLiteral": lambda node, env: eval_string_literal(node),
+    "Identifier": eval_identifier,
+    "FunctionDeclaration": eval_func_declaration,
+}
+
+STEPS: dict[str, Callable[[Any, Environment], Step]] = {
+    "Program": step_program,
+    "BinaryExpr": step_binary_expr,
+    "VarDeclaration": step_var_declaration,
+    "AssignmentExpr": step_assignment,
+    "ObjectLiteral": step_object_expr,
+    "ListLiteral": step_list_expr,
+    "CallExpr": step_call_expr,
+    "MemberExpr": step_member_expr,
+}
+
+
+def execute(astNode: Stmt, env: Environment) -> RuntimeVal:
+    return Machine().run(astNode, env)
@@ -0,0 +1,84 @@
+"""
+Standard library of natives, loaded on demand.
+
+A global that isn't declared anywhere is looked up here last, so a script
+only imports the modules it uses and any global of the same name shadows
+a native. Every native is pure: it has no effect and its result depends
+only on its arguments.
+"""
+from importlib import import_module
+from typing import Callable
+
+from ..colored_text import gr
+from ..exceptions import InterpretError
+from ..values import NativeFnValue, RuntimeVal, make_number
+
+# module -> the names it provides, kept here so nothing is imported to
+# know where a name comes from
+MODULES: dict[str, tuple[str, ...]] = {
+    "math_": (
+        "pi", "abs", "floor", "ceil", "round", "sqrt", "pow", "exp", "log",
+        "sin", "cos", "atan2", "hypot", "clamp",
+    ),
+    "string_": (
+        "upper", "lower", "trim", "concat", "repeat", "split", "join",
+        "starts_with", "ends_with", "str", "number",
+    ),
+    "list_": (
+        "len", "first", "last", "reverse", "slice", "push", "keys", "values", "has",
+    ),
+}
+
+PROVIDERS: dict[str, str] = {name: module for (module, names) in MODULES.items() for name in names}
+
+# natives of the modules imported so far
+_loaded: dict[str, RuntimeVal] = {}
+
+
+def provides(name: str) -> bool:
+    return name in PROVIDERS
+
+
+def load(name: str) -> RuntimeVal | None:
+    """The native called name, importing its module on first use, or None."""
+    value = _loaded.get(name)
+    if value is None:
+        module = PROVIDERS.get(name)
+        if module is None:
+            return None
+        natives = import_module(f".{module}", __name__).NATIVES
+        assert set(natives) == set(MODULES[module]), f"{module} doesn't match MODULES"
+        _loaded.update(natives)
+        value = _loaded[name]
+    return value
+
+
+def check_arity(name: str, arity: int, args: list[RuntimeVal]) -> None:
+    if len(args) != arity:
+        raise InterpretError(
+            f"{gr(name)} expects {arity} argument{'s' if arity != 1 else ''}, got {len(args)}")
+
+
+def native(name: str, fn: Callable[..., RuntimeVal], arity: int) -> NativeFnValue:
+    """A native taking exactly arity values, passed to fn one by one."""
+    def call(args: list[RuntimeVal], env) -> RuntimeVal:
+        check_arity(name, arity, args)
+        return fn(*args)
+    call.__name__ = name
+    return NativeFnValue(call, arity=arity, fast=fn)
+
+
+def numeric(name: str, fn: Callable[..., int | float], arity: int) -> NativeFnValue:
+    """
+    A native taking exactly arity numbers and returning one. fn works on
+    plain ints and floats, engines with a fast path call it with the
+    unboxed values and box only the result.
+    """
+    def call(args: list[RuntimeVal], env) -> RuntimeVal:
+        check_arity(name, arity, args)
+        for arg in args:
+            if arg.type != "number":
+                raise InterpretError(f"{gr(name)} expects numbers, got a {gr(arg.type)}")
+        return make_number(fn(*[arg.value for arg in args]))
+    call.__name__ = name
+    return NativeFnValue(call, arity=arity, fast=fn, numeric=True)
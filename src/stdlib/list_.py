@@ -0,0 +1,117 @@
+from ..colored_text import gr
+from ..exceptions import InterpretError
+from ..values import *
+from ..vectors import appended, element
+from . import native
+from .string_ import boolean, expect, text
+
+
+def items(name: str, value: RuntimeVal) -> list[RuntimeVal]:
+    # boxes every element of a vector, the natives read vectors' data instead
+    expect(name, value, "list")
+    assert isinstance(value, ListVal)
+    return value.items
+
+
+def size(name: str, value: RuntimeVal) -> int:
+    expect(name, value, "list")
+    assert isinstance(value, ListVal)
+    return len(value.data) if isinstance(value, VectorVal) else len(value.items)
+
+
+def fields(name: str, value: RuntimeVal) -> ObjectVal:
+    expect(name, value, "object")
+    assert isinstance(value, ObjectVal)
+    return value
+
+
+def make_list(values: list[RuntimeVal]) -> ListVal:
+    array = ListVal()
+    array.items = values
+    return array
+
+
+def index(name: str, value: RuntimeVal) -> int:
+    expect(name, value, "number")
+    if type(value.value) is not int:
+        raise InterpretError(f"{gr(name)} expects a whole number, not {gr(value.value)}")
+    return value.value
+
+
+def len_(value: RuntimeVal) -> RuntimeVal:
+    match value.type:
+        case "string":
+            assert isinstance(value, StringVal)
+            return make_number(len(value.value))
+        case "list":
+            assert isinstance(value, ListVal)
+            if isinstance(value, VectorVal):
+                return make_number(len(value.data))
+            return make_number(len(value.items))
+        case "object":
+            assert isinstance(value, ObjectVal)
+            return make_number(len(value.values))
+    raise InterpretError(f"{gr('len')} expects a string, list or object, got a {gr(value.type)}")
+
+
+def first(value: RuntimeVal) -> RuntimeVal:
+    if not size("first", value):
+        raise InterpretError(f"{gr('first')} of an empty list")
+    if isinstance(value, VectorVal):
+        return element(value, 0)
+    return items("first", value)[0]
+
+
+def last(value: RuntimeVal) -> RuntimeVal:
+    if not size("last", value):
+        raise InterpretError(f"{gr('last')} of an empty list")
+    if isinstance(value, VectorVal):
+        return element(value, -1)
+    return items("last", value)[-1]
+
+
+def reverse(value: RuntimeVal) -> RuntimeVal:
+    if isinstance(value, VectorVal):
+        return VectorVal(value.data[::-1])
+    return make_list(items("reverse", value)[::-1])
+
+
+def slice_(value: RuntimeVal, start: RuntimeVal, end: RuntimeVal) -> RuntimeVal:
+    # like python's, negative bounds count from the end
+    expect("slice", value, "list")
+    bounds = slice(index("slice", start), index("slice", end))
+    if isinstance(value, VectorVal):
+        return VectorVal(value.data[bounds])
+    return make_list(items("slice", value)[bounds])
+
+
+def push(value: RuntimeVal, item: RuntimeVal) -> RuntimeVal:
+    # a new list, values are never changed in place
+    if isinstance(value, VectorVal) and item.type == "number":
+        return appended(value, item.value)
+    return make_list(items("push", value) + [item])
+
+
+def keys(obj: RuntimeVal) -> RuntimeVal:
+    return make_list([StringVal(key) for key in fields("keys", obj).shape.keys])
+
+
+def values(obj: RuntimeVal) -> RuntimeVal:
+    return make_list(list(fields("values", obj).values))
+
+
+def has(obj: RuntimeVal, key: RuntimeVal) -> RuntimeVal:
+    return boolean(text("has", key) in fields("has", obj).shape.index)
+
+
+NATIVES: dict[str, RuntimeVal] = {
+    "len": native("len", len_, 1),
+    "first": native("first", first, 1),
+    "last": native("last", last, 1),
+    "reverse": native("reverse", reverse, 1),
+    "slice": native("slice", slice_, 3),
+    "push": native("push", push, 2),
+    "keys": native("keys", keys, 1),
+    "values": native("values", values, 1),
+    "has": native("has", has, 2),
+}
@@ -0,0 +1,77 @@
+import math
+
+from ..colored_text import gr
+from ..exceptions import InterpretError
+from ..values import RuntimeVal, make_number
+from . import numeric
+
+
+def integral(name: str, op):
+    # floor, ceil and round give ints, which infinities and NaN have none of
+    def rounded(x: int | float) -> int:
+        if type(x) is int:
+            return x
+        if not math.isfinite(x):
+            raise InterpretError(f"Can't {gr(name)} {gr(x)}")
+        return op(x)
+    return rounded
+
+
+def periodic(name: str, op):
+    def wave(x: int | float) -> float:
+        if not math.isfinite(x):
+            raise InterpretError(f"Can't take the {gr(name)} of {gr(x)}")
+        return op(x)
+    return wave
+
+
+def sqrt(x: int | float) -> float:
+    if x < 0:
+        raise InterpretError(f"{gr('sqrt')} of a negative number")
+    return math.sqrt(x)
+
+
+def power(x: int | float, y: int | float) -> int | float:
+    if not x and y < 0:
+        raise InterpretError(f"{gr('pow')} of zero to a negative power")
+    if x < 0 and type(y) is float and not y.is_integer():
+        raise InterpretError(f"{gr('pow')} of a negative number to a fractional power")
+    try:
+        return x ** y
+    except OverflowError:
+        raise InterpretError(f"{gr('pow')} result is too large")
+
+
+def exp(x: int | float) -> float:
+    try:
+        return math.exp(x)
+    except OverflowError:
+        raise InterpretError(f"{gr('exp')} result is too large")
+
+
+def log(x: int | float) -> float:
+    if x <= 0:
+        raise InterpretError(f"{gr('log')} of a number that isn't positive")
+    return math.log(x)
+
+
+def clamp(x: int | float, low: int | float, high: int | float) -> int | float:
+    return min(max(x, low), high)
+
+
+NATIVES: dict[str, RuntimeVal] = {
+    "pi": make_number(math.pi),
+    "abs": numeric("abs", abs, 1),
+    "floor": numeric("floor", integral("floor", math.floor), 1),
+    "ceil": numeric("ceil", integral("ceil", math.ceil), 1),
+    "round": numeric("round", integral("round", round), 1),
+    "sqrt": numeric("sqrt", sqrt, 1),
+    "pow": numeric("pow", power, 2),
+    "exp": numeric("exp", exp, 1),
+    "log": numeric("log", log, 1),
+    "sin": numeric("sin", periodic("sin", math.sin), 1),
+    "cos": numeric("cos", periodic("cos", math.cos), 1),
+    "atan2": numeric("atan2", math.atan2, 2),
+    "hypot": numeric("hypot", math.hypot, 2),
+    "clamp": numeric("clamp", clamp, 3),
+}
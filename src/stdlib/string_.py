@@ -0,0 +1,111 @@
+from ..colored_text import gr
+from ..exceptions import InterpretError
+from ..values import *
+from . import native
+
+
+def expect(name: str, value: RuntimeVal, type_: str) -> None:
+    if value.type != type_:
+        raise InterpretError(f"{gr(name)} expects a {gr(type_)}, got a {gr(value.type)}")
+
+
+def text(name: str, value: RuntimeVal) -> str:
+    expect(name, value, "string")
+    assert isinstance(value, StringVal)
+    return value.value
+
+
+def boolean(value: bool) -> BooleanVal:
+    return TRUE if value else FALSE
+
+
+def upper(s: RuntimeVal) -> RuntimeVal:
+    return StringVal(text("upper", s).upper())
+
+
+def lower(s: RuntimeVal) -> RuntimeVal:
+    return StringVal(text("lower", s).lower())
+
+
+def trim(s: RuntimeVal) -> RuntimeVal:
+    return StringVal(text("trim", s).strip())
+
+
+def concat(a: RuntimeVal, b: RuntimeVal) -> RuntimeVal:
+    return StringVal(text("concat", a) + text("concat", b))
+
+
+def repeat(s: RuntimeVal, times: RuntimeVal) -> RuntimeVal:
+    expect("repeat", times, "number")
+    assert isinstance(times, NumberVal)
+    if type(times.value) is not int or times.value < 0:
+        raise InterpretError(f"{gr('repeat')} count must be a whole number, not {gr(times.value)}")
+    return StringVal(text("repeat", s) * times.value)
+
+
+def split(s: RuntimeVal, separator: RuntimeVal) -> RuntimeVal:
+    sep = text("split", separator)
+    if not sep:
+        raise InterpretError(f"{gr('split')} separator is empty")
+    parts = ListVal()
+    parts.items = [StringVal(part) for part in text("split", s).split(sep)]
+    return parts
+
+
+def join(items: RuntimeVal, separator: RuntimeVal) -> RuntimeVal:
+    expect("join", items, "list")
+    assert isinstance(items, ListVal)
+    if isinstance(items, VectorVal):
+        # all numbers, no need to box them to find one
+        if len(items.data):
+            raise InterpretError(f"{gr('join')} expects a {gr('string')}, got a {gr('number')}")
+        return StringVal("")
+    return StringVal(text("join", separator).join(text("join", item) for item in items.items))
+
+
+def starts_with(s: RuntimeVal, prefix: RuntimeVal) -> RuntimeVal:
+    return boolean(text("starts_with", s).startswith(text("starts_with", prefix)))
+
+
+def ends_with(s: RuntimeVal, suffix: RuntimeVal) -> RuntimeVal:
+    return boolean(text("ends_with", s).endswith(text("ends_with", suffix)))
+
+
+def str_(value: RuntimeVal) -> RuntimeVal:
+    match value.type:
+        case "string":
+            return value
+        case "number":
+            return StringVal(str(value.value))
+        case "boolean":
+            return StringVal("true" if value.value else "false")
+        case "null":
+            return StringVal("null")
+    raise InterpretError(f"{gr('str')} can't convert a {gr(value.type)}")
+
+
+def number(s: RuntimeVal) -> RuntimeVal:
+    source = text("number", s).strip()
+    try:
+        return make_number(int(source))
+    except ValueError:
+        pass
+    try:
+        return make_number(float(source))
+    except ValueError:
+        raise InterpretError(f"{gr('number')} can't parse \"{gr(source)}\"")
+
+
+NATIVES: dict[str, RuntimeVal] = {
+    "upper": native("upper", upper, 1),
+    "lower": native("lower", lower, 1),
+    "trim": native("trim", trim, 1),
+    "concat": native("concat", concat, 2),
+    "repeat": native("repeat", repeat, 2),
+    "split": native("split", split, 2),
+    "join": native("join", join, 2),
+    "starts_with": native("starts_with", starts_with, 2),
+    "ends_with": native("ends_with", ends_with, 2),
+    "str": native("str", str_, 1),
+    "number": native("number", number, 1),
+}
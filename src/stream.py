@@ -0,0 +1,45 @@
+from typing import Callable
+import mmap
+
+from .environment import Environment
+from .optimizer import Bindings, Optimizer
+from .parser_ import Parser
+from .resolver import Resolver
+from .values import NULL, RuntimeVal
+from .ast_ import *
+
+
+def run_file(
+    path: str,
+    env: Environment,
+    run: Callable[[Stmt, Environment], RuntimeVal],
+    optimize: bool = True,
+) -> RuntimeVal:
+    """
+    Runs a script one top-level statement at a time, as it is parsed.
+
+    The file is memory-mapped instead of read, and each statement is
+    optimized, resolved and run on its own before the next one is parsed,
+    so output starts right away and a statement's tree is freed once it
+    ran, unless a function declared in it is still alive. An error in a
+    statement stops the run only once the statements before it ran. The
+    optimizer can't know which statement is the last, so it drops none,
+    and a function calling a native or one declared further down, which
+    a later global could shadow or still declare, is never memoized.
+    """
+    with open(path, "rb") as f:
+        if not f.seek(0, 2):
+            # an empty file can't be mapped
+            return NULL
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            optimizer = Optimizer()
+            bindings = Bindings({}, set())
+            resolver = Resolver()
+            rst: RuntimeVal = NULL
+            for stmt in Parser().iter_stmts(buffer):
+                if optimize:
+                    stmt = optimizer.optimize_stmt(stmt, bindings)
+                program = Program()
+                program.body = [resolver.resolve_stmt(stmt)]
+                rst = run(program, env)
+            return rst
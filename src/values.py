@@ -1,6 +1,12 @@
-from typing import Callable, Literal
+from typing import TYPE_CHECKING, Callable, Iterable, Literal
 
-from .ast_ import Stmt
+from .ast_ import FrameLayout, Stmt
+from .colored_text import gr
+from .exceptions import InterpretError
+
+if TYPE_CHECKING:
+    from .environment import Cell
+    from .memo import MemoCache
 
 
 ValueType = Literal[
@@ -16,66 +22,294 @@ ValueType = Literal[
 
 
 class RuntimeVal:
-    def __init__(self, type_: ValueType) -> None:
-        self.type = type_
+    """
+    Base of all runtime values.
+
+    Values keep their fields in __slots__ and their type tag on the class,
+    `fields` lists the slots of a class in declaration order for __repr__.
+    """
+
+    __slots__ = ()
+    type: ValueType
+    fields: tuple[str, ...] = ()
+
+    def __init_subclass__(cls) -> None:
+        super().__init_subclass__()
+        if "fields" not in cls.__dict__:
+            cls.fields = cls.fields + cls.__dict__.get("__slots__", ())
 
     def __repr__(self) -> str:
-        return str(self.__dict__)
+        return str({"type": self.type, **{name: getattr(self, name) for name in self.fields}})
 
 
 class NullVal(RuntimeVal):
+    __slots__ = ("value",)
+    type = "null"
+
     def __init__(self) -> None:
-        super().__init__("null")
         self.value = None
 
 
 class NumberVal(RuntimeVal):
-    def __init__(self, value: float) -> None:
-        super().__init__("number")
+    __slots__ = ("value",)
+    type = "number"
+
+    def __init__(self, value: int | float) -> None:
         self.value = value
 
 
 class StringVal(RuntimeVal):
+    __slots__ = ("value",)
+    type = "string"
+
     def __init__(self, value: str) -> None:
-        super().__init__("string")
         self.value = value
 
 
 class BooleanVal(RuntimeVal):
+    __slots__ = ("value",)
+    type = "boolean"
+
     def __init__(self, value: bool = True) -> None:
-        super().__init__("boolean")
         self.value = value
 
 
+class Shape:
+    """
+    Key layout shared by every object with the same keys in the same order.
+
+    Shapes form a tree rooted at EMPTY_SHAPE, with one child per key added,
+    so adding the same keys in the same order always ends on the same
+    shape. Objects keep only their values, in key order.
+    """
+
+    __slots__ = ("keys", "index", "transitions")
+
+    def __init__(self, keys: tuple[str, ...]) -> None:
+        self.keys = keys
+        self.index: dict[str, int] = {key: i for (i, key) in enumerate(keys)}
+        self.transitions: dict[str, Shape] = {}
+
+    def add(self, key: str) -> "Shape":
+        if key in self.index:
+            return self
+        shape = self.transitions.get(key)
+        if shape is None:
+            shape = self.transitions[key] = Shape(self.keys + (key,))
+        return shape
+
+    def extend(self, keys: Iterable[str]) -> "Shape":
+        shape = self
+        for key in keys:
+            shape = shape.add(key)
+        return shape
+
+    def __repr__(self) -> str:
+        return f"<shape {', '.join(self.keys)}>"
+
+
+EMPTY_SHAPE = Shape(())
+
+
 class ObjectVal(RuntimeVal):
-    def __init__(self) -> None:
-        super().__init__("object")
-        self.properties: dict[str, RuntimeVal] = {}
+    __slots__ = ("shape", "values")
+    type = "object"
+    fields = ("properties",)
+
+    def __init__(self, shape: Shape = EMPTY_SHAPE, values: list[RuntimeVal] | None = None) -> None:
+        self.shape = shape
+        self.values = values if values is not None else []
+
+    @property
+    def properties(self) -> dict[str, RuntimeVal]:
+        # a new dict, setting its keys doesn't change the object
+        return dict(zip(self.shape.keys, self.values))
+
+    @properties.setter
+    def properties(self, properties: dict[str, RuntimeVal]) -> None:
+        self.shape = EMPTY_SHAPE.extend(properties)
+        self.values = list(properties.values())
+
+
+def literal_layout(keys: Iterable[str]) -> tuple[Shape, list[int] | None]:
+    # the shape of the objects an object literal builds and, when a key is
+    # repeated, the slot of each of its values (the last one wins)
+    keys = list(keys)
+    shape = EMPTY_SHAPE.extend(keys)
+    if len(shape.keys) == len(keys):
+        return shape, None
+    return shape, [shape.index[key] for key in keys]
+
+
+def build_object(shape: Shape, slots: list[int] | None, values: list[RuntimeVal]) -> ObjectVal:
+    # values in the order of the literal's keys, see literal_layout
+    if slots is not None:
+        placed: list[RuntimeVal] = [NULL] * len(shape.keys)
+        for (slot, value) in zip(slots, values):
+            placed[slot] = value
+        values = placed
+    return ObjectVal(shape, values)
+
+
+class PropertyCache:
+    """
+    Monomorphic inline cache of a property read with a constant key: the
+    shape of the last object read there and the slot of the key in it.
+    Reading another object of that shape is one identity check.
+    """
+
+    __slots__ = ("key", "shape", "slot")
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self.shape: Shape | None = None
+        self.slot = 0
+
+    def read(self, obj: RuntimeVal) -> RuntimeVal:
+        if obj.type == "object":
+            assert isinstance(obj, ObjectVal)
+            if obj.shape is self.shape:
+                return obj.values[self.slot]
+            value = read_property(obj, self.key)
+            self.shape = obj.shape
+            self.slot = obj.shape.index[self.key]
+            return value
+        return read_property(obj, self.key)
+
+    def __repr__(self) -> str:
+        return f"<property {self.key}>"
+
+
+def read_property(obj: RuntimeVal, key: str) -> RuntimeVal:
+    # obj.key without a cache
+    if obj.type != "object":
+        raise InterpretError(f"Can't read property {gr(key)} of a {gr(obj.type)}")
+    assert isinstance(obj, ObjectVal)
+    slot = obj.shape.index.get(key)
+    if slot is None:
+        raise InterpretError(f"Object has no property {gr(key)}")
+    return obj.values[slot]
 
 
 class ListVal(RuntimeVal):
+    __slots__ = ("items",)
+    type = "list"
+
     def __init__(self) -> None:
-        super().__init__("list")
         self.items: list[RuntimeVal] = []
 
 
+class VectorVal(ListVal):
+    """
+    List of numbers stored unboxed.
+
+    `data` is an array("q") of ints, or an array("d") or numpy array of
+    floats (see src/vectors.py). `items` boxes the elements on demand, so
+    a vector prints and reads like any other list.
+    """
+
+    __slots__ = ("data",)
+    fields = ("items",)
+
+    def __init__(self, data) -> None:
+        self.data = data
+
+    @property
+    def items(self) -> list[RuntimeVal]:
+        return [make_number(value) for value in self.data.tolist()]
+
+
 class NativeFnValue(RuntimeVal):
-    def __init__(self, func: Callable[..., RuntimeVal]) -> None:
-        super().__init__("native-fn")
-        self.call = func
+    """
+    A function written in Python. `call` takes the list of arguments and
+    the environment. Natives of a fixed arity also have `fast`, taking the
+    arguments one by one, as plain ints and floats when `numeric` is set,
+    so engines can call them without building a list (see src/stdlib).
+    """
+
+    __slots__ = ("call", "coroutine", "arity", "fast", "numeric")
+    type = "native-fn"
+    fields = ("call", "coroutine")
+
+    def __init__(
+        self,
+        func: Callable[..., RuntimeVal],
+        arity: int | None = None,
+        fast: Callable | None = None,
+        numeric: bool = False,
+    ) -> None:
+        self.arity = arity
+        self.fast = fast
+        self.numeric = numeric
+        if not is_coroutine_function(func):
+            self.call = func
+            self.coroutine = None
+            return
+        # only the async engine can suspend a script to await it, the
+        # others get a call that says so
+        def call(args, env) -> RuntimeVal:
+            raise InterpretError(f"{gr(func.__name__)} can only be called by the async engine")
+        call.__name__ = func.__name__
+        self.call = call
+        self.coroutine = func
+
+
+# inspect.CO_COROUTINE
+CO_COROUTINE = 0x80
+
+
+def is_coroutine_function(func: Callable) -> bool:
+    # inspect.iscoroutinefunction without importing inspect, which is slow
+    # to import; bound methods pass on their function's __code__
+    code = getattr(func, "__code__", None)
+    return code is not None and bool(code.co_flags & CO_COROUTINE)
 
 
 class FunctionValue(RuntimeVal):
+    __slots__ = ("name", "parameters", "declarationEnv", "body", "layout", "cells", "pure", "memo")
+    type = "function"
+    # the resolver's layout and cells, pure and memo are bookkeeping, not
+    # part of the printed value
+    fields = ("name", "parameters", "declarationEnv", "body")
+
     def __init__(
         self,
         name: str,
         parameters: list[str],
         declarationEnv,
-        body: list[Stmt]
+        body: list[Stmt],
+        layout: FrameLayout | None = None,
+        pure: bool = False,
+        cells: "list[Cell] | None" = None,
     ) -> None:
         from .environment import Environment
-        super().__init__("function")
         self.name = name
         self.parameters = parameters
+        # for resolved functions only the globals, the rest is in cells
         self.declarationEnv: Environment = declarationEnv
         self.body = body
+        # frame layout of resolved functions and the cells they captured
+        self.layout = layout
+        self.cells = cells
+        self.pure = pure
+        # results cache, set when the function is memoized
+        self.memo: "MemoCache | None" = None
+
+
+# Values are never mutated in place, so equal literals and the common
+# constants can share a single instance.
+NULL = NullVal()
+TRUE = BooleanVal(True)
+FALSE = BooleanVal(False)
+
+SMALL_INT_MIN = -5
+SMALL_INT_MAX = 1024
+SMALL_INTS: list[NumberVal] = [
+    NumberVal(i) for i in range(SMALL_INT_MIN, SMALL_INT_MAX + 1)
+]
+
+
+def make_number(value: int | float) -> NumberVal:
+    if type(value) is int and SMALL_INT_MIN <= value <= SMALL_INT_MAX:
+        return SMALL_INTS[value - SMALL_INT_MIN]
+    return NumberVal(value)
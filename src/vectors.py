@@ -0,0 +1,198 @@
+from array import array
+from itertools import repeat
+from typing import Callable
+
+from .colored_text import gr
+from .values import *
+from .exceptions import *
+
+# Numeric lists are computed on unboxed storage: ints in array("q"), floats
+# in array("d"), or in numpy float64 arrays when numpy is installed. Int
+# vectors stay arrays so results keep python's int semantics.
+#
+# numpy takes longer to import than the whole interpreter, so it is only
+# imported by the first float vector, see float_arrays. Until then no
+# numpy array can exist and `numpy` is None.
+numpy = None
+numpy_checked = False
+
+# elements to build a vector from, iterated twice when they don't fit
+Data = list[int | float] | range
+
+NUMPY_OPERATORS: dict[str, Callable] = {}
+ZERO_DIVISION = {"/": "Division by zero", "%": "Modulo by zero"}
+
+
+def float_arrays():
+    # numpy, imported on first use, or None when it isn't installed
+    global numpy, numpy_checked
+    if not numpy_checked:
+        numpy_checked = True
+        try:
+            import numpy as module
+        except ImportError:
+            return None
+        numpy = module
+        NUMPY_OPERATORS.update({
+            "+": module.add,
+            "-": module.subtract,
+            "*": module.multiply,
+            "/": module.true_divide,
+            "%": module.mod,
+        })
+    return numpy
+
+
+def make_vector(values: Data, floats: bool) -> ListVal:
+    array_ = storage(values, floats)
+    if isinstance(array_, list):
+        # python ints that don't fit in 64 bits stay boxed
+        boxed = ListVal()
+        boxed.items = [make_number(value) for value in array_]
+        return boxed
+    return VectorVal(array_)
+
+
+def storage(values: Data, floats: bool):
+    if floats:
+        np = float_arrays()
+        return np.array(values, dtype=float) if np else array("d", values)
+    try:
+        return array("q", values)
+    except OverflowError:
+        return list(values)
+
+
+def vector_data(value: RuntimeVal) -> tuple[object, bool] | None:
+    # (unboxed elements, whether they are floats) of a list of numbers,
+    # None for anything else
+    if isinstance(value, VectorVal):
+        data = value.data
+        return data, not (isinstance(data, array) and data.typecode == "q")
+    if not isinstance(value, ListVal):
+        return None
+    numbers = []
+    floats = False
+    for item in value.items:
+        if item.type != "number":
+            return None
+        numbers.append(item.value)
+        floats = floats or type(item.value) is not int
+    return storage(numbers, floats), floats
+
+
+def elementwise(
+    lhs: RuntimeVal, rhs: RuntimeVal, operator: str, op: Callable[[int | float, int | float], int | float]
+) -> RuntimeVal:
+    """lhs op rhs for a list and a number or two lists of the same length."""
+    sides = []
+    for value in (lhs, rhs):
+        if value.type == "number":
+            sides.append((value.value, type(value.value) is not int))
+        else:
+            sides.append(vector_data(value))
+            if sides[-1] is None:
+                return NULL
+    ((left, left_floats), (right, right_floats)) = sides
+
+    left_is_list = lhs.type == "list"
+    right_is_list = rhs.type == "list"
+    if left_is_list and right_is_list and len(left) != len(right):
+        raise InterpretError(
+            f"Can't combine lists of length {gr(len(left))} and {gr(len(right))} with {gr(operator)}")
+
+    floats = left_floats or right_floats or operator == "/"
+    if floats and float_arrays() is not None:
+        if operator in ZERO_DIVISION and not numpy.all(right):
+            raise InterpretError(ZERO_DIVISION[operator])
+        return VectorVal(NUMPY_OPERATORS[operator](
+            numpy.asarray(left, dtype=float), numpy.asarray(right, dtype=float)))
+
+    if not left_is_list:
+        values = list(map(op, repeat(left), right))
+    elif not right_is_list:
+        values = list(map(op, left, repeat(right)))
+    else:
+        values = list(map(op, left, right))
+    return make_vector(values, floats)
+
+
+def flatten(args: list[RuntimeVal], name: str) -> list:
+    # numbers and lists of numbers given to a reduction, as chunks of data
+    chunks = []
+    for arg in args:
+        if arg.type == "number":
+            chunks.append((arg.value,))
+            continue
+        vector = vector_data(arg)
+        if vector is None:
+            raise InterpretError(f"{gr(name)} expects numbers or lists of numbers")
+        chunks.append(vector[0])
+    return chunks
+
+
+def is_ndarray(data) -> bool:
+    return numpy is not None and isinstance(data, numpy.ndarray)
+
+
+def element(vector: VectorVal, index: int) -> NumberVal:
+    # one element, without boxing the others
+    value = vector.data[index]
+    return make_number(value.item() if is_ndarray(vector.data) else value)
+
+
+def appended(vector: VectorVal, number: int | float) -> ListVal:
+    # a new list with number after the elements, kept unboxed when the
+    # number is of the same kind as the elements
+    data, floats = vector_data(vector)
+    if floats != (type(number) is not int):
+        boxed = ListVal()
+        boxed.items = vector.items + [make_number(number)]
+        return boxed
+    if is_ndarray(data):
+        return VectorVal(numpy.append(data, number))
+    try:
+        return VectorVal(data + array(data.typecode, [number]))
+    except OverflowError:
+        # too big for array("q"), make_vector boxes it
+        return make_vector([*data.tolist(), number], floats)
+
+
+def total(chunks: list) -> int | float:
+    # chunk.sum().item() turns numpy scalars back into python numbers
+    return sum(chunk.sum().item() if is_ndarray(chunk) else sum(chunk) for chunk in chunks)
+
+
+def reduce_sum(args: list[RuntimeVal]) -> RuntimeVal:
+    return make_number(total(flatten(args, "sum")))
+
+
+def reduce_extreme(args: list[RuntimeVal], name: str, pick: Callable) -> RuntimeVal:
+    # pick is the builtin max or min
+    candidates = [
+        getattr(chunk, name)().item() if is_ndarray(chunk) else pick(chunk)
+        for chunk in flatten(args, name) if len(chunk)
+    ]
+    if not candidates:
+        raise InterpretError(f"{gr(name)} of no numbers")
+    return make_number(pick(candidates))
+
+
+def reduce_mean(args: list[RuntimeVal]) -> RuntimeVal:
+    chunks = flatten(args, "mean")
+    count = sum(len(chunk) for chunk in chunks)
+    if not count:
+        raise InterpretError(f"{gr('mean')} of no numbers")
+    return make_number(total(chunks) / count)
+
+
+def make_range(args: list[RuntimeVal]) -> RuntimeVal:
+    # range(stop), range(start, stop) or range(start, stop, step)
+    if not 1 <= len(args) <= 3 or any(
+        arg.type != "number" or type(arg.value) is not int for arg in args
+    ):
+        raise InterpretError(f"{gr('range')} expects one to three integers")
+    bounds = [arg.value for arg in args]
+    if len(bounds) == 3 and bounds[2] == 0:
+        raise InterpretError(f"{gr('range')} step can't be zero")
+    return make_vector(range(*bounds), False)
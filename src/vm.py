@@ -0,0 +1,287 @@
+from .compiler import BINARY_OPS, CodeObject, Op, compile_program
+from .environment import Cell, Environment, SlotEnvironment
+from .interpreter import BINARY_OPERATORS, eval_list_binary_expr, new_call_scope, read_item
+from .memo import auto_memoize, call_memoized
+from .colored_text import gr
+from .values import *
+from .ast_ import *
+from .exceptions import *
+
+
+# plain ints: comparing against IntEnum members is much slower in the loop
+(LOAD_CONST, LOAD_NULL, LOAD_NAME, STORE_NAME, CHECK_UNDECLARED, DECLARE_LET,
+ DECLARE_CONST, BINARY_OP, CALL, MAKE_FUNCTION, BUILD_LIST, BUILD_OBJECT,
+ POP_TOP, RETURN_VALUE, FAIL, LOAD_PROPERTY, LOAD_ITEM, LOAD_FAST, STORE_FAST,
+ DECLARE_FAST, LOAD_CELL, STORE_CELL, DECLARE_CELL, BINARY_ADD, BINARY_SUB,
+ BINARY_MUL) = [op.value for op in Op]
+
+
+class VMFunctionValue(FunctionValue):
+    __slots__ = ("code",)
+    # print like the tree walker's FunctionValue
+    fields = FunctionValue.fields
+
+    def __init__(
+        self, code: CodeObject, declarationEnv: Environment, cells: list[Cell] | None = None
+    ) -> None:
+        super().__init__(
+            code.name, code.parameters, declarationEnv, code.body, code.layout, code.pure, cells)
+        self.code = code
+
+
+def undefined(name: str) -> RuntimeError:
+    return RuntimeError(f"Can't resolve {gr(name)} as it is undefined.")
+
+
+def binary_op(lhs: RuntimeVal, rhs: RuntimeVal, operator: str) -> RuntimeVal:
+    # the operands of a specialized op that aren't two numbers
+    if lhs.type == "number" and rhs.type == "number":
+        return make_number(BINARY_OPERATORS[operator](lhs.value, rhs.value))
+    if lhs.type == "list" or rhs.type == "list":
+        return eval_list_binary_expr(lhs, rhs, operator)
+    return NULL
+
+
+def call_function(fn: VMFunctionValue, args: list[RuntimeVal]) -> RuntimeVal:
+    return run(fn.code, new_call_scope(fn, args))
+
+
+def run(code: CodeObject, env: Environment) -> RuntimeVal:
+    operators = [BINARY_OPERATORS[op] for op in BINARY_OPS]
+    stack: list[RuntimeVal] = []
+    # (code, env, slots, cells, ip) of the callers
+    frames: list[tuple[CodeObject, Environment, list, list[Cell], int]] = []
+
+    instructions = code.code
+    consts = code.consts
+    names = code.names
+    ip = 0
+    # A resolved function's frame is just its slots and cells, addressed by
+    # LOAD_FAST and LOAD_CELL, and env is the globals; an unresolved one
+    # looks every name up in the Environment chain of env.
+    slots: list[RuntimeVal | None] = []
+    cells: list[Cell] = []
+    if isinstance(env, SlotEnvironment):
+        (env, slots, cells) = (env.globals, env.slots, env.cells)
+
+    while True:
+        op = instructions[ip]
+        arg = instructions[ip + 1]
+        ip += 2
+
+        # the most frequent instructions first
+        if op == LOAD_FAST:
+            value = slots[arg]
+            if value is None:
+                raise undefined(code.slot_names[arg])
+            stack.append(value)
+
+        elif op == LOAD_CONST:
+            stack.append(consts[arg])
+
+        elif op == BINARY_ADD:
+            rhs = stack.pop()
+            lhs = stack[-1]
+            if lhs.__class__ is NumberVal and rhs.__class__ is NumberVal:
+                value = lhs.value + rhs.value
+                stack[-1] = (SMALL_INTS[value - SMALL_INT_MIN]
+                             if value.__class__ is int and SMALL_INT_MIN <= value <= SMALL_INT_MAX
+                             else NumberVal(value))
+            else:
+                stack[-1] = binary_op(lhs, rhs, "+")
+
+        elif op == LOAD_NAME:
+            stack.append(env.lookup_var(names[arg]))
+
+        elif op == CALL:
+            fn = stack[-arg - 1]
+            if (fn.__class__ is VMFunctionValue and fn.code.args_in_slots
+                    and arg == len(fn.parameters) and fn.memo is None):
+                # a resolved function: the arguments become the first slots
+                # of the new frame, no scope object is built
+                frames.append((code, env, slots, cells, ip))
+                code = fn.code
+                env = fn.declarationEnv
+                base = len(stack) - arg
+                slots = stack[base:]
+                slots += code.unset_locals
+                del stack[base - 1:]
+                cell_count = fn.layout.cell_count
+                cells = [Cell() for _ in range(cell_count)] + fn.cells if cell_count else fn.cells
+                instructions = code.code
+                consts = code.consts
+                names = code.names
+                ip = 0
+                continue
+
+            # natives of a fixed arity take one or two arguments straight
+            # off the stack, numeric ones unboxed, see NativeFnValue
+            if arg == 1 and fn.type == "native-fn" and fn.arity == 1 and (
+                not fn.numeric or stack[-1].type == "number"
+            ):
+                x = stack.pop()
+                stack[-1] = make_number(fn.fast(x.value)) if fn.numeric else fn.fast(x)
+                continue
+            if arg == 2 and fn.type == "native-fn" and fn.arity == 2 and (
+                not fn.numeric or (stack[-1].type == "number" and stack[-2].type == "number")
+            ):
+                y = stack.pop()
+                x = stack.pop()
+                stack[-1] = make_number(fn.fast(x.value, y.value)) if fn.numeric else fn.fast(x, y)
+                continue
+
+            args = stack[len(stack) - arg:]
+            del stack[len(stack) - arg:]
+            fn = stack.pop()
+
+            if fn.type == "native-fn":
+                assert isinstance(fn, NativeFnValue)
+                stack.append(fn.call(args, env))
+            elif fn.type == "function":
+                assert isinstance(fn, VMFunctionValue)
+                if fn.memo is not None:
+                    # runs in a loop of its own, so the result can be kept
+                    stack.append(call_memoized(fn, args, call_function))
+                    continue
+                frames.append((code, env, slots, cells, ip))
+                code = fn.code
+                env = new_call_scope(fn, args)
+                if isinstance(env, SlotEnvironment):
+                    (env, slots, cells) = (env.globals, env.slots, env.cells)
+                instructions = code.code
+                consts = code.consts
+                names = code.names
+                ip = 0
+            else:
+                raise InterpretError(f"Function {fn} is not implemented")
+
+        elif op == RETURN_VALUE:
+            if not frames:
+                return stack.pop()
+            (code, env, slots, cells, ip) = frames.pop()
+            instructions = code.code
+            consts = code.consts
+            names = code.names
+
+        elif op == POP_TOP:
+            stack.pop()
+
+        elif op == BINARY_SUB:
+            rhs = stack.pop()
+            lhs = stack[-1]
+            if lhs.__class__ is NumberVal and rhs.__class__ is NumberVal:
+                value = lhs.value - rhs.value
+                stack[-1] = (SMALL_INTS[value - SMALL_INT_MIN]
+                             if value.__class__ is int and SMALL_INT_MIN <= value <= SMALL_INT_MAX
+                             else NumberVal(value))
+            else:
+                stack[-1] = binary_op(lhs, rhs, "-")
+
+        elif op == BINARY_MUL:
+            rhs = stack.pop()
+            lhs = stack[-1]
+            if lhs.__class__ is NumberVal and rhs.__class__ is NumberVal:
+                value = lhs.value * rhs.value
+                stack[-1] = (SMALL_INTS[value - SMALL_INT_MIN]
+                             if value.__class__ is int and SMALL_INT_MIN <= value <= SMALL_INT_MAX
+                             else NumberVal(value))
+            else:
+                stack[-1] = binary_op(lhs, rhs, "*")
+
+        elif op == STORE_FAST:
+            if slots[arg] is None:
+                raise undefined(code.slot_names[arg])
+            slots[arg] = stack[-1]
+
+        elif op == DECLARE_FAST:
+            slots[arg] = stack[-1]
+
+        elif op == LOAD_CELL:
+            value = cells[arg].value
+            if value is None:
+                raise undefined(code.cell_names[arg])
+            stack.append(value)
+
+        elif op == BINARY_OP:
+            rhs = stack.pop()
+            lhs = stack[-1]
+            if lhs.type == "number" and rhs.type == "number":
+                stack[-1] = make_number(operators[arg](lhs.value, rhs.value))
+            elif lhs.type == "list" or rhs.type == "list":
+                stack[-1] = eval_list_binary_expr(lhs, rhs, BINARY_OPS[arg])
+            else:
+                stack[-1] = NULL
+
+        elif op == LOAD_PROPERTY:
+            cache = consts[arg]
+            obj = stack[-1]
+            if obj.__class__ is ObjectVal and obj.shape is cache.shape:
+                stack[-1] = obj.values[cache.slot]
+            else:
+                stack[-1] = cache.read(obj)
+
+        elif op == STORE_CELL:
+            cell = cells[arg]
+            if cell.value is None:
+                raise undefined(code.cell_names[arg])
+            cell.value = stack[-1]
+
+        elif op == DECLARE_CELL:
+            cells[arg].value = stack[-1]
+
+        elif op == MAKE_FUNCTION:
+            body = consts[arg]
+            if body.layout is None:
+                fn = VMFunctionValue(body, env)
+            else:
+                # a closure keeps only the cells of its free variables, a
+                # top-level function captures none
+                fn = VMFunctionValue(body, env, [cells[i] for i in body.layout.captures])
+            auto_memoize(fn)
+            stack.append(fn)
+
+        elif op == STORE_NAME:
+            stack[-1] = env.assign_var(names[arg], stack[-1])
+
+        elif op == LOAD_NULL:
+            stack.append(NULL)
+
+        elif op == CHECK_UNDECLARED:
+            if env.has_var(names[arg]):
+                raise VarExistsError(
+                    f"Can't declare variable {gr(names[arg])}. As it is already defined.")
+
+        elif op == DECLARE_LET:
+            env.declare_var(names[arg], stack[-1], False)
+
+        elif op == DECLARE_CONST:
+            env.declare_var(names[arg], stack[-1], True)
+
+        elif op == BUILD_LIST:
+            array = ListVal()
+            if arg:
+                array.items = stack[len(stack) - arg:]
+                del stack[len(stack) - arg:]
+            stack.append(array)
+
+        elif op == LOAD_ITEM:
+            key = stack.pop()
+            stack[-1] = read_item(stack[-1], key)
+
+        elif op == BUILD_OBJECT:
+            shape, slots_ = consts[arg]
+            count = len(shape.keys) if slots_ is None else len(slots_)
+            values = stack[len(stack) - count:]
+            del stack[len(stack) - count:]
+            stack.append(build_object(shape, slots_, values))
+
+        elif op == FAIL:
+            raise InterpretError(consts[arg])
+
+        else:
+            raise InterpretError(f"Unknown opcode {gr(op)}")
+
+
+def execute(astNode: Stmt, env: Environment) -> RuntimeVal:
+    assert isinstance(astNode, Program)
+    return run(compile_program(astNode), env)